@@ -7,6 +7,10 @@ import altair as alt
 from PIL import Image
 import re
 import time
+from core.compiler import ScenarioCompiler
+from core.event_log import load_events
+from core.adb_shell import list_devices, forget_devices
+from core.artifact_store import resolve_run_dir
 import tkinter as tk
 from tkinter import filedialog
 
@@ -52,14 +56,8 @@ def select_folder():
 
 def get_connected_devices():
     try:
-        startupinfo = None
-        if os.name == 'nt': 
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        
-        result = subprocess.check_output(["adb", "devices"], startupinfo=startupinfo).decode("utf-8")
-        lines = result.strip().split("\n")[1:]
-        devices = [line.split("\t")[0] for line in lines if "device" in line]
+        # Cache beberapa detik: Streamlit menjalankan ulang script di setiap interaksi
+        devices = list_devices()
         return devices if devices else ["No Device Found"]
     except FileNotFoundError:
         return ["ADB Not Installed"]
@@ -96,6 +94,7 @@ with st.sidebar:
     selected_device = st.radio("Target Device:", devices)
     
     if st.button("🔄 Refresh Devices"):
+        forget_devices()
         st.rerun()
 
     st.divider()
@@ -119,6 +118,8 @@ with st.sidebar:
 
     st.divider()
     show_logs = st.checkbox("Show Live Logs", value=True)
+    record_session = st.checkbox("🎥 Rekam sesi (untuk replay)", value=False)
+    replay_dir = st.text_input("🎞️ Replay dari folder rekaman", "", help="Kosongkan untuk run di device").strip()
 
 # --- MAIN AREA ---
 
@@ -130,11 +131,21 @@ c2.metric("Target Device", selected_device)
 status_metric = c3.empty()
 status_metric.metric("Status", "Ready")
 
+# --- PREVIEW LANGKAH (Plan hasil compile, instan dari cache) ---
+if selected_scenario:
+    with st.expander("👁️ Preview Langkah", expanded=False):
+        plan = ScenarioCompiler().load(selected_scenario)
+        preview_rows = ScenarioCompiler.describe(plan["steps"])
+        if preview_rows:
+            st.dataframe(pd.DataFrame(preview_rows), use_container_width=True, hide_index=True)
+        else:
+            st.info("Skenario kosong / tidak ada langkah yang dikenali.")
+
 st.divider()
 
 # --- EKSEKUSI ---
 if st.button("▶️ MULAI TEST SEKARANG"):
-    if not selected_device or "Error" in selected_device or "No Device" in selected_device:
+    if not replay_dir and (not selected_device or "Error" in selected_device or "No Device" in selected_device):
         st.error(f"❌ Error Device: {selected_device}")
     elif not selected_scenario:
         st.error("❌ Pilih skenario terlebih dahulu!")
@@ -162,6 +173,10 @@ if st.button("▶️ MULAI TEST SEKARANG"):
             # Mode Dev: Panggil main.py langsung via python interpreter
             cmd = [sys.executable, "main.py", selected_scenario]
 
+        # Replay = tanpa device; rekaman disimpan di <report>/recording
+        if replay_dir: cmd += ["--replay", replay_dir]
+        elif record_session: cmd += ["--record"]
+
         try:
             env = os.environ.copy()
             env["PYTHONUNBUFFERED"] = "1"
@@ -206,6 +221,20 @@ if st.button("▶️ MULAI TEST SEKARANG"):
             if step_data and step_data[-1]['Status'] == "Running":
                 step_data[-1]['Status'] = "Pass" if not failed_flag else "Fail"
 
+            scenario_name = os.path.splitext(os.path.basename(selected_scenario))[0]
+            report_dir = resolve_run_dir(os.path.join("reports", scenario_name))
+
+            # Status akurat dari events.jsonl (bukan tebakan dari stdout)
+            event_steps = [e for e in load_events(report_dir) if e.get("kind") == "step"]
+            if event_steps:
+                step_data = [{
+                    "Step": f"Step {e['step']}",
+                    "Description": e['narrative'],
+                    "Status": "Pass" if e.get('status') == "pass" else "Fail",
+                    "Durasi (s)": e.get('duration'),
+                } for e in event_steps]
+                failed_flag = failed_flag or any(s['Status'] == "Fail" for s in step_data)
+
             if process.returncode == 0 and not failed_flag:
                 st.success("✅ Testing Selesai: SUKSES")
                 status_metric.metric("Status", "Completed", delta="Success")
@@ -237,10 +266,8 @@ if st.button("▶️ MULAI TEST SEKARANG"):
                     st.dataframe(df_steps, use_container_width=True, hide_index=True)
 
             st.divider()
-            scenario_name = os.path.splitext(os.path.basename(selected_scenario))[0]
-            report_dir = os.path.join("reports", scenario_name)
             
-            t1, t2 = st.tabs(["🗺️ Flowchart", "📥 Download Report"])
+            t1, t2, t3 = st.tabs(["🗺️ Flowchart", "📥 Download Report", "📡 API Metrics"])
             
             with t1:
                 flow_img = os.path.join(report_dir, "flowchart.png")
@@ -252,14 +279,33 @@ if st.button("▶️ MULAI TEST SEKARANG"):
                     st.warning("Flowchart tidak tersedia.")
                     
             with t2:
-                doc_path = os.path.join(report_dir, f"Heimdall_Saga_{scenario_name}.docx")
-                if os.path.exists(doc_path):
-                    with open(doc_path, "rb") as file:
+                # Laporan utuh atau per bagian (--saga-chunk)
+                doc_paths = sorted(f for f in (os.listdir(report_dir) if os.path.isdir(report_dir) else [])
+                                   if f.startswith(f"Heimdall_Saga_{scenario_name}") and f.endswith(".docx"))
+                for doc_name in doc_paths:
+                    part = doc_name[len(f"Heimdall_Saga_{scenario_name}"):-len(".docx")]
+                    with open(os.path.join(report_dir, doc_name), "rb") as file:
                         st.download_button(
-                            label="📄 Download Laporan Word",
+                            label=f"📄 Download Laporan Word{' ' + part.strip('_') if part else ''}",
                             data=file,
-                            file_name=f"Report_{scenario_name}.docx",
-                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                            file_name=f"Report_{scenario_name}{part}.docx",
+                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                            key=f"doc_{doc_name}"
                         )
+
+            with t3:
+                api_event = next((e for e in reversed(load_events(report_dir)) if e.get("kind") == "api_metrics"), None)
+                if api_event and api_event.get("rows"):
+                    df_api = pd.DataFrame(api_event["rows"])
+                    st.dataframe(df_api, use_container_width=True, hide_index=True)
+                    bar = alt.Chart(df_api.head(15)).mark_bar().encode(
+                        x=alt.X("p95_ms", title="p95 (ms)"),
+                        y=alt.Y("endpoint", sort="-x", title=None),
+                        color=alt.condition(alt.datum.error_rate > 0, alt.value('#e74c3c'), alt.value('#0051a2')),
+                        tooltip=["method", "endpoint", "count", "p50_ms", "p95_ms", "p99_ms", "error_rate", "bytes"]
+                    )
+                    st.altair_chart(bar, use_container_width=True)
+                else:
+                    st.info("Tidak ada trafik API yang tertangkap.")
         except Exception as e:
             st.error(f"Execution Error: {e}")
\ No newline at end of file
@@ -0,0 +1,167 @@
+import queue
+import subprocess
+import threading
+import time
+
+
+class PersistentShell:
+    """
+    1 proses `adb shell` yang tetap hidup untuk banyak perintah.
+    Setiap `adb shell <cmd>` baru = spawn proses + handshake adb (~50-150ms);
+    di sini perintah dikirim lewat stdin dan output dibaca sampai penanda akhir.
+    Beberapa perintah bisa dikirim sekaligus (run_batch) = 1 round-trip USB.
+    """
+
+    def __init__(self, device_serial=None):
+        self.adb = ["adb"] + (["-s", device_serial] if device_serial else [])
+        self.lock = threading.Lock()
+        self.process = None
+        self.lines = None
+        self.counter = 0
+        # Latency per jenis perintah ("input tap", "dumpsys meminfo", ...)
+        self.latency = {}
+        self.round_trips = 0
+
+    def _ensure(self):
+        if self.process is not None and self.process.poll() is None:
+            return
+        self.process = subprocess.Popen(
+            self.adb + ["shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        # Thread pembaca: readline() tidak bisa diberi timeout, queue bisa
+        self.lines = queue.Queue()
+        threading.Thread(target=self._pump, args=(self.process, self.lines), daemon=True).start()
+
+    @staticmethod
+    def _pump(process, lines):
+        for raw in iter(process.stdout.readline, b""):
+            lines.put(raw.decode("utf-8", errors="replace"))
+        lines.put(None)
+
+    def run(self, command, timeout=10.0):
+        """Jalankan perintah di shell device, return stdout+stderr (str)."""
+        return self.run_batch([command], timeout)[0]
+
+    def run_batch(self, commands, timeout=10.0):
+        """
+        Kirim semua perintah dalam 1 tulisan ke stdin, lalu baca output masing-masing
+        sampai penandanya. Return list output (urutan sama dengan commands).
+        """
+        with self.lock:
+            self._ensure()
+            markers, script = [], []
+            for command in commands:
+                self.counter += 1
+                marker = f"__HEIM_END_{self.counter}__"
+                markers.append(marker)
+                # 'echo' kosong menjamin penanda selalu di baris sendiri
+                script.append(f"{command}\necho\necho {marker}\n")
+            started = time.time()
+            self.process.stdin.write("".join(script).encode("utf-8"))
+            self.process.stdin.flush()
+            self.round_trips += 1
+
+            outputs = []
+            for command, marker in zip(commands, markers):
+                output = []
+                while True:
+                    try:
+                        line = self.lines.get(timeout=timeout)
+                    except queue.Empty:
+                        self.close()
+                        raise TimeoutError(f"adb shell timeout ({timeout}s): {command}")
+                    if line is None:
+                        self.process = None
+                        raise RuntimeError(f"adb shell terputus saat menjalankan: {command}")
+                    if line.strip() == marker:
+                        break
+                    output.append(line)
+                # Latency per perintah = selisih sejak penanda sebelumnya
+                now = time.time()
+                self._record(command, (now - started) * 1000)
+                started = now
+                # Buang baris kosong dari 'echo' penjaga
+                outputs.append("".join(output)[:-1])
+            return outputs
+
+    def _record(self, command, ms):
+        kind = " ".join(command.split()[:2])
+        s = self.latency.setdefault(kind, {"calls": 0, "ms": 0.0, "max_ms": 0.0})
+        s["calls"] += 1
+        s["ms"] += ms
+        s["max_ms"] = max(s["max_ms"], ms)
+
+    def summary(self):
+        return [
+            {"command": kind, "calls": s["calls"], "avg_ms": round(s["ms"] / s["calls"], 1), "max_ms": round(s["max_ms"], 1)}
+            for kind, s in sorted(self.latency.items(), key=lambda kv: -kv[1]["ms"])
+        ]
+
+    def print_stats(self, label="adb"):
+        rows = self.summary()
+        if not rows: return
+        total = sum(r["calls"] for r in rows)
+        print(f"  🔌 [Shell] {label}: {total} perintah dalam {self.round_trips} round-trip")
+        for r in rows:
+            print(f"     {r['command']}: {r['calls']}x, rata-rata {r['avg_ms']}ms, maks {r['max_ms']}ms")
+
+    def close(self):
+        if self.process:
+            try: self.process.kill()
+            except Exception: pass
+        self.process = None
+
+
+# ==========================================
+# POOL: 1 SHELL PER DEVICE (driver & sniffer berbagi)
+# ==========================================
+_POOL = {}
+_POOL_LOCK = threading.Lock()
+
+
+def get_shell(device_serial=None):
+    with _POOL_LOCK:
+        if device_serial not in _POOL:
+            _POOL[device_serial] = PersistentShell(device_serial)
+        return _POOL[device_serial]
+
+
+def close_all():
+    with _POOL_LOCK:
+        for shell in _POOL.values():
+            shell.close()
+        _POOL.clear()
+
+
+# ==========================================
+# DAFTAR DEVICE (CACHE)
+# ==========================================
+_DEVICES = {"at": 0.0, "serials": None}
+
+
+def list_devices(max_age=5.0):
+    """
+    Serial semua device berstatus 'device'. Hasil `adb devices` di-cache max_age detik
+    (dashboard memanggil ini di setiap rerun). Error adb diteruskan ke pemanggil.
+    """
+    if _DEVICES["serials"] is not None and time.time() - _DEVICES["at"] < max_age:
+        return list(_DEVICES["serials"])
+    startupinfo = None
+    if hasattr(subprocess, "STARTUPINFO"):
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    output = subprocess.check_output(["adb", "devices"], startupinfo=startupinfo).decode("utf-8")
+    serials = []
+    for line in output.strip().split("\n")[1:]:
+        parts = line.strip().split("\t")
+        if len(parts) == 2 and parts[1] == "device":
+            serials.append(parts[0])
+    _DEVICES.update(at=time.time(), serials=serials)
+    return list(serials)
+
+
+def forget_devices():
+    _DEVICES["serials"] = None
@@ -0,0 +1,102 @@
+import random
+import re
+
+
+# Segmen path yang berupa ID digabung jadi 1 template: /users/123 -> /users/{id}
+_SEGMENT_RULES = [
+    (re.compile(r'^\d+$'), "{id}"),
+    (re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'), "{uuid}"),
+    (re.compile(r'^[0-9a-fA-F]{16,}$'), "{hash}"),
+    (re.compile(r'^(?=.*\d)[A-Za-z0-9_\-]{20,}$'), "{token}"),
+]
+
+
+def template_path(endpoint):
+    """'/v1/users/123/orders?page=2' -> '/v1/users/{id}/orders'"""
+    path = endpoint.split("?", 1)[0].split("#", 1)[0]
+    segments = []
+    for seg in path.split("/"):
+        for pattern, placeholder in _SEGMENT_RULES:
+            if pattern.match(seg):
+                seg = placeholder
+                break
+        segments.append(seg)
+    return "/".join(segments) or "/"
+
+
+def percentile(sorted_values, pct):
+    """Persentil dengan interpolasi linear (sorted_values wajib sudah urut)."""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class ApiMetrics:
+    """
+    Agregasi performa API per endpoint (path-template).
+    Hitungan, error, dan bytes selalu eksak; sampel latency memakai reservoir
+    sampling agar memori tetap terbatas di aplikasi yang ribuan request/menit.
+    """
+
+    def __init__(self, max_samples=2000):
+        self.max_samples = max_samples
+        self.by_endpoint = {}
+
+    def add(self, entry):
+        status = str(entry.get("status", "-"))
+        if status == "-":
+            return
+        key = f"{entry.get('method', '-')} {template_path(entry.get('endpoint', '/'))}"
+        m = self.by_endpoint.setdefault(key, {"count": 0, "errors": 0, "bytes": 0, "seen": 0, "samples": []})
+        m["count"] += 1
+        if not status.startswith(("2", "3")):
+            m["errors"] += 1
+        if entry.get("bytes"):
+            m["bytes"] += entry["bytes"]
+
+        duration = entry.get("duration_ms")
+        if duration is not None:
+            m["seen"] += 1
+            if len(m["samples"]) < self.max_samples:
+                m["samples"].append(duration)
+            else:
+                idx = random.randrange(m["seen"])
+                if idx < self.max_samples:
+                    m["samples"][idx] = duration
+
+    def add_bytes(self, entry, size):
+        key = f"{entry.get('method', '-')} {template_path(entry.get('endpoint', '/'))}"
+        if key in self.by_endpoint:
+            self.by_endpoint[key]["bytes"] += size
+
+    def summary(self):
+        rows = []
+        for key, m in self.by_endpoint.items():
+            samples = sorted(m["samples"])
+            method, endpoint = key.split(" ", 1)
+            rows.append({
+                "method": method,
+                "endpoint": endpoint,
+                "count": m["count"],
+                "error_rate": round(m["errors"] / m["count"] * 100, 1) if m["count"] else 0.0,
+                "p50_ms": _round(percentile(samples, 50)),
+                "p95_ms": _round(percentile(samples, 95)),
+                "p99_ms": _round(percentile(samples, 99)),
+                "bytes": m["bytes"],
+            })
+        return sorted(rows, key=lambda r: (r["p95_ms"] or 0, r["count"]), reverse=True)
+
+    def print_summary(self, top=10):
+        rows = self.summary()
+        if not rows: return
+        print("  📡 [API Metrics] Endpoint terlambat (p95):")
+        for r in rows[:top]:
+            print(f"     {r['method']:6} {r['endpoint'][:60]:60} n={r['count']:<4} p50={r['p50_ms']}ms "
+                  f"p95={r['p95_ms']}ms p99={r['p99_ms']}ms err={r['error_rate']}% bytes={r['bytes']}")
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
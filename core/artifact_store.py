@@ -0,0 +1,206 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+REPORTS_ROOT = "reports"
+STORE_ROOT = os.path.join(REPORTS_ROOT, ".store")
+LATEST_FILE = "LATEST"
+MANIFEST_FILE = "manifest.json"
+# Blob yang lebih muda dari ini tidak disapu GC: run lain mungkin sedang put() dan belum menulis manifest
+GC_GRACE = 3600
+
+
+# ==========================================
+# FOLDER RUN (reports/<skenario>/<run-id>/)
+# ==========================================
+def new_run_dir(scenario_dir):
+    """Folder run baru berdasarkan waktu; run lama tidak lagi tertimpa."""
+    run_id = time.strftime("%Y%m%d-%H%M%S")
+    path, n = os.path.join(scenario_dir, run_id), 1
+    while os.path.exists(path):
+        n += 1
+        path = os.path.join(scenario_dir, f"{run_id}-{n}")
+    os.makedirs(path)
+    return path
+
+
+def mark_latest(run_dir):
+    """Tulis reports/<skenario>/LATEST = nama folder run (file biasa, aman di Windows)."""
+    scenario_dir, run_id = os.path.split(os.path.normpath(run_dir))
+    tmp = os.path.join(scenario_dir, LATEST_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(run_id)
+    os.replace(tmp, os.path.join(scenario_dir, LATEST_FILE))
+
+
+def resolve_run_dir(path):
+    """reports/<skenario> -> folder run terbaru; folder run (atau format lama) dikembalikan apa adanya."""
+    try:
+        with open(os.path.join(path, LATEST_FILE), "r", encoding="utf-8") as f:
+            latest = os.path.join(path, f.read().strip())
+        if os.path.isdir(latest):
+            return latest
+    except OSError:
+        pass
+    return path
+
+
+# ==========================================
+# STORE (BLOB BERNAMA HASH + MANIFEST PER RUN)
+# ==========================================
+class ArtifactStore:
+    """
+    Artifact store content-addressed: reports/.store/blobs/<2 hex>/<hash>.<ext>.
+    File di folder run diganti hardlink ke blob, jadi screenshot identik (antar step
+    maupun antar run) hanya memakan disk sekali, dan laporan tetap membaca path lamanya.
+    manifest.json per run mencatat path -> hash; GC menghapus blob yang tidak dirujuk lagi.
+    """
+
+    DIRS = ("screenshots", "visual", "thumbs")
+
+    def __init__(self, root=STORE_ROOT):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.stats = {"files": 0, "new": 0, "dedup": 0, "bytes_saved": 0}
+
+    @staticmethod
+    def digest(path):
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def blob_path(self, digest, ext=""):
+        return os.path.join(self.blob_dir, digest[:2], digest + ext)
+
+    def put(self, path):
+        """Masukkan 1 file ke store, ganti dengan hardlink ke blob. Return hash."""
+        digest = self.digest(path)
+        blob = self.blob_path(digest, os.path.splitext(path)[1].lower())
+        self.stats["files"] += 1
+        if os.path.exists(blob):
+            self.stats["dedup"] += 1
+            self.stats["bytes_saved"] += os.path.getsize(path)
+            self._link(blob, path)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            try:
+                # Blob baru = inode yang sama dengan file run, tanpa copy
+                os.link(path, blob)
+            except FileExistsError:
+                # Worker suite lain baru saja menulis blob yang sama
+                self._link(blob, path)
+            except OSError:
+                shutil.copyfile(path, blob)
+            self.stats["new"] += 1
+        # mtime blob = terakhir dirujuk (dasar masa tenggang GC untuk run yang manifest-nya belum ada)
+        try: os.utime(blob)
+        except OSError: pass
+        return digest
+
+    @staticmethod
+    def _link(blob, path):
+        if os.path.samefile(blob, path): return
+        tmp = path + ".lnk"
+        try:
+            os.link(blob, tmp)
+            os.replace(tmp, path)
+        except OSError:
+            # Filesystem tanpa hardlink (FAT / beda drive): file run tetap salinan biasa
+            if os.path.exists(tmp): os.remove(tmp)
+
+    def ingest_run(self, run_dir, scenario):
+        """Masukkan artefak 1 run ke store dan tulis manifest.json-nya."""
+        artifacts = {}
+        for sub in self.DIRS:
+            folder = os.path.join(run_dir, sub)
+            if not os.path.isdir(folder): continue
+            for name in sorted(os.listdir(folder)):
+                path = os.path.join(folder, name)
+                if os.path.isfile(path):
+                    artifacts[f"{sub}/{name}"] = {"sha": self.put(path), "size": os.path.getsize(path)}
+
+        manifest = {"scenario": scenario, "run_id": os.path.basename(os.path.normpath(run_dir)),
+                    "created": time.time(), "store": os.path.abspath(self.root), "artifacts": artifacts}
+        with open(os.path.join(run_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        return manifest
+
+    def print_summary(self):
+        s = self.stats
+        if not s["files"]: return
+        print(f"  🗄️ [Store] {s['files']} artefak: {s['dedup']} duplikat ({s['bytes_saved'] / 1048576:.1f}MB hemat), "
+              f"{s['new']} blob baru")
+
+    # --- RETENSI & GC ---
+    def gc(self, reports_root=REPORTS_ROOT, keep=None, days=None, dry_run=False, scope=None):
+        """
+        Hapus run lama per (folder induk, skenario): reports/<skenario>/, atau tiap skenario di
+        suite_*/<serial>/. Simpan `keep` run terbaru dan/atau yang lebih muda dari `days` hari,
+        lalu hapus blob yang tidak dirujuk manifest mana pun. Run terbaru tiap grup selalu disimpan.
+        scope = folder induk tertentu; run di folder lain tidak disentuh (blob tetap disapu global).
+        """
+        scope = os.path.normpath(scope) if scope else None
+        runs = {}
+        for root, dirs, files in os.walk(reports_root):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            if MANIFEST_FILE in files:
+                try:
+                    with open(os.path.join(root, MANIFEST_FILE), "r", encoding="utf-8") as f:
+                        manifest = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                # Grup = folder induk + skenario: run suite per device punya skenario sama tapi bukan
+                # "run lama" satu sama lain, dan skenario lain di suite_*/<serial>/ juga bukan
+                parent = os.path.dirname(os.path.normpath(root))
+                runs.setdefault((parent, manifest.get("scenario")), []).append((manifest.get("created", 0), root, manifest))
+                dirs[:] = []
+
+        now, removed_runs, referenced = time.time(), [], set()
+        for (parent, _), items in runs.items():
+            items.sort(key=lambda item: item[0], reverse=True)
+            for i, (created, run_dir, manifest) in enumerate(items):
+                expired = (keep is not None and i >= keep) or (days is not None and now - created > days * 86400)
+                if i > 0 and expired and (scope is None or parent == scope):
+                    removed_runs.append(run_dir)
+                    if not dry_run: shutil.rmtree(run_dir, ignore_errors=True)
+                else:
+                    referenced.update(a["sha"] for a in manifest.get("artifacts", {}).values())
+
+        removed_blobs, freed = 0, 0
+        for root, _, files in os.walk(self.blob_dir, topdown=False):
+            for name in files:
+                if os.path.splitext(name)[0] in referenced: continue
+                path = os.path.join(root, name)
+                st = os.stat(path)
+                if now - st.st_mtime < GC_GRACE: continue
+                # Masih punya hardlink lain (run tanpa manifest) -> belum benar-benar bebas
+                if st.st_nlink == 1: freed += st.st_size
+                removed_blobs += 1
+                if not dry_run: os.remove(path)
+            # Folder shard blobs/<xx>/ yang sudah kosong ikut dihapus
+            if not dry_run and root != self.blob_dir and not os.listdir(root):
+                os.rmdir(root)
+        return {"runs_removed": removed_runs, "blobs_removed": removed_blobs, "bytes_freed": freed}
+
+
+def run_gc_cli(argv):
+    parser = argparse.ArgumentParser(prog="heimdall gc")
+    parser.add_argument("--keep", type=int, help="Simpan N run terbaru per skenario")
+    parser.add_argument("--days", type=float, help="Hapus run yang lebih tua dari N hari")
+    parser.add_argument("--reports", default=REPORTS_ROOT, help="Folder laporan (default: reports)")
+    parser.add_argument("--dry-run", action="store_true", help="Tampilkan saja, jangan hapus")
+    args = parser.parse_args(argv)
+
+    store = ArtifactStore(os.path.join(args.reports, ".store"))
+    result = store.gc(args.reports, keep=args.keep, days=args.days, dry_run=args.dry_run)
+    label = "Akan dihapus" if args.dry_run else "Dihapus"
+    for run_dir in result["runs_removed"]:
+        print(f"  🗑️ {label}: {run_dir}")
+    print(f"  🗄️ [Store] {label} {len(result['runs_removed'])} run, {result['blobs_removed']} blob "
+          f"({result['bytes_freed'] / 1048576:.1f}MB)")
+    return 0
@@ -0,0 +1,242 @@
+import ast
+import copy
+import hashlib
+import json
+import os
+import re
+
+from core.parser import HeimdallParser
+
+
+class ScenarioCompiler:
+    """
+    Compiler .heim -> Step Plan (sekali compile, cache di disk).
+
+    Plan berisi step bertipe:
+    - feature     : {"type": "feature", "name": ...}
+    - action      : sama persis dengan output HeimdallParser
+    - conditional : {"type": "conditional", "condition": ..., "timeout": ..., "body": [step, ...]}
+    - loop        : {"type": "loop", "var": ..., "items": [...], "body": [step, ...]}
+
+    Body loop dicompile SATU KALI, lalu di-bind ke tiap item saat runtime (bind_steps).
+    Cache di-key dengan hash isi file + hash semua file JALANKAN + hash grammar.
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_dir=".heim_cache"):
+        self.cache_dir = cache_dir
+        self.line_parser = HeimdallParser(None)
+
+    # ==========================================
+    # CACHE
+    # ==========================================
+    def load(self, file_path):
+        """Ambil plan dari cache jika masih valid, kalau tidak compile ulang."""
+        if not os.path.exists(file_path):
+            print(f"!!! Error: File tidak ditemukan: {file_path}")
+            return self._empty_plan(file_path)
+
+        main_hash = self._hash_file(file_path)
+        cache_path = os.path.join(self.cache_dir, "plans", f"{main_hash}.json")
+
+        cached = self._read_cache(cache_path)
+        if cached and self._is_fresh(cached, file_path):
+            return cached
+
+        plan = self.compile_file(file_path)
+        self._write_cache(cache_path, plan)
+        return plan
+
+    def _is_fresh(self, plan, file_path):
+        if plan.get("version") != self.VERSION or plan.get("grammar") != self._grammar_hash():
+            return False
+        if plan.get("source") != file_path:
+            return False
+        for dep_path, dep_hash in plan.get("deps", {}).items():
+            if dep_hash is None:
+                if os.path.exists(dep_path): return False
+            elif not os.path.exists(dep_path) or self._hash_file(dep_path) != dep_hash:
+                return False
+        return True
+
+    def _read_cache(self, cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, cache_path, plan):
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(plan, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"  ⚠️ [Compiler] Gagal menulis cache plan: {e}")
+
+    @staticmethod
+    def _hash_file(path):
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _grammar_hash(self):
+        # Grammar berubah (parser/compiler diupdate) -> cache otomatis basi
+        here = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for name in ("parser.py", "compiler.py"):
+            with open(os.path.join(here, name), "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def _empty_plan(self, file_path):
+        return {"version": self.VERSION, "source": file_path, "deps": {}, "steps": []}
+
+    # ==========================================
+    # COMPILE
+    # ==========================================
+    def compile_file(self, file_path):
+        deps = {}
+        steps = self._compile_file(file_path, "Default Feature", deps, [])
+        return {
+            "version": self.VERSION,
+            "grammar": self._grammar_hash(),
+            "source": file_path,
+            "hash": deps.get(file_path),
+            "deps": deps,
+            "steps": steps,
+        }
+
+    def _compile_file(self, file_path, feature, deps, stack):
+        if not os.path.exists(file_path):
+            deps[file_path] = None
+            return []
+        if file_path in stack:
+            print(f"  ⚠️ [Compiler] Include melingkar diabaikan: {file_path}")
+            return []
+
+        with open(file_path, "rb") as f:
+            raw = f.read()
+        deps[file_path] = hashlib.sha256(raw).hexdigest()
+        lines = raw.decode("utf-8").splitlines()
+        return self.compile_lines(lines, feature, deps, stack + [file_path])
+
+    def compile_lines(self, lines, feature="Dynamic", deps=None, stack=None):
+        """Compile baris .heim menjadi list step (blok JIKA/ULANGI boleh bersarang)."""
+        deps = {} if deps is None else deps
+        stack = [] if stack is None else stack
+
+        root = []
+        # Tumpukan blok terbuka: (step_blok, list_body_parent)
+        blocks = []
+        current = root
+
+        for line in lines:
+            line = line.strip()
+            if not line or (line.startswith("#") and "FITUR" not in line.upper()): continue
+            upper = line.upper()
+
+            # 1. Feature Detection
+            if upper.startswith("# FITUR:") or upper.startswith("# FEATURE:"):
+                current.append({"type": "feature", "name": line.split(":", 1)[1].strip()})
+                continue
+
+            # 2. Buka Blok JIKA
+            if upper.startswith("JIKA MUNCUL TEKS"):
+                match = re.search(r'JIKA muncul teks "(.*?)"', line, re.IGNORECASE)
+                if match:
+                    block = {
+                        "type": "conditional", "condition": match.group(1),
+                        "timeout": HeimdallParser.parse_timeout(line), "body": []
+                    }
+                    blocks.append((block, current))
+                    current = block["body"]
+                    continue
+
+            if upper == "AKHIR JIKA":
+                if blocks and blocks[-1][0]["type"] == "conditional":
+                    block, parent = blocks.pop()
+                    parent.append(block)
+                    current = parent
+                continue
+
+            # 3. Buka Blok ULANGI
+            if upper.startswith("ULANGI"):
+                match = re.search(r'ULANGI\s+"(.*?)"\s+DARI\s+(\[.*\])', line, re.IGNORECASE)
+                if match:
+                    try:
+                        items = ast.literal_eval(match.group(2))
+                    except (ValueError, SyntaxError):
+                        items = None
+                    if items is not None:
+                        block = {"type": "loop", "var": match.group(1), "items": list(items), "body": []}
+                        blocks.append((block, current))
+                        current = block["body"]
+                        continue
+
+            if upper == "SELESAI ULANGI":
+                if blocks and blocks[-1][0]["type"] == "loop":
+                    block, parent = blocks.pop()
+                    parent.append(block)
+                    current = parent
+                continue
+
+            # 4. Modular Include (dicompile inline, hash ikut dicatat)
+            if upper.startswith("JALANKAN") or upper.startswith("INCLUDE"):
+                parts = line.split('"')
+                if len(parts) >= 2:
+                    current.extend(self._compile_file(parts[1], feature, deps, stack))
+                continue
+
+            # 5. Standard Commands (grammar tetap di HeimdallParser)
+            current.extend(self.line_parser._parse_single_line(line, feature))
+
+        # Blok yang tidak ditutup tetap dieksekusi (lebih aman daripada hilang diam-diam)
+        while blocks:
+            block, parent = blocks.pop()
+            print(f"  ⚠️ [Compiler] Blok {block['type']} tidak ditutup, ditutup otomatis.")
+            parent.append(block)
+
+        return root
+
+    # ==========================================
+    # PREVIEW (Dashboard)
+    # ==========================================
+    @staticmethod
+    def describe(steps, depth=0):
+        """Ratakan plan jadi baris preview: [{"Level", "Tipe", "Detail"}, ...]"""
+        rows = []
+        indent = "    " * depth
+        for step in steps:
+            stype = step.get("type")
+            if stype == "feature":
+                rows.append({"Tipe": "FITUR", "Detail": f"{indent}📂 {step['name']}"})
+            elif stype == "conditional":
+                limit = f" (maks {step['timeout']:g}s)" if step.get("timeout") else ""
+                rows.append({"Tipe": "JIKA", "Detail": f"{indent}❓ muncul teks '{step['condition']}'{limit}"})
+                rows.extend(ScenarioCompiler.describe(step["body"], depth + 1))
+            elif stype == "loop":
+                rows.append({"Tipe": "ULANGI", "Detail": f"{indent}🔄 {step['var']} x{len(step['items'])}: {step['items']}"})
+                rows.extend(ScenarioCompiler.describe(step["body"], depth + 1))
+            else:
+                rows.append({"Tipe": step.get("cmd", "-"), "Detail": f"{indent}{step.get('desc', '')}"})
+        return rows
+
+
+def bind_steps(steps, var_name, item):
+    """Bind body loop yang sudah dicompile ke satu item dataset ({Var} -> item)."""
+    placeholder = f"{{{var_name}}}"
+    value = str(item)
+
+    def _bind(obj):
+        if isinstance(obj, str):
+            return obj.replace(placeholder, value)
+        if isinstance(obj, list):
+            return [_bind(o) for o in obj]
+        if isinstance(obj, dict):
+            return {k: _bind(v) for k, v in obj.items()}
+        return copy.copy(obj)
+
+    return _bind(steps)
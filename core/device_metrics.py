@@ -0,0 +1,73 @@
+import re
+
+
+# ==========================================
+# PARSER OUTPUT DUMPSYS / PROC (TANPA ADB)
+# ==========================================
+_TOTAL_PSS = re.compile(r'TOTAL PSS:\s+(\d+)')
+_TOTAL_ROW = re.compile(r'^\s*TOTAL\s+(\d+)', re.MULTILINE)
+_JAVA_HEAP = re.compile(r'Java Heap:\s+(\d+)')
+_NATIVE_HEAP = re.compile(r'Native Heap:\s+(\d+)')
+
+_TOTAL_FRAMES = re.compile(r'Total frames rendered:\s+(\d+)')
+_JANKY_FRAMES = re.compile(r'^\s*Janky frames:\s+(\d+)', re.MULTILINE)
+_FRAME_PCT = re.compile(r'^\s*(\d+)th percentile:\s+(\d+)ms', re.MULTILINE)
+
+
+def parse_meminfo(text):
+    """`dumpsys meminfo <pkg>` -> {"pss_kb", "java_heap_kb", "native_heap_kb"} (None jika proses tidak ada)."""
+    match = _TOTAL_PSS.search(text) or _TOTAL_ROW.search(text)
+    if not match:
+        return None
+    java = _JAVA_HEAP.search(text)
+    native = _NATIVE_HEAP.search(text.split("App Summary", 1)[-1])
+    return {
+        "pss_kb": int(match.group(1)),
+        "java_heap_kb": int(java.group(1)) if java else None,
+        "native_heap_kb": int(native.group(1)) if native else None,
+    }
+
+
+def parse_proc_stat(text):
+    """Baris 'cpu' dari /proc/stat -> (busy_jiffies, total_jiffies)."""
+    for line in text.splitlines():
+        if line.startswith("cpu "):
+            values = [int(v) for v in line.split()[1:]]
+            idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+            total = sum(values[:8])  # guest sudah termasuk di user
+            return total - idle, total
+    return None
+
+
+def cpu_percent(prev, current):
+    """CPU total device (%) di antara dua hasil parse_proc_stat."""
+    if not prev or not current:
+        return None
+    busy = current[0] - prev[0]
+    total = current[1] - prev[1]
+    return round(busy / total * 100, 1) if total > 0 else None
+
+
+def parse_gfxinfo(text):
+    """`dumpsys gfxinfo <pkg>` -> total/janky frame (kumulatif) + persentil frame time."""
+    total = _TOTAL_FRAMES.search(text)
+    if not total:
+        return None
+    janky = _JANKY_FRAMES.search(text)
+    stats = {
+        "total_frames": int(total.group(1)),
+        "janky_frames": int(janky.group(1)) if janky else 0,
+    }
+    for pct, ms in _FRAME_PCT.findall(text):
+        stats.setdefault(f"p{pct}_ms", int(ms))
+    stats["janky_pct"] = round(stats["janky_frames"] / stats["total_frames"] * 100, 2) if stats["total_frames"] else 0.0
+    return stats
+
+
+def counter_delta(before, after):
+    """Selisih counter kumulatif; counter yang di-reset (gfxinfo reset / app restart) dihitung dari 0."""
+    if after is None:
+        return None
+    if before is None or after < before:
+        return after
+    return after - before
@@ -1,12 +1,47 @@
 import uiautomator2 as u2
 from uiautomator2.exceptions import UiObjectNotFoundError, InputIMEError
+import shlex
 import time
+from core.adb_shell import get_shell
+from core.ui_snapshot import UiSnapshot, SnapshotElement
+from core.stabilizer import UiStabilizer
+from core.tracer import TRACER, traced
+from core.recorder import SessionRecorder, RecordingDevice
 
 class HeimdallDriver:
-    def __init__(self, device_serial=None):
-        print(f"  [Init] Connecting to {device_serial}...")
-        self.d = u2.connect(device_serial)
+    def __init__(self, device_serial=None, snapshot=True, wait_profiles=None, adaptive_wait=True, device=None):
+        # Persistent adb shell (dipakai bersama sniffer) untuk perintah input; None = lewat d.shell
+        self.adb_shell = None
+        if device is None:
+            print(f"  [Init] Connecting to {device_serial}...")
+            device = u2.connect(device_serial)
+            self.adb_shell = get_shell(device_serial)
+        self.d = device
         self.d.implicitly_wait(10.0)
+        self.serial = device_serial
+
+        # Perekam sesi (--record); None = tidak merekam
+        self.recorder = None
+
+        # Snapshot Mode: 1x dump_hierarchy per kondisi layar untuk semua lookup
+        self.snapshot_mode = snapshot
+        self._snapshot = None
+        # Step saat snapshot terakhir di-seed stabilizer (None = snapshot dari dump biasa)
+        self.step = 0
+        self._seeded_step = None
+
+        # Adaptive Wait: tunggu layar diam, bukan sleep tetap
+        self.stabilizer = UiStabilizer(self, wait_profiles, enabled=adaptive_wait)
+
+        # Statistik probe per jenis (berapa kali kena timeout)
+        self.probe_stats = {}
+
+        # Diisi main (threading.Event dari CrashWatcher): hentikan polling saat app crash
+        self.abort_event = None
+
+        # Pencarian berbasis gambar (dibuat saat pertama dipakai)
+        self.template_dirs = []
+        self._image_locator = None
         
         try:
             print("  [Init] Enabling FastInputIME (Ghost Keyboard)...")
@@ -15,25 +50,117 @@ class HeimdallDriver:
             print("  ⚠️ Fallback: Menggunakan Keyboard Standar.")
             self.d.set_fastinput_ime(False) 
 
+    # --- REKAM SESI (REPLAY TANPA HP) ---
+    def start_recording(self, record_dir):
+        self.recorder = SessionRecorder(record_dir, self.serial)
+        self.d = RecordingDevice(self.d, self.recorder)
+
+    def set_step(self, step):
+        """Dipanggil main di awal setiap step (rekaman dikelompokkan per step)."""
+        self.step = step
+        if self.recorder: self.recorder.set_step(step)
+
+    # --- SNAPSHOT HIERARKI ---
+    def get_snapshot(self):
+        """Ambil snapshot layar saat ini (dump baru hanya jika cache sudah invalid)."""
+        if self._snapshot is None:
+            with TRACER.span("dump_hierarchy", "lookup_rpc"):
+                xml = self.d.dump_hierarchy()
+            self._snapshot = UiSnapshot(xml)
+        return self._snapshot
+
+    def seed_snapshot(self, xml):
+        """Pakai hierarki yang sudah di-dump (misal oleh stabilizer) sebagai snapshot."""
+        self._snapshot = UiSnapshot(xml)
+        self._seeded_step = self.step
+
+    def invalidate_snapshot(self):
+        """Dipanggil setiap aksi yang mengubah layar (tap, swipe, ketik, tombol)."""
+        self._snapshot = None
+        self._seeded_step = None
+
+    # --- PROBE CEPAT (JIKA / ASSERT) ---
+    def probe(self, candidates, timeout=0.0, poll=0.25, name="probe"):
+        """
+        Cek keberadaan elemen dengan batas waktu eksplisit (tanpa implicit wait 10s).
+        candidates: list selector, misal [{"textContains": "OK"}, {"resourceId": "id/ok"}].
+        Semua kandidat dijawab dari 1x baca hierarki per polling.
+        Return selector pertama yang cocok, atau None jika timeout.
+        """
+        started = time.time()
+        hit = None
+        polls = 0
+        # Snapshot yang bukan hasil seed step ini bisa basi (layar berubah sendiri) -> dump baru
+        if self._seeded_step != self.step:
+            self.invalidate_snapshot()
+        with TRACER.span(f"probe:{name}", "lookup"):
+            while True:
+                polls += 1
+                snap = self.get_snapshot()
+                hit = next((c for c in candidates if snap.exists(**c)), None)
+                if hit or time.time() - started + poll > timeout or self.aborted():
+                    break
+                time.sleep(poll)
+                # Layar bisa berubah sendiri (loading) -> baca ulang di polling berikutnya
+                self.invalidate_snapshot()
+
+        if self.recorder: self.recorder.add("probe", name, {"polls": polls})
+        stats = self.probe_stats.setdefault(name, {"calls": 0, "hits": 0, "timeouts": 0, "waited": 0.0})
+        stats["calls"] += 1
+        stats["waited"] += time.time() - started
+        if hit: stats["hits"] += 1
+        else: stats["timeouts"] += 1
+        return hit
+
+    def aborted(self):
+        return self.abort_event is not None and self.abort_event.is_set()
+
+    def print_probe_summary(self):
+        for name, s in self.probe_stats.items():
+            print(f"  🔎 [Probe] {name}: {s['calls']}x, hit {s['hits']}x, timeout {s['timeouts']}x, total tunggu {s['waited']:.2f}s")
+        if self._image_locator and self._image_locator.stats["calls"]:
+            s = self._image_locator.stats
+            print(f"  🖼️ [ImageLocator] {s['calls']}x, ketemu {s['hits']}x, rata-rata {s['ms'] / s['calls']:.1f}ms/lookup, "
+                  f"{s['slow']}x di atas target {self._image_locator.TARGET_MS}ms")
+        if self.adb_shell: self.adb_shell.print_stats(self.serial or "adb")
+
     # --- JURUS MABUK (SHELL COMMANDS) ---
+    @traced("rpc")
+    def shell_batch(self, commands):
+        """Beberapa perintah shell dalam 1 round-trip. Return list output."""
+        if self.adb_shell is None:
+            return [self.d.shell(c).output for c in commands]
+        outputs = self.adb_shell.run_batch(commands)
+        # Jawaban shell persisten ikut direkam agar replay (UKUR, jank) mendapat output yang sama
+        if self.recorder:
+            for command, output in zip(commands, outputs):
+                self.recorder.add("shell", command, {"output": output, "exit_code": 0})
+        return outputs
+
+    def shell(self, command):
+        return self.shell_batch([command])[0]
+
     def _safe_click(self, x, y):
+        self.invalidate_snapshot()
         try:
             # Coba klik normal dulu (lebih akurat)
             self.d.click(x, y)
         except Exception:
             # Kalau ditolak Security, pakai Shell
             print(f"  ⚠️ [Permission] Menggunakan Shell Tap di ({x}, {y})...")
-            self.d.shell(f"input tap {x} {y}")
+            self.shell(f"input tap {x} {y}")
 
     def _safe_swipe(self, x1, y1, x2, y2, duration=0.4):
+        self.invalidate_snapshot()
         try:
             self.d.swipe(x1, y1, x2, y2, duration=duration)
         except Exception:
             print("  ⚠️ [Permission] Menggunakan Shell Swipe...")
             ms = int(duration * 1000)
-            self.d.shell(f"input swipe {x1} {y1} {x2} {y2} {ms}")
+            self.shell(f"input swipe {x1} {y1} {x2} {y2} {ms}")
 
     # --- PENCARIAN PINTAR ---
+    @traced("lookup")
     def find_element_robust(self, selector: str):
         if selector.upper() in ["FAB", "FLOATING ACTION BUTTON", "TOMBOL TAMBAH"]:
             return VirtualFAB(self.d, self)
@@ -42,7 +169,10 @@ class HeimdallDriver:
         for i in range(4):
             # Cek apakah elemen muncul?
             found = None
-            if self.d(resourceId=selector).exists: found = self.d(resourceId=selector)
+            if self.snapshot_mode:
+                strategy, node = self.get_snapshot().find(selector)
+                if node: found = SnapshotElement(self, strategy, selector, node)
+            elif self.d(resourceId=selector).exists: found = self.d(resourceId=selector)
             elif self.d(text=selector).exists: found = self.d(text=selector)
             elif self.d(textContains=selector).exists: found = self.d(textContains=selector)
             elif self.d(descriptionContains=selector).exists: found = self.d(descriptionContains=selector)
@@ -50,14 +180,18 @@ class HeimdallDriver:
             if found:
                 return found
 
+            # App crash: scroll lagi tidak ada gunanya
+            if i == 3 or self.aborted():
+                break
+
             # Jika belum ketemu dan belum limit, Scroll!
-            if i < 3:
-                print(f"  [Vision] '{selector}' belum terlihat. Scroll ke bawah... ({i+1}/3)")
-                self.scroll_down_coordinate()
+            print(f"  [Vision] '{selector}' belum terlihat. Scroll ke bawah... ({i+1}/3)")
+            self.scroll_down_coordinate()
         
         raise UiObjectNotFoundError({'message': f"Elemen '{selector}' tidak ketemu setelah 3x scroll."})
 
     # --- FUNGSI BARU: TAP PINTAR ---
+    @traced("action")
     def tap_element(self, selector: str):
         print(f"Action: Mencari & Mengetuk '{selector}'...")
         
@@ -77,19 +211,49 @@ class HeimdallDriver:
             
         # 3. Eksekusi Tap Aman
         self._safe_click(x, y)
-        time.sleep(1.0) # Jeda stabilisasi
+        self.stabilizer.wait_idle("tap") # Jeda stabilisasi
+
+    # --- PENCARIAN BERBASIS GAMBAR ---
+    def image_locator(self):
+        if self._image_locator is None:
+            from core.image_locator import ImageLocator
+            self._image_locator = ImageLocator(self.template_dirs)
+        return self._image_locator
+
+    @traced("lookup")
+    def locate_image(self, template: str):
+        with TRACER.span("screenshot_for_image", "screenshot"):
+            screen = self.d.screenshot()
+        return self.image_locator().locate(screen, template)
+
+    @traced("action")
+    def tap_image(self, template: str, fallback: str = None):
+        print(f"Action: Mencari & Mengetuk gambar '{template}'...")
+        # Hierarki punya elemennya -> lebih pasti & murah dari template matching
+        if fallback and self.get_snapshot().find(fallback)[1]:
+            print(f"  [Vision] '{fallback}' ada di hierarki, gambar tidak perlu dicari.")
+            self.tap_element(fallback)
+            return
+
+        hit = self.locate_image(template)
+        if not hit:
+            raise UiObjectNotFoundError({'message': f"Gambar '{template}' tidak ditemukan di layar."})
+        print(f"  [ImageLocator] '{template}' di ({hit['x']}, {hit['y']}), skor {hit['score']}, {hit['ms']}ms")
+        self._safe_click(hit['x'], hit['y'])
+        self.stabilizer.wait_idle("tap")
 
+    @traced("scroll")
     def scroll_down_coordinate(self):
         w, h = self.d.window_size()
         center_x = w * 0.5
         start_y = h * 0.7 
         end_y   = h * 0.3
         self._safe_swipe(center_x, start_y, center_x, end_y, duration=0.4)
-        time.sleep(1.0)
+        self.stabilizer.wait_idle("scroll")
 
     def input_text_on_field(self, text: str, label: str):
         print(f"Action: Typing '{text}'...")
-        try: self.d.shell("input keyevent 111") 
+        try: self.shell("input keyevent 111")
         except: pass
 
         if "urutan" in label.lower():
@@ -121,28 +285,47 @@ class HeimdallDriver:
 
         self._execute_typing(target, text)
 
+    @traced("action")
     def _execute_typing(self, element, text):
+        self.invalidate_snapshot()
         try:
             x, y = element.center()
             self._safe_click(x, y)
         except:
             element.click()
 
-        time.sleep(0.5)
-        safe_text = text.replace(" ", "%s")
-        try: self.d.shell(f"input text {safe_text}")
-        except: element.send_keys(text) 
-        time.sleep(0.5)
-        try: self.d.shell("input keyevent 111")
-        except: pass
-        time.sleep(0.2)
-        self.d.press("back")
-        time.sleep(1.0)
+        self.stabilizer.wait_idle("focus")
+        # Dikutip: teks dengan ' & ; tidak boleh memutus persistent shell
+        safe_text = shlex.quote(text.replace(" ", "%s"))
+        try:
+            # 1 round-trip: ketik + ESC (tutup keyboard) + back
+            self.shell_batch([f"input text {safe_text}", "input keyevent 111", "input keyevent 4"])
+        except Exception:
+            element.send_keys(text)
+            self.stabilizer.wait_idle("typing")
+            self.d.press("back")
+        self.invalidate_snapshot()
+        self.stabilizer.wait_idle("keyboard")
 
+    def get_text_from_element(self, selector: str) -> str:
+        element = self.find_element_robust(selector)
+        try: return element.get_text()
+        except: return element.info.get('text', '')
+
+    def open_app(self, package: str):
+        self.invalidate_snapshot()
+        self.d.app_start(package)
+
+    def press_key(self, key: str):
+        self.invalidate_snapshot()
+        self.d.press(key)
+
+    @traced("rpc")
     def get_current_activity(self) -> str:
         try: return self.d.app_current()['activity']
         except: return "Unknown"
 
+    @traced("screenshot")
     def take_screenshot(self, path: str):
         try: self.d.screenshot(path)
         except: pass
@@ -150,16 +333,38 @@ class HeimdallDriver:
     def stop_driver(self):
         try: self.d.set_fastinput_ime(False) 
         except: pass
+        if self.recorder: self.recorder.close()
+        if self.adb_shell: self.adb_shell.close()
 
 class VirtualFAB:
     def __init__(self, d, driver):
         self.d = d
         self.driver = driver
     def click(self):
+        x, y = self.locate()
+        self.driver._safe_click(x, y)
+        self.driver.stabilizer.wait_idle("fab")
+
+    def locate(self):
+        # 1. Hierarki: FloatingActionButton / id 'fab'
+        node = self.driver.get_snapshot().find_fab()
+        if node:
+            b = node["bounds"]
+            x, y = (b["left"] + b["right"]) // 2, (b["top"] + b["bottom"]) // 2
+            print(f"  [VirtualFAB] Ketemu di hierarki ({node['resourceName'] or node['className']}): ({x}, {y})")
+            return x, y
+
+        # 2. Template gambar fab.png (folder skenario / templates/)
+        if self.driver.image_locator().resolve("fab.png"):
+            hit = self.driver.locate_image("fab.png")
+            if hit:
+                print(f"  [VirtualFAB] Ketemu via gambar fab.png: ({hit['x']}, {hit['y']}), skor {hit['score']}")
+                return hit["x"], hit["y"]
+
+        # 3. Tebakan lama: pojok kanan bawah
         w, h = self.d.window_size()
         x = w * 0.85
         y = h * 0.80
         print(f"  [VirtualFAB] Tapping coordinates: ({x}, {y})")
-        self.driver._safe_click(x, y)
-        time.sleep(1.5)
+        return x, y
     def exists(self): return True
\ No newline at end of file
@@ -0,0 +1,53 @@
+import json
+import os
+import threading
+import time
+
+
+class RunEventLog:
+    """
+    Catatan Run dalam format JSONL (1 baris = 1 event, append-only).
+    Setiap baris langsung di-flush, jadi log tetap utuh walaupun proses mati mendadak.
+    Dari file ini laporan bisa dibangun ulang tanpa device (`main.py report <run-dir>`).
+    """
+
+    FILE_NAME = "events.jsonl"
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, self.FILE_NAME)
+        self.lock = threading.Lock()
+        self.started = time.time()
+        # 1 run = 1 file baru; selama run hanya ditambah
+        self.file = open(self.path, "w", encoding="utf-8")
+
+    def emit(self, event):
+        record = dict(event)
+        record["ts"] = round(time.time(), 3)
+        record["t"] = round(record["ts"] - self.started, 3)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self.lock:
+            if self.file.closed: return
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+def load_events(run_dir):
+    """Baca events.jsonl. Baris terakhir yang terpotong (crash) dilewati."""
+    path = os.path.join(run_dir, RunEventLog.FILE_NAME)
+    events = []
+    if not os.path.exists(path):
+        return events
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+    return events
@@ -0,0 +1,27 @@
+from core.device_metrics import parse_gfxinfo
+
+
+class FrameMeter:
+    """
+    Statistik frame (jank) untuk 1 gesture: `dumpsys gfxinfo <pkg> reset` sebelum aksi,
+    baca ulang setelah layar diam. Angka yang keluar murni milik aksi tersebut.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def _shell(self, command):
+        # Lewat adb shell persisten (pool) yang sama dengan perintah input
+        return self.driver.shell(command)
+
+    def reset(self, package):
+        try: self._shell(f"dumpsys gfxinfo {package} reset")
+        except Exception as e: print(f"  ⚠️ [Jank] Gagal reset gfxinfo: {e}")
+
+    def read(self, package):
+        """{"total_frames", "janky_frames", "janky_pct", "p50_ms", "p90_ms", "p95_ms", "p99_ms"} atau None."""
+        try:
+            return parse_gfxinfo(self._shell(f"dumpsys gfxinfo {package}"))
+        except Exception as e:
+            print(f"  ⚠️ [Jank] Gagal membaca gfxinfo: {e}")
+            return None
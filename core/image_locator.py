@@ -0,0 +1,223 @@
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+
+class ImageLocator:
+    """
+    Pencari elemen berbasis gambar (template matching).
+    Screenshot & template diperkecil ke grayscale, lalu dicari dengan
+    Normalized Cross-Correlation (NCC) via FFT di beberapa skala
+    (beda density / resolusi device). Target: < TARGET_MS per lookup
+    (diukur di tests/test_image_locator.py; lookup yang lebih lambat dihitung di stats["slow"]).
+    """
+
+    TARGET_MS = 100
+    WORK_WIDTH = 360
+    # Pass kasar: semua skala dicari di sini, WORK_WIDTH hanya untuk memperhalus sekitar puncak
+    COARSE_WIDTH = 180
+    MIN_COARSE_TEMPLATE = 8
+    COARSE_PEAKS = 2
+    REFINE_TOP = 4
+    SCALES = (0.7, 0.85, 1.0, 1.2, 1.4)
+
+    def __init__(self, search_dirs=None, threshold=0.8, reference_width=1080):
+        self.search_dirs = list(search_dirs or []) + ["templates"]
+        self.threshold = threshold
+        # Lebar layar device tempat template di-crop: UI dianggap ikut lebar layar,
+        # sisa perbedaan density ditangani SCALES
+        self.reference_width = reference_width
+        self._templates = {}
+        self._scaled_cache = {}
+        self.stats = {"calls": 0, "hits": 0, "ms": 0.0, "slow": 0}
+
+    def resolve(self, name):
+        if os.path.isabs(name) and os.path.exists(name):
+            return name
+        for folder in self.search_dirs:
+            path = os.path.join(folder, name)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _template(self, path):
+        # Cache: template grayscale float32 (ukuran asli)
+        if path not in self._templates:
+            with Image.open(path) as img:
+                self._templates[path] = np.asarray(img.convert("L"), dtype=np.float32)
+        return self._templates[path]
+
+    def _scaled(self, template, k):
+        # Cache per (template, ukuran): lookup berikutnya tidak perlu resize template lagi
+        th, tw = int(round(template.shape[0] * k)), int(round(template.shape[1] * k))
+        if th < 4 or tw < 4:
+            return None
+        key = (id(template), th, tw)
+        if key not in self._scaled_cache:
+            self._scaled_cache[key] = np.asarray(Image.fromarray(template).resize((tw, th), Image.BILINEAR), dtype=np.float32)
+        return self._scaled_cache[key]
+
+    def locate(self, screen, template_name):
+        """
+        screen: PIL Image screenshot penuh. Return dict {"x", "y", "score", "scale", "ms"}
+        (koordinat layar asli) atau None jika tidak ketemu / skor < threshold.
+        Kasar-ke-halus: semua skala dicari di COARSE_WIDTH (1x FFT screenshot dipakai
+        bersama semua skala), lalu hanya sekitar puncak terbaik dihitung ulang di WORK_WIDTH.
+        """
+        started = time.time()
+        self.stats["calls"] += 1
+        path = self.resolve(template_name)
+        if not path:
+            print(f"  ⚠️ [ImageLocator] Template '{template_name}' tidak ditemukan di {self.search_dirs}")
+            return None
+
+        factor = self.WORK_WIDTH / float(screen.width)
+        # Perkecil dulu baru grayscale: reduce() (box, faktor bulat) jauh lebih murah dari resize penuh
+        n = max(1, screen.width // self.WORK_WIDTH)
+        small = screen.reduce(n) if n > 1 else screen
+        work = small.convert("L").resize((self.WORK_WIDTH, max(1, int(round(screen.height * factor)))), Image.BILINEAR)
+        image = np.asarray(work, dtype=np.float32)
+        template = self._template(path)
+        base = self.WORK_WIDTH / float(self.reference_width)
+
+        # 1. Pass kasar di resolusi kecil (dilewati jika template jadi terlalu kecil untuk dikenali)
+        ratio = self.COARSE_WIDTH / float(self.WORK_WIDTH)
+        coarse_ok = min(template.shape) * base * ratio >= self.MIN_COARSE_TEMPLATE
+        if coarse_ok:
+            coarse = _resize(work, self.COARSE_WIDTH)
+            candidates = self._search(coarse, template, [base * ratio * sc for sc in self.SCALES], self.COARSE_PEAKS)
+            if not candidates:
+                coarse_ok = False
+
+        best = None
+        if coarse_ok:
+            # 2. Pass halus: kandidat kasar teratas dihitung ulang di WORK_WIDTH, hanya di sekitar
+            #    puncaknya, dengan skala kandidat + tetangganya (skala di resolusi kasar belum tentu tepat)
+            margin = int(np.ceil(2 / ratio)) + 2
+            ks = [base * sc for sc in self.SCALES]
+            for c in sorted(candidates, key=lambda c: c["score"], reverse=True)[:self.REFINE_TOP]:
+                i = min(range(len(ks)), key=lambda j: abs(ks[j] - c["k"] / ratio))
+                # Pusat kandidat di WORK_WIDTH; jendela dibuat per skala di sekitar pusat ini
+                cy, cx = (c["y"] + c["th"] / 2.0) / ratio, (c["x"] + c["tw"] / 2.0) / ratio
+                for k in ks[max(0, i - 1):i + 2]:
+                    t = self._scaled(template, k)
+                    if t is None: continue
+                    th, tw = t.shape
+                    top_y, left_x = max(0, int(cy - th / 2.0) - margin), max(0, int(cx - tw / 2.0) - margin)
+                    crop = image[top_y:top_y + th + 2 * margin + 1, left_x:left_x + tw + 2 * margin + 1]
+                    hit = _best(crop, t)
+                    if hit and (best is None or hit[0] > best["score"]):
+                        best = {"score": hit[0], "y": hit[1] + top_y, "x": hit[2] + left_x, "th": th, "tw": tw, "k": k}
+        else:
+            found = self._search(image, template, [base * sc for sc in self.SCALES])
+            if found:
+                best = max(found, key=lambda c: c["score"])
+
+        ms = (time.time() - started) * 1000
+        self.stats["ms"] += ms
+        if ms > self.TARGET_MS: self.stats["slow"] += 1
+        if not best or best["score"] < self.threshold:
+            return None
+        self.stats["hits"] += 1
+        return {"x": int((best["x"] + best["tw"] / 2.0) / factor), "y": int((best["y"] + best["th"] / 2.0) / factor),
+                "score": round(best["score"], 3), "scale": round(best["k"] / factor, 3), "ms": round(ms, 1)}
+
+    def _search(self, image, template, ks, peaks=1):
+        """Cari template di seluruh image untuk tiap skala k (`peaks` puncak per skala). FFT & integral image dihitung 1x."""
+        scaled = [(k, self._scaled(template, k)) for k in ks]
+        scaled = [(k, t) for k, t in scaled if t is not None and t.shape[0] <= image.shape[0] and t.shape[1] <= image.shape[1]]
+        if not scaled:
+            return []
+        prepared = prepare(image, max(t.shape[0] for _, t in scaled), max(t.shape[1] for _, t in scaled))
+        results = []
+        for k, t in scaled:
+            for score, y, x in _peaks(ncc(image, t, prepared), peaks, t.shape):
+                results.append({"score": score, "y": y, "x": x, "th": t.shape[0], "tw": t.shape[1], "k": k})
+        return results
+
+
+def _resize(gray, width):
+    height = max(1, int(round(gray.height * width / float(gray.width))))
+    return np.asarray(gray.resize((width, height), Image.BILINEAR), dtype=np.float32)
+
+
+def _best(image, template, prepared=None):
+    """(skor, y, x) puncak NCC, atau None jika template tidak muat."""
+    if template.shape[0] > image.shape[0] or template.shape[1] > image.shape[1]:
+        return None
+    return _peaks(ncc(image, template, prepared), 1, template.shape)[0]
+
+
+def _peaks(scores, n, size):
+    """n puncak teratas yang saling berjauhan (sekitar puncak sebelumnya ditutup seukuran setengah template)."""
+    scores = scores.copy() if n > 1 else scores
+    hy, hx = max(1, size[0] // 2), max(1, size[1] // 2)
+    found = []
+    for _ in range(n):
+        y, x = divmod(int(np.argmax(scores)), scores.shape[1])
+        found.append((float(scores[y, x]), y, x))
+        scores[max(0, y - hy):y + hy + 1, max(0, x - hx):x + hx + 1] = -np.inf
+    return found
+
+
+def fast_len(n):
+    """Panjang >= n yang faktornya hanya 2, 3, 5 (FFT jauh lebih cepat daripada ukuran ganjil/prima)."""
+    best = 1 << max(0, (n - 1).bit_length())
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            m = p35
+            while m < n: m *= 2
+            best = min(best, m)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def prepare(image, max_th, max_tw):
+    """
+    Bagian yang hanya bergantung pada screenshot: FFT (ukuran cepat yang cukup untuk template
+    terbesar) dan integral image. Dipakai ulang oleh semua skala template.
+    """
+    H, W = image.shape
+    shape = (fast_len(H + max_th - 1), fast_len(W + max_tw - 1))
+    img = image.astype(np.float64)
+    return {
+        "shape": shape,
+        "fft": np.fft.rfft2(image.astype(np.float32), shape),
+        "sum": np.pad(img, ((1, 0), (1, 0))).cumsum(0).cumsum(1),
+        "sq": np.pad(img * img, ((1, 0), (1, 0))).cumsum(0).cumsum(1),
+    }
+
+
+def ncc(image, template, prepared=None):
+    """
+    Peta skor NCC (-1..1) untuk setiap posisi valid template di image.
+    Korelasi dihitung lewat FFT, energi per jendela lewat integral image.
+    """
+    H, W = image.shape
+    th, tw = template.shape
+    t = template - template.mean()
+    t_energy = float((t * t).sum())
+    if t_energy == 0:
+        return np.zeros((H - th + 1, W - tw + 1), dtype=np.float32)
+    if prepared is None:
+        prepared = prepare(image, th, tw)
+
+    # Korelasi = konvolusi dengan template yang dibalik
+    shape = prepared["shape"]
+    # float32: NumPy 2 menjalankan FFT single precision (2x lebih cepat, presisi cukup untuk skor)
+    corr = np.fft.irfft2(prepared["fft"] * np.fft.rfft2(t[::-1, ::-1].astype(np.float32), shape), shape)
+    corr = corr[th - 1:H, tw - 1:W]
+
+    def window_sum(s):
+        return s[th:, tw:] - s[:-th, tw:] - s[th:, :-tw] + s[:-th, :-tw]
+
+    sums = window_sum(prepared["sum"])
+    variance = (window_sum(prepared["sq"]) - sums * sums / (th * tw)).astype(np.float32)
+    denom = np.sqrt(np.maximum(variance, 0) * t_energy)
+    # Area rata (variance ~0) tidak bisa cocok dengan template bertekstur
+    return np.where(denom > 1e-3, corr / np.maximum(denom, 1e-3), 0.0)
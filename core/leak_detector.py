@@ -0,0 +1,81 @@
+import time
+
+from core.adb_shell import PersistentShell
+from core.device_metrics import parse_meminfo
+
+
+def linear_slope(values):
+    """Kemiringan garis tren (least squares) terhadap index 0..n-1."""
+    n = len(values)
+    if n < 2:
+        return None
+    mean_x = (n - 1) / 2.0
+    mean_y = sum(values) / float(n)
+    num = sum((i - mean_x) * (v - mean_y) for i, v in enumerate(values))
+    den = sum((i - mean_x) ** 2 for i in range(n))
+    return num / den
+
+
+class LeakDetector:
+    """
+    Deteksi memory leak di blok ULANGI.
+    PSS & Java heap app diukur di setiap batas iterasi (opsional setelah paksa GC),
+    lalu dicari garis trennya. Pertumbuhan per iterasi > threshold = indikasi leak.
+    Titik sebelum iterasi pertama hanya jadi baseline (iterasi pertama biasanya
+    masih mengisi cache / warm-up), tren dihitung mulai setelah iterasi 1.
+    """
+
+    MIN_POINTS = 3
+
+    def __init__(self, device_serial=None, threshold_kb=1024, force_gc=False, shell=None):
+        self.shell = shell or PersistentShell(device_serial)
+        self.threshold_kb = threshold_kb
+        self.force_gc = force_gc
+
+    def _gc(self, package):
+        # SIGUSR1 = ART melakukan GC; butuh app debuggable (run-as) atau device root
+        pid = self.shell.run(f"pidof {package}").strip().split(" ")[0]
+        if not pid: return
+        self.shell.run(f"kill -10 {pid} 2>/dev/null || run-as {package} kill -10 {pid} 2>/dev/null")
+        time.sleep(1.0)
+
+    def measure(self, package):
+        """PSS + Java heap app saat ini (None jika proses tidak jalan / adb gagal)."""
+        try:
+            if self.force_gc:
+                self._gc(package)
+            return parse_meminfo(self.shell.run(f"dumpsys meminfo {package}", timeout=15.0))
+        except Exception as e:
+            print(f"  ⚠️ [Leak] Gagal mengukur memori: {e}")
+            return None
+
+    def evaluate(self, label, samples):
+        """samples[0] = baseline sebelum loop, samples[1:] = setelah tiap iterasi."""
+        points = [s for s in samples[1:] if s]
+        pss = [s["pss_kb"] for s in points]
+        java = [s["java_heap_kb"] for s in points if s.get("java_heap_kb") is not None]
+
+        result = {
+            "label": label,
+            "iterations": len(samples) - 1,
+            "baseline_kb": samples[0]["pss_kb"] if samples and samples[0] else None,
+            "pss_kb": [s["pss_kb"] if s else None for s in samples],
+            "java_heap_kb": [s.get("java_heap_kb") if s else None for s in samples],
+            "threshold_kb": self.threshold_kb,
+            "gc": self.force_gc,
+            "slope_pss_kb": None,
+            "slope_java_kb": None,
+            "leak": None,
+        }
+        if len(pss) < self.MIN_POINTS:
+            result["note"] = f"butuh minimal {self.MIN_POINTS} iterasi terukur"
+            return result
+
+        result["slope_pss_kb"] = round(linear_slope(pss), 1)
+        if len(java) == len(pss):
+            result["slope_java_kb"] = round(linear_slope(java), 1)
+        result["leak"] = max(result["slope_pss_kb"], result["slope_java_kb"] or 0) > self.threshold_kb
+        return result
+
+    def close(self):
+        self.shell.close()
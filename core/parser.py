@@ -9,6 +9,12 @@ class HeimdallParser:
     def __init__(self, driver):
         self.driver = driver
 
+    @staticmethod
+    def parse_timeout(line):
+        """Batas waktu probe eksplisit: '... DALAM 2 detik' -> 2.0 (None jika tidak ada)."""
+        match = re.search(r'DALAM\s+(\d+(?:[.,]\d+)?)\s*DETIK', line, re.IGNORECASE)
+        return float(match.group(1).replace(",", ".")) if match else None
+
     def parse_file(self, file_path):
         if not os.path.exists(file_path):
             print(f"!!! Error: File tidak ditemukan: {file_path}")
@@ -54,6 +60,7 @@ class HeimdallParser:
             match = re.search(r'JIKA muncul teks "(.*?)"', line, re.IGNORECASE)
             if match:
                 state['if_cond'] = match.group(1)
+                state['if_timeout'] = self.parse_timeout(line)
                 state['in_if'] = True 
                 state['if_buf'] = []
                 return
@@ -64,6 +71,7 @@ class HeimdallParser:
                 yield {
                     "type": "conditional",
                     "condition": state['if_cond'],
+                    "timeout": state.get('if_timeout'),
                     "body": state['if_buf'][:] 
                 }
             return
@@ -128,7 +136,19 @@ class HeimdallParser:
                 yield {"type": "action", "cmd": "press_key", "args": [parts[1]], "desc": line, "feature": current_feature}
             return
         
-        # C. STANDARD ACTIONS
+        # C. PERFORMA: UKUR waktu buka aplikasi "pkg" 10 KALI MODE dingin BATAS 1500 ms
+        if line.upper().startswith('UKUR WAKTU BUKA APLIKASI'):
+            match = re.search(r'"(.*?)"(?:\s+(\d+)\s+KALI)?(?:\s+MODE\s+(\w+))?(?:\s+BATAS\s+(\d+)\s*MS)?', line, re.IGNORECASE)
+            if match:
+                yield {
+                    "type": "action", "cmd": "measure_startup", "args": [match.group(1)],
+                    "runs": int(match.group(2) or 5), "mode": (match.group(3) or "dingin").lower(),
+                    "budget_ms": int(match.group(4)) if match.group(4) else None,
+                    "desc": line, "feature": current_feature
+                }
+            return
+
+        # D. STANDARD ACTIONS
         parts = line.split('"')
         if len(parts) < 2: return
         
@@ -136,20 +156,27 @@ class HeimdallParser:
             yield {"type": "action", "cmd": "open_app", "args": [parts[1]], "desc": line, "feature": current_feature}
         elif line.startswith('Ketik'): 
             if len(parts) >= 4: yield {"type": "action", "cmd": "input_text", "args": [parts[1], parts[3]], "desc": line, "feature": current_feature}
+        elif line.startswith('Ketuk gambar'):
+            # Ketuk gambar "fab.png" [ATAU "Tambah"] -> teks/ID hierarki dipakai jika ada
+            args = [parts[1]] + ([parts[3]] if len(parts) >= 4 and "ATAU" in line.upper() else [])
+            yield {"type": "action", "cmd": "tap_image", "args": args, "desc": line, "feature": current_feature}
         elif line.startswith('Ketuk tombol'): 
             yield {"type": "action", "cmd": "click", "args": [parts[1]], "desc": line, "feature": current_feature}
         elif line.startswith('Tunggu sampai muncul'): 
             yield {"type": "action", "cmd": "wait", "args": [parts[1]], "desc": line, "feature": current_feature}
         elif line.startswith('Gulir ke'): 
-            yield {"type": "action", "cmd": "scroll", "args": [parts[1]], "desc": line, "feature": current_feature}
+            # Opsional: Gulir ke "Bawah" MAKS JANK 5%
+            jank = re.search(r'MAKS\s+JANK\s+(\d+(?:[.,]\d+)?)\s*%', line, re.IGNORECASE)
+            max_jank = float(jank.group(1).replace(",", ".")) if jank else None
+            yield {"type": "action", "cmd": "scroll", "args": [parts[1]], "max_jank": max_jank, "desc": line, "feature": current_feature}
 
         # --- [UPDATE] DYNAMIC ASSERTION ---
         # 1. SOFT ASSERTION (Lanjut)
         # Menangkap "Pastikan" atau "PASTIKAN"
         elif line.upper().startswith('PASTIKAN MUNCUL'): 
-            yield {"type": "action", "cmd": "assert_soft", "args": [parts[1]], "desc": line, "feature": current_feature}
+            yield {"type": "action", "cmd": "assert_soft", "args": [parts[1]], "timeout": self.parse_timeout(line), "desc": line, "feature": current_feature}
         
         # 2. HARD ASSERTION (Stop)
         # Menangkap "WAJIB" atau "KRUSIAL"
         elif line.upper().startswith('WAJIB MUNCUL') or line.upper().startswith('KRUSIAL MUNCUL'):
-            yield {"type": "action", "cmd": "assert_hard", "args": [parts[1]], "desc": line, "feature": current_feature}
\ No newline at end of file
+            yield {"type": "action", "cmd": "assert_hard", "args": [parts[1]], "timeout": self.parse_timeout(line), "desc": line, "feature": current_feature}
\ No newline at end of file
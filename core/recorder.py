@@ -0,0 +1,175 @@
+import io
+import json
+import os
+import shutil
+import time
+
+
+class SessionRecorder:
+    """
+    Perekam sesi untuk replay tanpa HP.
+    Setiap jawaban device (hierarki XML, screenshot, activity, window size, shell,
+    hasil selector) dicatat berurutan per step di <dir>/step_NNNN/journal.json.
+    ReplayDriver menjawab pertanyaan yang sama dengan urutan yang sama.
+    """
+
+    VERSION = 1
+
+    def __init__(self, record_dir, serial=None):
+        self.dir = record_dir
+        self.serial = serial
+        self.step = 0
+        self.steps = []
+        self.journal = []
+        self.counter = 0
+        os.makedirs(record_dir, exist_ok=True)
+        print(f"  🎥 [Record] Merekam sesi ke {record_dir}")
+
+    def _step_dir(self):
+        path = os.path.join(self.dir, f"step_{self.step:04d}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def set_step(self, step):
+        self.flush()
+        self.step = step
+        self.journal = []
+        self.counter = 0
+
+    def add(self, op, key="", value=None):
+        self.journal.append({"op": op, "key": key, "value": value})
+
+    def add_error(self, op, key, error):
+        self.journal.append({"op": op, "key": key, "error": f"{type(error).__name__}: {error}"})
+
+    def add_file(self, op, key, content, ext):
+        """Simpan isi besar (XML / gambar) sebagai file, journal hanya berisi nama file."""
+        self.counter += 1
+        name = f"{op}_{self.counter:03d}{ext}"
+        mode = "wb" if isinstance(content, bytes) else "w"
+        with open(os.path.join(self._step_dir(), name), mode, **({} if mode == "wb" else {"encoding": "utf-8"})) as f:
+            f.write(content)
+        self.journal.append({"op": op, "key": key, "file": name})
+        return name
+
+    def add_copy(self, op, key, src_path):
+        self.counter += 1
+        name = f"{op}_{self.counter:03d}{os.path.splitext(src_path)[1] or '.png'}"
+        try:
+            shutil.copyfile(src_path, os.path.join(self._step_dir(), name))
+        except OSError:
+            name = None
+        self.journal.append({"op": op, "key": key, "file": name})
+
+    def flush(self):
+        if not self.journal:
+            return
+        with open(os.path.join(self._step_dir(), "journal.json"), "w", encoding="utf-8") as f:
+            json.dump(self.journal, f, ensure_ascii=False, indent=1)
+        if self.step not in self.steps:
+            self.steps.append(self.step)
+        # session.json ditulis ulang tiap step: rekaman tetap bisa dipakai walau run mati di tengah
+        with open(os.path.join(self.dir, "session.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "serial": self.serial, "created": time.time(),
+                       "steps": self.steps}, f, indent=1)
+
+    def close(self):
+        self.flush()
+        self.journal = []
+
+
+class RecordingDevice:
+    """Proxy uiautomator2 Device: meneruskan semua panggilan, mencatat yang menghasilkan data."""
+
+    def __init__(self, device, recorder):
+        self._device = device
+        self._recorder = recorder
+
+    def dump_hierarchy(self, *args, **kwargs):
+        xml = self._device.dump_hierarchy(*args, **kwargs)
+        self._recorder.add_file("dump_hierarchy", "", xml, ".xml")
+        return xml
+
+    def window_size(self):
+        size = self._device.window_size()
+        self._recorder.add("window_size", "", list(size))
+        return size
+
+    def app_current(self):
+        try:
+            current = self._device.app_current()
+        except Exception as e:
+            self._recorder.add_error("app_current", "", e)
+            raise
+        self._recorder.add("app_current", "", current)
+        return current
+
+    def screenshot(self, path=None, *args, **kwargs):
+        if path:
+            result = self._device.screenshot(path, *args, **kwargs)
+            self._recorder.add_copy("screenshot", "", path)
+            return result
+        # Tanpa path = PIL Image (dipakai fingerprint stabilizer mode screenshot)
+        image = self._device.screenshot(*args, **kwargs)
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        self._recorder.add_file("screenshot", "image", buffer.getvalue(), ".png")
+        return image
+
+    def shell(self, command, *args, **kwargs):
+        key = command if isinstance(command, str) else " ".join(command)
+        try:
+            response = self._device.shell(command, *args, **kwargs)
+        except Exception as e:
+            self._recorder.add_error("shell", key, e)
+            raise
+        self._recorder.add("shell", key, {"output": response.output, "exit_code": response.exit_code})
+        return response
+
+    def __call__(self, **selector):
+        return RecordingSelector(self._device(**selector), self._recorder, json.dumps(selector, sort_keys=True))
+
+    def __getattr__(self, name):
+        # Aksi (click, swipe, press, app_start, ...) tidak menghasilkan data -> cukup diteruskan
+        return getattr(self._device, name)
+
+
+class RecordingSelector:
+    """Proxy UiObject hasil d(**selector); key = rantai selector (misal '{...}.down({...})')."""
+
+    def __init__(self, ui_object, recorder, key):
+        self._obj = ui_object
+        self._recorder = recorder
+        self._key = key
+
+    def _record(self, op, fn):
+        try:
+            value = fn()
+        except Exception as e:
+            self._recorder.add_error(op, self._key, e)
+            raise
+        self._recorder.add(op, self._key, list(value) if isinstance(value, tuple) else value)
+        return value
+
+    @property
+    def exists(self):
+        return self._record("exists", lambda: bool(self._obj.exists))
+
+    @property
+    def info(self):
+        return self._record("info", lambda: self._obj.info)
+
+    def center(self, *args, **kwargs):
+        return self._record("center", lambda: self._obj.center(*args, **kwargs))
+
+    def get_text(self, *args, **kwargs):
+        return self._record("get_text", lambda: self._obj.get_text(*args, **kwargs))
+
+    def down(self, **selector):
+        return RecordingSelector(self._obj.down(**selector), self._recorder, f"{self._key}.down({json.dumps(selector, sort_keys=True)})")
+
+    def right(self, **selector):
+        return RecordingSelector(self._obj.right(**selector), self._recorder, f"{self._key}.right({json.dumps(selector, sort_keys=True)})")
+
+    def __getattr__(self, name):
+        return getattr(self._obj, name)
@@ -0,0 +1,247 @@
+import json
+import os
+import shutil
+from collections import deque, namedtuple
+
+from core.driver import HeimdallDriver
+from core.stabilizer import UiStabilizer
+from core.api_metrics import ApiMetrics
+from core.vision_log import CrashWatcher
+
+ShellResponse = namedtuple("ShellResponse", ["output", "exit_code"])
+
+EMPTY_HIERARCHY = '<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0"></hierarchy>'
+
+
+class ReplayDevice:
+    """
+    Pengganti uiautomator2 Device yang menjawab dari rekaman SessionRecorder.
+    Jawaban disajikan per step, berurutan per (operasi, key). Jika rekaman habis,
+    jawaban terakhir untuk key yang sama dipakai ulang (deterministik).
+    Aksi (click, swipe, press, app_start, ...) tidak melakukan apa-apa.
+    """
+
+    DEFAULTS = {
+        "dump_hierarchy": EMPTY_HIERARCHY,
+        "window_size": [1080, 2400],
+        "app_current": {"package": "", "activity": "Unknown"},
+        "exists": False,
+        "shell": {"output": "", "exit_code": 0},
+        "logs": [],
+        "pop_crash": None,
+    }
+
+    def __init__(self, replay_dir):
+        session_path = os.path.join(replay_dir, "session.json")
+        if not os.path.exists(session_path):
+            raise FileNotFoundError(f"Rekaman tidak ditemukan: {session_path}")
+        with open(session_path, "r", encoding="utf-8") as f:
+            self.session = json.load(f)
+        self.dir = replay_dir
+        self.step = None
+        self.queues = {}
+        self.last = {}
+        self.misses = 0
+        self.set_step(0)
+
+    def set_step(self, step):
+        self.step = step
+        self.queues = {}
+        path = os.path.join(self._step_dir(), "journal.json")
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for entry in json.load(f):
+                self.queues.setdefault((entry["op"], entry["key"]), deque()).append(entry)
+
+    def _step_dir(self):
+        return os.path.join(self.dir, f"step_{self.step:04d}")
+
+    def _next(self, op, key=""):
+        queue = self.queues.get((op, key))
+        if queue:
+            entry = queue.popleft()
+            self.last[(op, key)] = entry
+        elif (op, key) in self.last:
+            entry = self.last[(op, key)]
+        else:
+            self.misses += 1
+            return {"op": op, "key": key, "value": self.DEFAULTS.get(op)}
+        if "error" in entry:
+            raise RuntimeError(f"[Replay] {entry['error']}")
+        return entry
+
+    def _file(self, entry):
+        # File disimpan di folder step saat direkam (entry 'last' bisa dari step sebelumnya)
+        for step_dir in (self._step_dir(), *[os.path.join(self.dir, f"step_{s:04d}") for s in reversed(self.session["steps"])]):
+            path = os.path.join(step_dir, entry["file"])
+            if os.path.exists(path):
+                return path
+        return None
+
+    # --- JAWABAN DEVICE ---
+    def dump_hierarchy(self, *args, **kwargs):
+        entry = self._next("dump_hierarchy")
+        if "file" not in entry:
+            return entry["value"]
+        with open(self._file(entry), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def window_size(self):
+        return tuple(self._next("window_size")["value"])
+
+    def app_current(self):
+        return self._next("app_current")["value"]
+
+    def screenshot(self, path=None, *args, **kwargs):
+        entry = self._next("screenshot", "" if path else "image")
+        src = self._file(entry) if entry.get("file") else None
+        if path:
+            if src: shutil.copyfile(src, path)
+            return path
+        from PIL import Image
+        return Image.open(src) if src else Image.new("L", (32, 64))
+
+    def shell(self, command, *args, **kwargs):
+        key = command if isinstance(command, str) else " ".join(command)
+        value = self._next("shell", key)["value"]
+        return ShellResponse(value["output"], value["exit_code"])
+
+    def __call__(self, **selector):
+        return ReplaySelector(self, json.dumps(selector, sort_keys=True))
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class ReplaySelector:
+    def __init__(self, device, key):
+        self._device = device
+        self._key = key
+
+    def _value(self, op):
+        value = self._device._next(op, self._key)["value"]
+        return tuple(value) if op == "center" and value else value
+
+    @property
+    def exists(self):
+        return self._value("exists")
+
+    @property
+    def info(self):
+        return self._value("info") or {}
+
+    def center(self, *args, **kwargs):
+        return self._value("center")
+
+    def get_text(self, *args, **kwargs):
+        return self._value("get_text")
+
+    def down(self, **selector):
+        return ReplaySelector(self._device, f"{self._key}.down({json.dumps(selector, sort_keys=True)})")
+
+    def right(self, **selector):
+        return ReplaySelector(self._device, f"{self._key}.right({json.dumps(selector, sort_keys=True)})")
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class ReplayStabilizer(UiStabilizer):
+    """Tanpa sleep: ambil sidik jari sebanyak yang direkam, seed snapshot jika dulu stabil."""
+
+    def _wait_idle(self, kind):
+        profile = self.profiles.get(kind, self.profiles["post_step"])
+        value = self.driver.d._next("wait_idle", kind)["value"] or {"polls": 0, "stable": False}
+        xml = None
+        for _ in range(value["polls"]):
+            _, xml = self._fingerprint()
+        if value["stable"] and xml is not None:
+            self.driver.seed_snapshot(xml)
+        elif not value["stable"]:
+            self.driver.invalidate_snapshot()
+        self._record(kind, profile, 0.0, value["stable"])
+        return 0.0
+
+
+class ReplayDriver(HeimdallDriver):
+    """
+    HeimdallDriver tanpa HP: semua lookup, aksi, dan screenshot dijawab dari rekaman
+    (--record). Parser, state, laporan, dan dashboard bisa diuji di CI dalam hitungan detik.
+    """
+
+    def __init__(self, replay_dir, wait_profiles=None, adaptive_wait=True):
+        print(f"  [Init] Replay dari rekaman {replay_dir}...")
+        super().__init__(device=ReplayDevice(replay_dir), wait_profiles=wait_profiles, adaptive_wait=adaptive_wait)
+        self.stabilizer = ReplayStabilizer(self, wait_profiles, enabled=adaptive_wait)
+
+    def set_step(self, step):
+        self.step = step
+        self.d.set_step(step)
+
+    def shell_batch(self, commands):
+        # Output direkam per perintah oleh HeimdallDriver.shell_batch
+        return [self.d.shell(c).output for c in commands]
+
+    def probe(self, candidates, timeout=0.0, poll=0.25, name="probe"):
+        # Jumlah polling mengikuti rekaman (bukan jam), hasil pasti sama dengan run aslinya
+        polls = (self.d._next("probe", name)["value"] or {"polls": 1})["polls"]
+        hit = None
+        if self._seeded_step != self.step:
+            self.invalidate_snapshot()
+        for i in range(polls):
+            snap = self.get_snapshot()
+            hit = next((c for c in candidates if snap.exists(**c)), None)
+            if hit or i == polls - 1:
+                break
+            self.invalidate_snapshot()
+
+        stats = self.probe_stats.setdefault(name, {"calls": 0, "hits": 0, "timeouts": 0, "waited": 0.0})
+        stats["calls"] += 1
+        if hit: stats["hits"] += 1
+        else: stats["timeouts"] += 1
+        return hit
+
+    def stop_driver(self):
+        if self.d.misses:
+            print(f"  ⚠️ [Replay] {self.d.misses} jawaban tidak ada di rekaman (dipakai nilai default).")
+
+
+class ReplaySniffer:
+    """Pengganti LogSniffer saat replay: log API & crash per step dari rekaman."""
+
+    def __init__(self, device):
+        self.device = device
+        self.metrics = ApiMetrics()
+        self.crash_watcher = CrashWatcher()
+        self._seen = set()
+        self.replayed = 0
+
+    def start(self): pass
+
+    def stop(self): pass
+
+    def get_logs_between(self, start_ts, end_ts=None):
+        logs = [dict(e) for e in self.device._next("logs")["value"] or []]
+        for entry in logs:
+            key = (entry.get("ts"), entry.get("method"), entry.get("endpoint"))
+            if key not in self._seen:
+                self._seen.add(key)
+                self.metrics.add(entry)
+                self.replayed += 1
+        return logs
+
+    def watch_package(self, package):
+        self.crash_watcher.watch_package(package)
+
+    def pop_crash(self):
+        return self.device._next("pop_crash")["value"]
+
+    def stats(self):
+        return {"lines_read": 0, "lines_matched": 0, "match_pct": 0.0, "dropped_pending": 0, "replayed": self.replayed}
+
+    def print_stats(self):
+        print(f"  📡 [Sniffer] Replay: {self.replayed} request dari rekaman")
+
+    def get_api_metrics(self):
+        return self.metrics.summary()
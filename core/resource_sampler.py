@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import time
+
+from core.adb_shell import PersistentShell
+from core.device_metrics import parse_meminfo, parse_proc_stat, cpu_percent, parse_gfxinfo, counter_delta
+
+
+class ResourceSampler:
+    """
+    Sampler resource device di background (berdampingan dengan LogSniffer).
+    Tiap interval: CPU total (/proc/stat), memori app (dumpsys meminfo) dan
+    frame stats (dumpsys gfxinfo), semua dalam 1 perintah di 1 adb shell persisten.
+    Setiap sampel diberi nomor step yang sedang berjalan.
+    """
+
+    SECTION = "__HEIM_SECTION__"
+
+    def __init__(self, device_serial=None, interval=2.0, shell=None):
+        self.shell = shell or PersistentShell(device_serial)
+        self.interval = interval
+        self.package = None
+        self.step = 0
+        self.samples = []
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.started = time.time()
+        self._prev_cpu = None
+
+    def set_package(self, package):
+        self.package = package
+
+    def set_step(self, step):
+        self.step = step
+
+    def start(self):
+        self.started = time.time()
+        self.thread = threading.Thread(target=self._loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            self.sample()
+            self.stop_event.wait(self.interval)
+
+    def sample(self):
+        step, package = self.step, self.package
+        command = "head -n 1 /proc/stat"
+        if package:
+            command += f"; echo {self.SECTION}; dumpsys meminfo {package}; echo {self.SECTION}; dumpsys gfxinfo {package}"
+
+        ts = time.time()
+        try:
+            output = self.shell.run(command, timeout=max(5.0, self.interval * 3))
+        except Exception:
+            self.errors += 1
+            return None
+
+        parts = output.split(self.SECTION)
+        cpu = parse_proc_stat(parts[0])
+        sample = {
+            "t": round(ts - self.started, 3), "ts": ts, "step": step, "package": package,
+            "cpu_pct": cpu_percent(self._prev_cpu, cpu),
+        }
+        self._prev_cpu = cpu
+        if len(parts) == 3:
+            sample.update(parse_meminfo(parts[1]) or {})
+            gfx = parse_gfxinfo(parts[2]) or {}
+            sample["total_frames"] = gfx.get("total_frames")
+            sample["janky_frames"] = gfx.get("janky_frames")
+
+        with self.lock:
+            self.samples.append(sample)
+        return sample
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=self.interval + 5)
+        self.shell.close()
+
+    # ==========================================
+    # HASIL
+    # ==========================================
+    def timeline(self):
+        with self.lock:
+            return [dict(s) for s in self.samples]
+
+    def write_timeline(self, output_dir):
+        path = os.path.join(output_dir, "resources.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"interval": self.interval, "errors": self.errors, "samples": self.timeline()}, f, indent=1)
+        return path
+
+    def per_step(self):
+        """
+        Ringkasan per step: delta dihitung dari sampel terakhir SEBELUM step
+        (baseline) ke sampel terakhir step tersebut.
+        Step yang lebih singkat dari interval bisa tidak punya sampel.
+        """
+        groups = []
+        for s in self.timeline():
+            if groups and groups[-1][0] == s["step"]:
+                groups[-1][1].append(s)
+            else:
+                groups.append((s["step"], [s]))
+
+        rows = []
+        for i, (step, samples) in enumerate(groups):
+            if not step: continue
+            base = groups[i - 1][1][-1] if i > 0 else samples[0]
+            end = samples[-1]
+            same_app = base.get("package") == end.get("package")
+            cpu = [s["cpu_pct"] for s in samples if s.get("cpu_pct") is not None]
+            pss_delta = None
+            if same_app and end.get("pss_kb") is not None and base.get("pss_kb") is not None:
+                pss_delta = end["pss_kb"] - base["pss_kb"]
+            rows.append({
+                "step": step,
+                "samples": len(samples),
+                "pss_kb": end.get("pss_kb"),
+                "pss_delta_kb": pss_delta,
+                "java_heap_kb": end.get("java_heap_kb"),
+                "cpu_avg": round(sum(cpu) / len(cpu), 1) if cpu else None,
+                "frames": counter_delta(base.get("total_frames") if same_app else None, end.get("total_frames")),
+                "janky_frames": counter_delta(base.get("janky_frames") if same_app else None, end.get("janky_frames")),
+            })
+        return rows
+
+    def print_summary(self):
+        samples = self.timeline()
+        if not samples: return
+        pss = [s["pss_kb"] for s in samples if s.get("pss_kb")]
+        cpu = [s["cpu_pct"] for s in samples if s.get("cpu_pct") is not None]
+        peak = f"{max(pss) / 1024:.1f}MB" if pss else "-"
+        avg_cpu = f"{sum(cpu) / len(cpu):.1f}%" if cpu else "-"
+        print(f"  📊 [Resource] {len(samples)} sampel (gagal {self.errors}), PSS puncak {peak}, CPU rata-rata {avg_cpu}")
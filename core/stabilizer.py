@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import time
+
+from core.tracer import TRACER
+
+
+class UiStabilizer:
+    """
+    Mesin Tunggu Adaptif (Pengganti time.sleep tetap).
+    Polling sidik jari layar (hash hierarki / hash screenshot mini) sampai
+    tidak berubah lagi, lalu langsung lanjut.
+    """
+
+    # min  = jeda minimum sebelum polling pertama
+    # max  = batas tunggu maksimal
+    # poll = interval antar sidik jari
+    # legacy = sleep tetap versi lama (untuk menghitung waktu yang dihemat)
+    DEFAULT_PROFILES = {
+        "pre_step":  {"min": 0.0, "max": 0.5, "poll": 0.15, "legacy": 0.5},
+        "post_step": {"min": 0.2, "max": 3.0, "poll": 0.25, "legacy": 1.5},
+        "tap":       {"min": 0.1, "max": 2.0, "poll": 0.2,  "legacy": 1.0},
+        "scroll":    {"min": 0.2, "max": 2.0, "poll": 0.2,  "legacy": 1.0},
+        "fab":       {"min": 0.2, "max": 3.0, "poll": 0.25, "legacy": 1.5},
+        "focus":     {"min": 0.1, "max": 1.0, "poll": 0.15, "legacy": 0.5},
+        "typing":    {"min": 0.1, "max": 1.5, "poll": 0.15, "legacy": 0.7},
+        "keyboard":  {"min": 0.2, "max": 2.0, "poll": 0.2,  "legacy": 1.0},
+    }
+
+    def __init__(self, driver, profiles=None, fingerprint="hierarchy", enabled=True):
+        self.driver = driver
+        self.fingerprint_mode = fingerprint
+        self.enabled = enabled
+        self.profiles = {k: dict(v) for k, v in self.DEFAULT_PROFILES.items()}
+        for kind, override in (profiles or {}).items():
+            self.profiles.setdefault(kind, dict(self.DEFAULT_PROFILES["post_step"])).update(override)
+        self.stats = {}
+
+    @staticmethod
+    def load_profiles(path):
+        """Baca override profil dari file JSON: {"tap": {"max": 1.5}, ...}"""
+        if not path or not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # ==========================================
+    # SIDIK JARI LAYAR
+    # ==========================================
+    def _fingerprint(self):
+        if self.fingerprint_mode == "screenshot":
+            img = self.driver.d.screenshot()
+            thumb = img.convert("L").resize((32, 64))
+            return hashlib.md5(thumb.tobytes()).hexdigest(), None
+
+        xml = self.driver.d.dump_hierarchy()
+        return hashlib.md5(xml.encode("utf-8")).hexdigest(), xml
+
+    # ==========================================
+    # TUNGGU SAMPAI IDLE
+    # ==========================================
+    def wait_idle(self, kind="post_step"):
+        with TRACER.span(f"wait_idle:{kind}", "sleep"):
+            return self._wait_idle(kind)
+
+    def _wait_idle(self, kind):
+        profile = self.profiles.get(kind, self.profiles["post_step"])
+        started = time.time()
+
+        if not self.enabled:
+            time.sleep(profile["legacy"])
+            self._record(kind, profile, time.time() - started, stable=False)
+            return time.time() - started
+
+        if profile["min"] > 0:
+            time.sleep(profile["min"])
+
+        stable = False
+        polls = 0
+        try:
+            last, xml = self._fingerprint()
+            polls += 1
+            while time.time() - started < profile["max"]:
+                # App crash: tidak ada gunanya menunggu layar diam
+                if self.driver.aborted():
+                    break
+                time.sleep(profile["poll"])
+                current, xml = self._fingerprint()
+                polls += 1
+                if current == last:
+                    stable = True
+                    break
+                last = current
+
+            # Layar sudah diam: hierarki terakhir langsung jadi snapshot lookup berikutnya
+            if stable and xml is not None:
+                self.driver.seed_snapshot(xml)
+        except Exception:
+            # Device sibuk / RPC gagal: jangan lebih lama dari sleep versi lama
+            remaining = profile["legacy"] - (time.time() - started)
+            if remaining > 0: time.sleep(remaining)
+
+        # Masih berubah saat timeout: snapshot lama sudah tidak mewakili layar
+        if not stable:
+            self.driver.invalidate_snapshot()
+
+        # Replay mengulang jumlah sidik jari yang sama (bukan durasi yang sama)
+        recorder = getattr(self.driver, "recorder", None)
+        if recorder: recorder.add("wait_idle", kind, {"polls": polls, "stable": stable and xml is not None})
+
+        elapsed = time.time() - started
+        self._record(kind, profile, elapsed, stable)
+        return elapsed
+
+    def _record(self, kind, profile, elapsed, stable):
+        s = self.stats.setdefault(kind, {"calls": 0, "waited": 0.0, "legacy": 0.0, "timeouts": 0})
+        s["calls"] += 1
+        s["waited"] += elapsed
+        s["legacy"] += profile["legacy"]
+        if not stable: s["timeouts"] += 1
+
+    # ==========================================
+    # LAPORAN PENGHEMATAN
+    # ==========================================
+    def summary(self):
+        waited = sum(s["waited"] for s in self.stats.values())
+        legacy = sum(s["legacy"] for s in self.stats.values())
+        return {
+            "calls": sum(s["calls"] for s in self.stats.values()),
+            "waited": round(waited, 2),
+            "legacy": round(legacy, 2),
+            "saved": round(legacy - waited, 2),
+            "per_kind": self.stats,
+        }
+
+    def print_summary(self):
+        s = self.summary()
+        if not s["calls"]: return
+        print(f"  ⏱️ [Stabilizer] {s['calls']}x tunggu: {s['waited']}s (sleep lama: {s['legacy']}s) -> hemat {s['saved']}s")
+        for kind, st in self.stats.items():
+            print(f"     - {kind}: {st['calls']}x, {st['waited']:.2f}s vs {st['legacy']:.2f}s, timeout {st['timeouts']}x")
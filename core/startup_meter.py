@@ -0,0 +1,90 @@
+import re
+import time
+
+from core.api_metrics import percentile
+
+
+class StartupMeter:
+    """
+    Ukur waktu buka aplikasi dengan `am start -W` (TotalTime / WaitTime dari ActivityManager).
+    Mode:
+    - cold : force-stop (+ drop cache jika root) sebelum tiap launch
+    - warm : proses tetap hidup, activity ditutup dengan BACK
+    - hot  : app hanya dikirim ke background dengan HOME
+    """
+
+    MODES = {"dingin": "cold", "hangat": "warm", "panas": "hot", "cold": "cold", "warm": "warm", "hot": "hot"}
+    FIELD_PATTERN = re.compile(r'^(TotalTime|WaitTime|ThisTime|LaunchState|Status):\s*(\S+)', re.MULTILINE)
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def _shell(self, command):
+        # Lewat adb shell persisten (pool) yang sama dengan perintah input
+        return self.driver.shell(command)
+
+    def resolve_component(self, package):
+        """'com.app' -> 'com.app/.MainActivity' (activity launcher)."""
+        output = self._shell(f"cmd package resolve-activity --brief -c android.intent.category.LAUNCHER {package}")
+        lines = [l.strip() for l in output.splitlines() if "/" in l]
+        if not lines:
+            raise RuntimeError(f"Activity launcher untuk '{package}' tidak ditemukan")
+        return lines[-1]
+
+    def _prepare(self, package, mode):
+        if mode == "cold":
+            self._shell(f"am force-stop {package}")
+            # Hanya berhasil di device root; di device biasa diam-diam dilewati
+            self._shell("sync; echo 3 > /proc/sys/vm/drop_caches 2>/dev/null")
+        elif mode == "warm":
+            self.driver.shell_batch(["input keyevent KEYCODE_BACK"] * 3)
+        else:
+            self._shell("input keyevent KEYCODE_HOME")
+        time.sleep(1.0)
+
+    def launch(self, component):
+        """1x `am start -W`, return dict TotalTime/WaitTime/LaunchState."""
+        output = self._shell(f"am start -W -n {component}")
+        fields = dict(self.FIELD_PATTERN.findall(output))
+        if "TotalTime" not in fields and "ThisTime" not in fields:
+            raise RuntimeError(f"Output am start tidak dikenali: {output.strip()[:200]}")
+        return {
+            "total_ms": int(fields.get("TotalTime", fields.get("ThisTime"))),
+            "wait_ms": int(fields["WaitTime"]) if "WaitTime" in fields else None,
+            "launch_state": fields.get("LaunchState"),
+        }
+
+    def measure(self, package, runs=5, mode="cold"):
+        mode = self.MODES.get(str(mode).lower(), "cold")
+        component = self.resolve_component(package)
+        print(f"  ⏱️ [Startup] {package} ({component}), {runs}x mode {mode}...")
+
+        samples = []
+        for i in range(runs):
+            self._prepare(package, mode)
+            try:
+                sample = self.launch(component)
+            except Exception as e:
+                print(f"     #{i + 1}: gagal ({e})")
+                continue
+            samples.append(sample)
+            print(f"     #{i + 1}: TotalTime {sample['total_ms']}ms, WaitTime {sample['wait_ms']}ms ({sample['launch_state'] or '-'})")
+
+        self.driver.invalidate_snapshot()
+        totals = sorted(s["total_ms"] for s in samples)
+        return {
+            "package": package,
+            "component": component,
+            "mode": mode,
+            "runs": runs,
+            "samples": samples,
+            "min_ms": totals[0] if totals else None,
+            "median_ms": _round(percentile(totals, 50)),
+            "p95_ms": _round(percentile(totals, 95)),
+            # Android 10+ melaporkan jenis launch sebenarnya; beda dari mode = pengukuran meragukan
+            "mismatched": sum(1 for s in samples if s["launch_state"] and s["launch_state"].lower() != mode),
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
@@ -37,6 +37,9 @@ class HeimdallStoryteller:
                 return "User memulai aktivitas baru dengan menekan tombol Tambah (FAB)."
             return f"User memilih menu atau tombol '{target}'."
 
+        if cmd == 'tap_image':
+            return f"User mengetuk elemen bergambar '{target}' di layar."
+
         # 4. TEKAN TOMBOL SISTEM (BACK, HOME) - [BARU]
         if cmd == 'press_key':
             key = target.lower()
@@ -63,5 +66,9 @@ class HeimdallStoryteller:
         if cmd == 'scroll':
             return f"User melakukan navigasi dengan menggulir layar ke '{target}'."
 
+        # 8. PERFORMA
+        if cmd == 'measure_startup':
+            return f"Sistem mengukur waktu buka aplikasi '{target}' berulang kali."
+
         # Fallback
         return f"User melakukan aksi {cmd} pada {target}."
\ No newline at end of file
@@ -0,0 +1,252 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import time
+
+from core.adb_shell import list_devices
+from core.artifact_store import ArtifactStore
+
+
+HISTORY_FILE = os.path.join("reports", "suite_history.json")
+DEFAULT_DURATION = 60.0
+
+
+def discover_devices():
+    """Ambil serial semua device yang statusnya 'device' dari `adb devices`."""
+    try:
+        return list_devices(max_age=0)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"!!! Error: Gagal membaca adb devices: {e}")
+        return []
+
+
+def discover_scenarios(suite_dir):
+    """Cari semua .heim di folder suite. Folder 'modules' dilewati (isinya file JALANKAN)."""
+    scenarios = []
+    for root, dirs, files in os.walk(suite_dir):
+        dirs[:] = sorted(d for d in dirs if d.lower() != "modules")
+        for file in sorted(files):
+            if file.endswith(".heim"):
+                scenarios.append(os.path.join(root, file))
+    return scenarios
+
+
+# ==========================================
+# HISTORI DURASI (untuk Longest-Job-First)
+# ==========================================
+def load_history(path=HISTORY_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_history(history, results, path=HISTORY_FILE):
+    for res in results:
+        if res.get("duration") is None: continue
+        old = history.get(res["file"])
+        # Exponential moving average agar 1 run aneh tidak merusak estimasi
+        history[res["file"]] = res["duration"] if old is None else round(0.7 * old + 0.3 * res["duration"], 2)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+
+
+def schedule_jobs(scenarios, history):
+    """Urutkan job dari estimasi terlama (LJF). Skenario baru memakai median histori."""
+    known = sorted(history.values())
+    fallback = known[len(known) // 2] if known else DEFAULT_DURATION
+    jobs = [{"file": f, "estimate": history.get(f, fallback)} for f in scenarios]
+    return sorted(jobs, key=lambda j: j["estimate"], reverse=True)
+
+
+# ==========================================
+# WORKER (1 PROSES = 1 DEVICE)
+# ==========================================
+class _PrefixedStream:
+    """Prefix setiap baris stdout worker dengan serial device."""
+
+    def __init__(self, stream, prefix):
+        self.stream = stream
+        self.prefix = prefix
+        self.at_line_start = True
+
+    def write(self, text):
+        out = []
+        for chunk in text.splitlines(keepends=True):
+            if self.at_line_start: out.append(self.prefix)
+            out.append(chunk)
+            self.at_line_start = chunk.endswith("\n")
+        self.stream.write("".join(out))
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def _device_worker(serial, job_queue, result_queue, options, suite_dir):
+    sys.stdout = _PrefixedStream(sys.stdout, f"[{serial}] ")
+    import main as heimdall_main
+
+    while True:
+        # Ambil job terlama berikutnya (antrian sudah urut LJF); None = antrian habis.
+        # get() blocking: get_nowait() bisa Empty sebelum feeder thread parent selesai mengirim
+        job = job_queue.get()
+        if job is None:
+            break
+
+        scenario_name = os.path.splitext(os.path.basename(job["file"]))[0]
+        output_dir = os.path.join(suite_dir, serial, scenario_name)
+        started = time.time()
+        try:
+            result = heimdall_main.run_scenario(job["file"], options, device_serial=serial, output_dir=output_dir)
+        except Exception as e:
+            print(f"⛔ WORKER ERROR: {e}")
+            result = {
+                "scenario": scenario_name, "file": job["file"], "serial": serial,
+                "status": "error", "error": str(e), "steps": 0, "failed_steps": 0,
+                "duration": None, "output_dir": output_dir,
+            }
+        result["wall_time"] = round(time.time() - started, 2)
+        result["estimate"] = job["estimate"]
+        result_queue.put(result)
+
+
+# ==========================================
+# SUITE
+# ==========================================
+def run_suite(suite_dir, options, serials=None):
+    scenarios = discover_scenarios(suite_dir)
+    if not scenarios:
+        print(f"!!! Error: Tidak ada file .heim di {suite_dir}")
+        return []
+
+    serials = serials or discover_devices()
+    if not serials:
+        print("!!! Error: Tidak ada device terhubung.")
+        return []
+
+    history = load_history()
+    jobs = schedule_jobs(scenarios, history)
+    suite_dir_out = os.path.join("reports", f"suite_{time.strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(suite_dir_out, exist_ok=True)
+
+    print(f"🛡️ HEIMDALL SUITE: {len(jobs)} skenario x {len(serials)} device")
+    for job in jobs:
+        print(f"   - {job['file']} (estimasi {job['estimate']:.0f}s)")
+
+    job_queue = multiprocessing.Queue()
+    result_queue = multiprocessing.Queue()
+    active_serials = serials[:len(jobs)]
+    for job in jobs:
+        job_queue.put(job)
+    for _ in active_serials:
+        job_queue.put(None)
+
+    started = time.time()
+    workers = []
+    for serial in active_serials:
+        p = multiprocessing.Process(target=_device_worker, args=(serial, job_queue, result_queue, options, suite_dir_out))
+        p.start()
+        workers.append(p)
+
+    # Kumpulkan hasil sambil worker jalan (hindari deadlock queue penuh)
+    results = []
+    while len(results) < len(jobs):
+        try:
+            results.append(result_queue.get(timeout=1.0))
+        except queue.Empty:
+            if not any(p.is_alive() for p in workers):
+                break
+    for p in workers:
+        p.join()
+
+    # Job yang tidak pernah selesai (worker mati di tengah) tetap masuk laporan
+    done = {r["file"] for r in results}
+    for job in jobs:
+        if job["file"] in done: continue
+        scenario_name = os.path.splitext(os.path.basename(job["file"]))[0]
+        print(f"❌ Tidak dijalankan: {job['file']}")
+        results.append({
+            "scenario": scenario_name, "file": job["file"], "serial": None,
+            "status": "error", "error": "not run", "steps": 0, "failed_steps": 0,
+            "duration": None, "output_dir": None, "wall_time": 0.0, "estimate": job["estimate"],
+        })
+
+    save_history(history, results)
+    summary = _merge_summary(results, serials, time.time() - started)
+    _write_summary(summary, suite_dir_out)
+    # Retensi sekali setelah semua worker selesai (worker tidak boleh menghapus hasil device lain)
+    if getattr(options, "keep_runs", 0):
+        _prune_suites(suite_dir_out, options.keep_runs)
+    return results
+
+
+def _prune_suites(current, keep):
+    """--keep-runs di mode suite: simpan N folder suite terbaru, lalu sapu blob yang tidak dirujuk lagi."""
+    root = os.path.dirname(current)
+    suites = sorted(d for d in os.listdir(root) if d.startswith("suite_") and os.path.isdir(os.path.join(root, d)))
+    for name in suites[:-keep]:
+        path = os.path.join(root, name)
+        if os.path.normpath(path) == os.path.normpath(current): continue
+        shutil.rmtree(path, ignore_errors=True)
+        print(f"  🗑️ [Store] Suite lama dihapus: {path}")
+    result = ArtifactStore(os.path.join(root, ".store")).gc(root)
+    if result["blobs_removed"]:
+        print(f"  🗄️ [Store] {result['blobs_removed']} blob dibebaskan ({result['bytes_freed'] / 1048576:.1f}MB)")
+
+
+def _merge_summary(results, serials, wall_time):
+    by_status = {}
+    for res in results:
+        by_status[res["status"]] = by_status.get(res["status"], 0) + 1
+    serial_time = sum(r["wall_time"] for r in results)
+    return {
+        "devices": serials,
+        "scenarios": len(results),
+        "by_status": by_status,
+        "wall_time": round(wall_time, 2),
+        "serial_time": round(serial_time, 2),
+        "results": sorted(results, key=lambda r: (r["serial"] or "", r["scenario"])),
+    }
+
+
+def _write_summary(summary, suite_dir_out):
+    json_path = os.path.join(suite_dir_out, "suite_summary.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    icons = {"pass": "✅", "fail": "⚠️", "critical": "⛔", "error": "❌"}
+    lines = ["| Device | Skenario | Status | Step | Gagal | Durasi |", "| :-- | :-- | :-- | --: | --: | --: |"]
+    for r in summary["results"]:
+        lines.append(f"| {r['serial']} | {r['scenario']} | {icons.get(r['status'], '')} {r['status']} | "
+                     f"{r['steps']} | {r['failed_steps']} | {r['wall_time']}s |")
+    md_path = os.path.join(suite_dir_out, "suite_summary.md")
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+    print("\n=== HEIMDALL SUITE SUMMARY ===")
+    print("\n".join(lines))
+    print(f"⏱️ Wall time {summary['wall_time']}s vs serial {summary['serial_time']}s | Status: {summary['by_status']}")
+    print(f"📄 Summary: {json_path}")
+
+
+def run_suite_cli(argv):
+    from main import add_run_arguments
+
+    parser = argparse.ArgumentParser(prog="heimdall suite")
+    parser.add_argument("dir", help="Folder berisi file .heim")
+    parser.add_argument("--devices", help="Daftar serial dipisah koma (default: semua device terhubung)")
+    add_run_arguments(parser)
+    args = parser.parse_args(argv)
+
+    serials = [s.strip() for s in args.devices.split(",") if s.strip()] if args.devices else None
+    results = run_suite(args.dir, args, serials)
+    ok = results and all(r["status"] == "pass" for r in results)
+    return 0 if ok else 1
@@ -0,0 +1,129 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    """
+    Profiler Internal Heimdall (aktif dengan --trace).
+    Mencatat durasi setiap fase (lookup, scroll, action, sleep, screenshot, reporting, ...)
+    per step, lalu mengekspor Chrome Trace (buka di chrome://tracing / Perfetto)
+    dan tabel ringkasan step + fase terlambat.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self, enabled=False):
+        self.enabled = enabled
+        self.events = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.t0 = time.perf_counter()
+        self.current_step = 0
+        self.thread_names = {}
+
+    def set_step(self, step_num):
+        self.current_step = step_num
+
+    @contextmanager
+    def span(self, name, cat="phase", step=None):
+        if not self.enabled:
+            yield
+            return
+
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        frame = {"child": 0.0}
+        stack.append(frame)
+        step = self.current_step if step is None else step
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            dur = time.perf_counter() - start
+            stack.pop()
+            # Self time = durasi dikurangi fase anak (agar total per fase tidak dobel hitung)
+            if stack: stack[-1]["child"] += dur
+            tid = threading.get_ident()
+            with self.lock:
+                self.thread_names.setdefault(tid, threading.current_thread().name)
+                self.events.append({
+                    "name": name, "cat": cat, "step": step, "tid": tid,
+                    "start": start - self.t0, "dur": dur, "self": max(0.0, dur - frame["child"]),
+                })
+
+    # ==========================================
+    # EXPORT
+    # ==========================================
+    def export_chrome(self, path):
+        pid = os.getpid()
+        trace = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+                 for tid, tname in self.thread_names.items()]
+        for e in self.events:
+            trace.append({
+                "name": e["name"], "cat": e["cat"], "ph": "X", "pid": pid, "tid": e["tid"],
+                "ts": round(e["start"] * 1e6), "dur": round(e["dur"] * 1e6),
+                "args": {"step": e["step"], "self_ms": round(e["self"] * 1000, 2)},
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+    def summary(self, top=10):
+        phases = {}
+        steps = {}
+        for e in self.events:
+            p = phases.setdefault(e["cat"], {"count": 0, "total": 0.0, "max": 0.0})
+            p["count"] += 1
+            p["total"] += e["self"]
+            p["max"] = max(p["max"], e["self"])
+            if e["cat"] == "step":
+                s = steps.setdefault(e["step"], {"name": "", "total": 0.0, "phases": {}})
+                s["name"] = e["name"]
+                s["total"] += e["dur"]
+            else:
+                s = steps.setdefault(e["step"], {"name": "", "total": 0.0, "phases": {}})
+                s["phases"][e["cat"]] = s["phases"].get(e["cat"], 0.0) + e["self"]
+
+        slowest = sorted(
+            ({"step": k, **v} for k, v in steps.items() if v["total"] > 0),
+            key=lambda s: s["total"], reverse=True
+        )[:top]
+        return {"phases": phases, "slowest_steps": slowest}
+
+    def write_summary(self, path, top=10):
+        s = self.summary(top)
+        lines = ["## Fase (self time)", "", "| Fase | Jumlah | Total (s) | Rata2 (ms) | Maks (ms) |", "| :-- | --: | --: | --: | --: |"]
+        for cat, p in sorted(s["phases"].items(), key=lambda kv: kv[1]["total"], reverse=True):
+            lines.append(f"| {cat} | {p['count']} | {p['total']:.2f} | {p['total'] / p['count'] * 1000:.1f} | {p['max'] * 1000:.1f} |")
+        lines += ["", "## Step Terlambat", "", "| Step | Total (s) | Fase Dominan | Narasi |", "| --: | --: | :-- | :-- |"]
+        for st in s["slowest_steps"]:
+            top_phases = sorted(st["phases"].items(), key=lambda kv: kv[1], reverse=True)[:3]
+            phase_str = ", ".join(f"{k} {v:.2f}s" for k, v in top_phases)
+            lines.append(f"| {st['step']} | {st['total']:.2f} | {phase_str} | {st['name']} |")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return lines
+
+
+TRACER = Tracer()
+
+
+def traced(cat, name=None):
+    """Decorator: bungkus method dengan span tracer (nyaris tanpa biaya saat tracer mati)."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return func(*args, **kwargs)
+            with TRACER.span(span_name, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
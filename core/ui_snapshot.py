@@ -0,0 +1,166 @@
+import re
+import xml.etree.ElementTree as ET
+
+
+class UiSnapshot:
+    """
+    Foto Hierarki UI (1x dump_hierarchy per kondisi layar).
+    Semua strategi pencarian (resourceId, text, textContains, descriptionContains)
+    dijawab dari index di memori, tanpa RPC tambahan ke device.
+    """
+
+    def __init__(self, xml_source):
+        self.xml = xml_source
+        self.nodes = []
+        self.by_resource_id = {}
+        self.by_text = {}
+        self.by_desc = {}
+        self._lookup_cache = {}
+        self._build_index(xml_source)
+
+    def _build_index(self, xml_source):
+        try:
+            root = ET.fromstring(xml_source.encode("utf-8") if isinstance(xml_source, str) else xml_source)
+        except ET.ParseError:
+            return
+
+        # Urutan dokumen = urutan instance di uiautomator2 (instance=0 duluan)
+        for el in root.iter("node"):
+            node = self._to_node(el.attrib)
+            self.nodes.append(node)
+            if node["resourceName"]:
+                self.by_resource_id.setdefault(node["resourceName"], node)
+            if node["text"]:
+                self.by_text.setdefault(node["text"], node)
+            if node["contentDescription"]:
+                self.by_desc.setdefault(node["contentDescription"], node)
+
+    @staticmethod
+    def _to_node(attrib):
+        # Format bounds: "[left,top][right,bottom]"
+        nums = [int(n) for n in re.findall(r'-?\d+', attrib.get("bounds", ""))]
+        if len(nums) == 4:
+            bounds = {"left": nums[0], "top": nums[1], "right": nums[2], "bottom": nums[3]}
+        else:
+            bounds = {"left": 0, "top": 0, "right": 0, "bottom": 0}
+        return {
+            "text": attrib.get("text", ""),
+            "resourceName": attrib.get("resource-id", ""),
+            "contentDescription": attrib.get("content-desc", ""),
+            "className": attrib.get("class", ""),
+            "packageName": attrib.get("package", ""),
+            "clickable": attrib.get("clickable") == "true",
+            "enabled": attrib.get("enabled") == "true",
+            "bounds": bounds,
+        }
+
+    FAB_ID = re.compile(r'(^|_)fab(_|$)')
+
+    def find_fab(self):
+        """
+        Kandidat FAB (dulu dicari manual via scanner.py): class FloatingActionButton dulu,
+        baru resource-id dengan token 'fab' utuh (fab, fab_add, fabAdd, btn_fab; bukan prefab_list / fabric_title).
+        """
+        clickable = [n for n in self.nodes if n["clickable"]]
+        for node in clickable:
+            if node["className"].endswith("FloatingActionButton"):
+                return node
+        for node in clickable:
+            # camelCase ikut dipecah: fabAdd -> fab_add
+            rid = re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', node["resourceName"].split("/")[-1]).lower()
+            if self.FAB_ID.search(rid):
+                return node
+        return None
+
+    # ==========================================
+    # LOOKUP (Urutan sama dengan find_element_robust lama)
+    # ==========================================
+    def find(self, selector):
+        """Return (strategy, node) pertama yang cocok, atau (None, None)."""
+        if selector in self._lookup_cache:
+            return self._lookup_cache[selector]
+
+        result = (None, None)
+        if selector in self.by_resource_id:
+            result = ("resourceId", self.by_resource_id[selector])
+        elif selector in self.by_text:
+            result = ("text", self.by_text[selector])
+        else:
+            node = self.find_contains("text", selector)
+            if node:
+                result = ("textContains", node)
+            else:
+                node = self.find_contains("contentDescription", selector)
+                if node:
+                    result = ("descriptionContains", node)
+
+        self._lookup_cache[selector] = result
+        return result
+
+    def find_contains(self, field, needle):
+        if not needle:
+            return None
+        for node in self.nodes:
+            if needle in node[field]:
+                return node
+        return None
+
+    def exists(self, **selector):
+        """Subset dari selector uiautomator2 yang bisa dijawab dari snapshot."""
+        return self.match(**selector) is not None
+
+    def match(self, **selector):
+        if len(selector) != 1:
+            return None
+        strategy, value = next(iter(selector.items()))
+        if strategy == "resourceId":
+            return self.by_resource_id.get(value)
+        if strategy == "text":
+            return self.by_text.get(value)
+        if strategy == "textContains":
+            return self.find_contains("text", value)
+        if strategy == "description":
+            return self.by_desc.get(value)
+        if strategy == "descriptionContains":
+            return self.find_contains("contentDescription", value)
+        return None
+
+
+class SnapshotElement:
+    """
+    Elemen hasil lookup snapshot. Meniru API UiObject yang dipakai Heimdall
+    (center, info, click, exists, get_text). Method lain (down, right, ...)
+    diteruskan ke selector uiautomator2 aslinya (lazy).
+    """
+
+    def __init__(self, driver, strategy, selector, node):
+        self.driver = driver
+        self.strategy = strategy
+        self.selector = selector
+        self.node = node
+        self._ui_object = None
+
+    @property
+    def info(self):
+        return self.node
+
+    @property
+    def exists(self):
+        return True
+
+    def center(self):
+        b = self.node["bounds"]
+        return (b["left"] + b["right"]) // 2, (b["top"] + b["bottom"]) // 2
+
+    def click(self):
+        x, y = self.center()
+        self.driver._safe_click(x, y)
+
+    def get_text(self):
+        return self.node["text"]
+
+    def __getattr__(self, name):
+        # Fallback ke UiObject asli untuk relasi (down/right/child/...)
+        if self._ui_object is None:
+            self._ui_object = self.driver.d(**{self.strategy: self.selector})
+        return getattr(self._ui_object, name)
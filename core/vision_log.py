@@ -2,61 +2,339 @@ import subprocess
 import re
 import threading
 import time
+from collections import OrderedDict, deque
+from core.tracer import traced
+from core.api_metrics import ApiMetrics
+from core.adb_shell import get_shell
 
 class LogSniffer:
-    def __init__(self):
-        self.logs = []
+    """
+    Penyadap Logcat (API Sniffer).
+    - Ring buffer terbatas + lock: aman dibaca dari thread utama, memori tidak bocor di app yang cerewet.
+    - Request & response dipasangkan per call OkHttp (PID/TID thread pemanggil) atau per URL.
+    - Log dikaitkan ke step berdasarkan jendela waktu, bukan urutan "drain".
+    - Filter di sisi device (tag:prioritas / --regex) + pre-check literal sebelum regex,
+      supaya CPU laptop tetap rendah walau logcat device banjir.
+    """
+
+    # Baris tanpa salah satu penanda ini langsung dibuang (tanpa decode & regex)
+    MARKERS = (b"-->", b"<--", b"AndroidRuntime", b"ANR in", b"has died")
+
+    # Tag yang wajib tetap lolos filter device agar crash watcher tetap bekerja
+    CRASH_FILTERSPECS = ["AndroidRuntime:E", "ActivityManager:I"]
+    CRASH_REGEX = r"FATAL EXCEPTION|Process: |^\s*at |Caused by|Exception|ANR in|has died"
+
+    # Format logcat -v threadtime: "MM-DD HH:MM:SS.mmm  PID  TID P TAG: pesan"
+    LINE_PATTERN = re.compile(r'^\d\d-\d\d\s+[\d:.]+\s+(\d+)\s+(\d+)\s+\w\s+')
+
+    # Regex yang lebih toleran untuk OkHttp
+    # Menangkap "<-- 200" atau "<-- 500"; URL setelahnya (jika ada) dipakai untuk pairing
+    STATUS_PATTERN = re.compile(r'<--\s+(\d{3})\b(.*)')
+    RESPONSE_URL_PATTERN = re.compile(r'(https?://[^\s)]+)')
+
+    # "(123ms, 4kb body)" / "(123ms, 1.2MB body)" / "(123ms, unknown-length body)"
+    TIMING_PATTERN = re.compile(r'\((\d+)ms(?:,\s*([\d.]+)\s*(b|kb|mb|gb)\s+body)?', re.IGNORECASE)
+    # "<-- END HTTP (4567-byte body)" / "(4567-byte, 1200-gzipped-byte body)"
+    END_PATTERN = re.compile(r'<--\s+END HTTP\s+\((\d+)-byte')
+    SIZE_UNITS = {"b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3}
+
+    # Regex URL
+    URL_PATTERN = re.compile(r'-->\s+(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS)\s+(http[^\s]+)')
+
+    def __init__(self, device_serial=None, max_entries=2000, max_pending=256, filterspecs=None, regex=None):
+        # adb -s <serial> agar sniffer tidak tertukar device saat multi-device
+        self.device_serial = device_serial
+        self.adb = ["adb"] + (["-s", device_serial] if device_serial else [])
+        # Contoh filterspecs: ["OkHttp:D", "*:S"]; regex: "OkHttp|-->|<--"
+        self.filterspecs = list(filterspecs or [])
+        if self.filterspecs:
+            self.filterspecs = self.CRASH_FILTERSPECS + [f for f in self.filterspecs if f not in self.CRASH_FILTERSPECS]
+        self.regex = f"({regex})|{self.CRASH_REGEX}" if regex else None
+        self.crash_watcher = CrashWatcher()
+        self.lines_read = 0
+        self.lines_matched = 0
+        self.lock = threading.Lock()
+        self.entries = deque(maxlen=max_entries)
+        self.pending = OrderedDict()
+        self.max_pending = max_pending
+        self.last_drain = time.time()
+        self.dropped = 0
+        self.metrics = ApiMetrics()
+        # Response terakhir per thread, menunggu baris "END HTTP" (ukuran body)
+        self.awaiting_end = {}
         self.stop_event = threading.Event()
         self.thread = None
+        self.process = None
+        # Diisi main saat --record: log per step ikut direkam untuk replay
+        self.recorder = None
 
     def start(self):
-        subprocess.run(["adb", "logcat", "-c"]) # Clear logs
+        # Clear logs lewat persistent shell (tanpa spawn proses adb baru)
+        try: get_shell(self.device_serial).run("logcat -c")
+        except (OSError, RuntimeError, TimeoutError): subprocess.run(self.adb + ["logcat", "-c"])
         self.thread = threading.Thread(target=self._sniff)
         self.thread.daemon = True
         self.thread.start()
 
+    def logcat_command(self):
+        cmd = self.adb + ["logcat", "-v", "threadtime"]
+        if self.regex:
+            cmd.append(f"--regex={self.regex}")
+        return cmd + self.filterspecs
+
     def _sniff(self):
-        process = subprocess.Popen(
-            ["adb", "logcat", "-v", "time"],
+        # Mode bytes: baris yang tidak relevan tidak perlu di-decode sama sekali
+        self.process = subprocess.Popen(
+            self.logcat_command(),
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            encoding='utf-8',
-            errors='ignore'
+            stderr=subprocess.DEVNULL,
+            bufsize=1024 * 64
         )
 
-        # Regex yang lebih toleran untuk OkHttp
-        # Menangkap "<-- 200" atau "<-- 500" atau "HTTP 200"
-        status_pattern = re.compile(r'<--\s+(\d{3})') 
-        
-        # Regex URL
-        url_pattern = re.compile(r'-->\s+(GET|POST|PUT|DELETE)\s+(http[^\s]+)')
-
+        # 1 regex literal alternation lebih cepat dari any(m in raw ...) per baris
+        precheck = re.compile(b"|".join(re.escape(m) for m in self.MARKERS)).search
+        readline = self.process.stdout.readline
         while not self.stop_event.is_set():
-            line = process.stdout.readline()
-            if not line: break
-            
-            # 1. Cek URL Request
-            url_match = url_pattern.search(line)
-            if url_match:
-                method = url_match.group(1)
-                full_url = url_match.group(2)
-                # Ambil path doang biar pendek
-                endpoint = "/" + "/".join(full_url.split('/')[3:]) 
-                self.logs.append({"method": method, "endpoint": endpoint, "status": "-"}) # Default status strip
-
-            # 2. Cek Status Response
-            status_match = status_pattern.search(line)
-            if status_match:
-                code = status_match.group(1)
-                # Jika ada request sebelumnya yang statusnya masih "-", update statusnya
-                if self.logs and self.logs[-1]["status"] == "-":
-                    self.logs[-1]["status"] = code
+            raw = readline()
+            if not raw: break
+            self.lines_read += 1
+            # Pre-check literal (jauh lebih murah dari regex)
+            if not precheck(raw): continue
+            self.lines_matched += 1
+            self.handle_line(raw.decode('utf-8', errors='ignore'), time.time())
+
+    def handle_line(self, line, ts):
+        # 0. Crash / ANR / proses mati (tag sistem, volumenya kecil)
+        if "AndroidRuntime" in line or "ActivityManager" in line or "has died" in line:
+            self.crash_watcher.feed(line, ts)
+            return
+
+        # 1. Cek URL Request
+        url_match = self.URL_PATTERN.search(line)
+        if url_match:
+            self._on_request(line, url_match, ts)
+            return
+
+        # 2. Cek Status Response
+        status_match = self.STATUS_PATTERN.search(line)
+        if status_match:
+            self._on_response(line, status_match, ts)
+            return
+
+        # 3. Ukuran body (baris penutup OkHttp)
+        end_match = self.END_PATTERN.search(line)
+        if end_match:
+            self._on_end(line, int(end_match.group(1)))
+
+    # ==========================================
+    # PAIRING REQUEST <-> RESPONSE
+    # ==========================================
+    def _thread_key(self, line):
+        # OkHttp logging interceptor mencetak request & response di thread call yang sama
+        m = self.LINE_PATTERN.match(line)
+        return (m.group(1), m.group(2)) if m else None
+
+    @staticmethod
+    def _endpoint(full_url):
+        # Ambil path doang biar pendek
+        return "/" + "/".join(full_url.split('/')[3:])
+
+    def _on_request(self, line, match, ts):
+        full_url = match.group(2)
+        entry = {
+            "method": match.group(1), "endpoint": self._endpoint(full_url), "url": full_url,
+            "status": "-", "ts": ts, "resp_ts": None,  # Default status strip
+        }
+        with self.lock:
+            self.entries.append(entry)
+            self.pending[id(entry)] = (self._thread_key(line), entry)
+            # Request yang tidak pernah dapat response tidak boleh menumpuk selamanya
+            while len(self.pending) > self.max_pending:
+                self.pending.popitem(last=False)
+                self.dropped += 1
+
+    def _on_response(self, line, match, ts):
+        code = match.group(1)
+        url_match = self.RESPONSE_URL_PATTERN.search(match.group(2))
+        url = url_match.group(1) if url_match else None
+        thread_key = self._thread_key(line)
+        with self.lock:
+            target = None
+            # a. Pasangkan dengan URL yang sama (paling akurat)
+            if url:
+                target = next((k for k, (_, e) in self.pending.items() if e["url"] == url), None)
+            # b. Pasangkan dengan thread call yang sama
+            if target is None and thread_key:
+                target = next((k for k, (tk, _) in self.pending.items() if tk == thread_key), None)
+            # c. Fallback lama: request tertua yang masih menunggu
+            if target is None and self.pending and not url:
+                target = next(iter(self.pending))
+            if target is None:
+                return
+            _, entry = self.pending.pop(target)
+            entry["status"] = code
+            entry["resp_ts"] = ts
+            entry["duration_ms"], entry["bytes"] = self._parse_timing(match.group(2))
+            self.metrics.add(entry)
+            if thread_key and entry["bytes"] is None:
+                self.awaiting_end[thread_key] = entry
+                # Hanya thread aktif yang disimpan (batas memori)
+                if len(self.awaiting_end) > self.max_pending:
+                    self.awaiting_end.pop(next(iter(self.awaiting_end)))
+
+    def _parse_timing(self, text):
+        m = self.TIMING_PATTERN.search(text)
+        if not m:
+            return None, None
+        duration = int(m.group(1))
+        if m.group(2) is None:
+            return duration, None
+        return duration, int(float(m.group(2)) * self.SIZE_UNITS[m.group(3).lower()])
+
+    def _on_end(self, line, size):
+        thread_key = self._thread_key(line)
+        with self.lock:
+            entry = self.awaiting_end.pop(thread_key, None) if thread_key else None
+            if entry is not None and entry.get("bytes") is None:
+                entry["bytes"] = size
+                self.metrics.add_bytes(entry, size)
+
+    # ==========================================
+    # AKSES DATA
+    # ==========================================
+    @traced("network")
+    def get_logs_between(self, start_ts, end_ts=None):
+        """Semua request yang DIMULAI di dalam jendela waktu step (salinan, aman dari thread)."""
+        end_ts = end_ts or time.time()
+        with self.lock:
+            logs = [dict(e) for e in self.entries if start_ts <= e["ts"] < end_ts]
+        if self.recorder: self.recorder.add("logs", "", logs)
+        return logs
 
     def get_recent_logs(self):
-        captured = self.logs[:]
-        self.logs = [] # Reset buffer
+        """Kompatibilitas lama: request sejak pemanggilan terakhir (berbasis waktu, tidak ada yang hilang)."""
+        now = time.time()
+        captured = self.get_logs_between(self.last_drain, now)
+        self.last_drain = now
         return captured
 
+    def stats(self):
+        ratio = (self.lines_matched / self.lines_read * 100) if self.lines_read else 0.0
+        return {"lines_read": self.lines_read, "lines_matched": self.lines_matched,
+                "match_pct": round(ratio, 2), "dropped_pending": self.dropped}
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"  📡 [Sniffer] {s['lines_read']} baris logcat dibaca, {s['lines_matched']} lolos pre-check ({s['match_pct']}%)")
+
+    def watch_package(self, package):
+        self.crash_watcher.watch_package(package)
+
+    def pop_crash(self):
+        crash = self.crash_watcher.pop_crash()
+        if self.recorder: self.recorder.add("pop_crash", "", crash)
+        return crash
+
+    def get_api_metrics(self):
+        with self.lock:
+            return self.metrics.summary()
+
     def stop(self):
-        self.stop_event.set()
\ No newline at end of file
+        self.stop_event.set()
+        if self.process:
+            try: self.process.terminate()
+            except Exception: pass
+
+
+class CrashWatcher:
+    """
+    Pengawas Crash & ANR untuk package yang sedang dites.
+    Mendeteksi "FATAL EXCEPTION" (AndroidRuntime), "ANR in <pkg>", dan
+    "Process <pkg> (pid N) has died", lalu memberi sinyal ke loop utama (crash_event)
+    lengkap dengan stack trace-nya.
+    """
+
+    FATAL_PATTERN = re.compile(r'FATAL EXCEPTION')
+    PROCESS_PATTERN = re.compile(r'Process:\s+([\w.:]+),\s+PID:\s+(\d+)')
+    ANR_PATTERN = re.compile(r'ANR in\s+([\w.:]+)')
+    DIED_PATTERN = re.compile(r'Process\s+([\w.:]+)\s+\(pid\s+(\d+)\)\s+has died')
+    MESSAGE_PATTERN = re.compile(r'^\d\d-\d\d\s+[\d:.]+\s+(\d+)\s+\d+\s+\w\s+([^:]+?)\s*:\s?(.*)$')
+    MAX_STACK_LINES = 80
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.package = None
+        self.crash_event = threading.Event()
+        self.crashes = []
+        self._collecting = None     # crash yang stack-nya masih dikumpulkan
+        self._collect_pid = None
+        self._unhandled = []
+
+    def watch_package(self, package):
+        """Dipanggil saat 'Buka aplikasi' agar hanya crash app target yang memicu abort."""
+        with self.lock:
+            self.package = package
+
+    def _matches(self, process_name):
+        # Proses :remote / :service milik package yang sama juga dihitung
+        return bool(self.package) and process_name.split(":")[0] == self.package
+
+    def feed(self, line, ts):
+        m = self.MESSAGE_PATTERN.match(line.rstrip("\n"))
+        pid, tag, msg = (m.group(1), m.group(2), m.group(3)) if m else (None, "", line.strip())
+
+        with self.lock:
+            # 1. Lanjutan stack trace crash yang sedang dikumpulkan
+            if self._collecting is not None and tag == "AndroidRuntime" and pid == self._collect_pid \
+                    and not self.FATAL_PATTERN.search(msg):
+                proc = self.PROCESS_PATTERN.search(msg)
+                if proc:
+                    self._collecting["package"] = proc.group(1)
+                    self._collecting["pid"] = proc.group(2)
+                    if self._matches(proc.group(1)):
+                        self._signal(self._collecting)
+                elif len(self._collecting["stack"]) < self.MAX_STACK_LINES:
+                    self._collecting["stack"].append(msg)
+                    if not self._collecting["summary"] and msg and not msg.startswith(("at ", "\tat ")):
+                        self._collecting["summary"] = msg.strip()
+                return
+
+            # 2. Awal crash baru
+            if tag == "AndroidRuntime" and self.FATAL_PATTERN.search(msg):
+                self._collecting = {"type": "crash", "package": None, "pid": pid, "ts": ts,
+                                    "summary": "", "stack": [msg]}
+                self._collect_pid = pid
+                return
+
+            # 3. ANR
+            anr = self.ANR_PATTERN.search(msg)
+            if anr and self._matches(anr.group(1)):
+                self._signal({"type": "anr", "package": anr.group(1), "pid": pid, "ts": ts,
+                              "summary": msg.strip(), "stack": [msg]})
+                return
+
+            # 4. Proses mati (tanpa FATAL sebelumnya, misal native crash / LMK)
+            died = self.DIED_PATTERN.search(msg)
+            if died and self._matches(died.group(1)):
+                already = any(c["pid"] == died.group(2) and ts - c["ts"] < 10 for c in self.crashes)
+                if not already:
+                    self._signal({"type": "died", "package": died.group(1), "pid": died.group(2), "ts": ts,
+                                  "summary": msg.strip(), "stack": [msg]})
+
+    def _signal(self, crash):
+        if crash in self.crashes: return
+        self.crashes.append(crash)
+        self._unhandled.append(crash)
+        self.crash_event.set()
+        print(f"  💥 [CrashWatcher] {crash['type'].upper()} terdeteksi pada {crash['package']} (pid {crash['pid']})")
+
+    def pop_crash(self):
+        """Ambil crash yang belum ditangani loop utama (None jika tidak ada)."""
+        with self.lock:
+            if not self._unhandled:
+                return None
+            crash = self._unhandled.pop(0)
+            if not self._unhandled:
+                self.crash_event.clear()
+            # Salinan: stack masih bisa bertambah di thread sniffer
+            return {**crash, "stack": list(crash["stack"])}
@@ -0,0 +1,238 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from core.artifact_store import resolve_run_dir
+from core.event_log import load_events
+
+# Area yang selalu berubah sendiri (jam, baterai, notifikasi): [x1, y1, x2, y2]
+# Nilai <= 1 dianggap pecahan lebar/tinggi layar, > 1 dianggap pixel.
+DEFAULT_MASKS = [[0.0, 0.0, 1.0, 0.035]]
+
+
+# ==========================================
+# OPERASI GAMBAR (NUMPY)
+# ==========================================
+def load_rgb(path):
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+def dhash(pixels):
+    """Perceptual hash 64-bit (difference hash) -> hex string."""
+    gray = Image.fromarray(pixels).convert("L").resize((9, 8), Image.BILINEAR)
+    g = np.asarray(gray, dtype=np.int16)
+    return np.packbits(g[:, 1:] > g[:, :-1]).tobytes().hex()
+
+
+def masked_digest(pixels, mask):
+    """Hash eksak pixel di luar mask (jam / status bar tidak ikut)."""
+    clean = pixels.copy()
+    clean[mask] = 0
+    return hashlib.blake2b(clean.tobytes(), digest_size=16).hexdigest()
+
+
+def hamming(hex_a, hex_b):
+    return bin(int(hex_a, 16) ^ int(hex_b, 16)).count("1")
+
+
+def build_mask(shape, regions):
+    """Mask boolean (True = diabaikan) dari daftar region."""
+    h, w = shape[:2]
+    mask = np.zeros((h, w), dtype=bool)
+    for x1, y1, x2, y2 in regions:
+        sx = w if max(x1, x2) <= 1 else 1
+        sy = h if max(y1, y2) <= 1 else 1
+        mask[int(y1 * sy):int(round(y2 * sy)), int(x1 * sx):int(round(x2 * sx))] = True
+    return mask
+
+
+def diff_pixels(base, current, mask, tolerance):
+    """Pixel berubah = selisih kanal terbesar > tolerance, di luar mask."""
+    delta = np.abs(base.astype(np.int16) - current.astype(np.int16)).max(axis=2)
+    changed = (delta > tolerance) & ~mask
+    valid = mask.size - int(mask.sum())
+    return changed, (int(changed.sum()) / valid * 100 if valid else 0.0)
+
+
+def render_heatmap(base, changed, path, width=540):
+    """Baseline diredupkan (abu-abu) + pixel berubah merah, diperkecil dengan max-pooling."""
+    h, w = changed.shape
+    f = max(1, -(-w // width))
+    ph, pw = -(-h // f) * f, -(-w // f) * f
+    # Max-pool: garis berubah setipis 1px tetap terlihat setelah diperkecil
+    pooled = np.zeros((ph, pw), dtype=bool)
+    pooled[:h, :w] = changed
+    pooled = pooled.reshape(ph // f, f, pw // f, f).any(axis=(1, 3))
+    gray = base[::f, ::f].mean(axis=2, dtype=np.float32) * 0.35 + 40
+    heat = np.repeat(gray[..., None], 3, axis=2).astype(np.uint8)
+    heat = heat[:pooled.shape[0], :pooled.shape[1]]
+    heat[pooled[:heat.shape[0], :heat.shape[1]]] = (255, 0, 0)
+    # Tulis lalu replace: heatmap lama bisa hardlink ke blob artifact store
+    Image.fromarray(heat).save(path + ".tmp", format="PNG")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+# ==========================================
+# BASELINE PER SKENARIO & STEP
+# ==========================================
+class VisualChecker:
+    """
+    Visual regression terhadap baseline: baselines/<skenario>/step_NNN.png.
+    index.json menyimpan hash baseline: digest eksak (di luar mask) yang sama = layar identik,
+    lolos tanpa membuka baseline. dHash 64-bit hanya dipakai sebagai jarak perseptual
+    (terlalu kasar untuk meloloskan sendiri: perubahan 1 angka bisa menghasilkan hash sama).
+    masks.json (opsional): {"default": [[x1,y1,x2,y2], ...], "3": [...]} area yang diabaikan.
+    """
+
+    def __init__(self, scenario, baseline_dir="baselines", tolerance=16, max_diff_pct=0.5,
+                 update=False, output_dir=None):
+        self.dir = os.path.join(baseline_dir, scenario)
+        self.tolerance = tolerance
+        self.max_diff_pct = max_diff_pct
+        self.update = update
+        self.output_dir = output_dir
+        self.index = self._read_json(os.path.join(self.dir, "index.json"), {})
+        self.masks = self._read_json(os.path.join(self.dir, "masks.json"), {})
+
+    @staticmethod
+    def _read_json(path, default):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def baseline_path(self, step):
+        return os.path.join(self.dir, f"step_{int(step):03d}.png")
+
+    def regions(self, step):
+        return self.masks.get(str(step), []) + self.masks.get("default", DEFAULT_MASKS)
+
+    def check(self, step, screenshot_path):
+        """Bandingkan 1 screenshot. Return dict hasil (status: baseline/same/pass/fail/error)."""
+        started = time.time()
+        result = {"step": step, "screenshot": screenshot_path, "baseline": self.baseline_path(step),
+                  "status": "error", "diff_pct": None, "heatmap": None, "max_diff_pct": self.max_diff_pct}
+        try:
+            current = load_rgb(screenshot_path)
+        except Exception as e:
+            result["error"] = f"Screenshot tidak bisa dibaca: {e}"
+            return result
+
+        mask = build_mask(current.shape, self.regions(step))
+        result["dhash"] = dhash(current)
+        result["digest"] = masked_digest(current, mask)
+        result["shape"] = list(current.shape)
+        entry = self.index.get(str(step))
+        if entry and entry.get("shape") == result["shape"]:
+            result["phash_distance"] = hamming(entry["dhash"], result["dhash"])
+
+        if self.update or not os.path.exists(result["baseline"]):
+            os.makedirs(self.dir, exist_ok=True)
+            shutil.copyfile(screenshot_path, result["baseline"])
+            result["status"] = "baseline"
+        elif entry and entry.get("digest") == result["digest"] and entry.get("shape") == result["shape"]:
+            # Prefilter: layar identik -> baseline tidak perlu dibuka, diff penuh dilewati
+            result.update(status="same", diff_pct=0.0)
+        else:
+            base = load_rgb(result["baseline"])
+            if base.shape != current.shape:
+                result.update(status="fail", error=f"Ukuran beda: baseline {base.shape[1]}x{base.shape[0]}, sekarang {current.shape[1]}x{current.shape[0]}")
+            else:
+                changed, pct = diff_pixels(base, current, mask, self.tolerance)
+                result["diff_pct"] = round(pct, 3)
+                result["status"] = "fail" if pct > self.max_diff_pct else "pass"
+                if changed.any() and self.output_dir:
+                    os.makedirs(os.path.join(self.output_dir, "visual"), exist_ok=True)
+                    result["heatmap"] = render_heatmap(base, changed, os.path.join(self.output_dir, "visual", f"step_{int(step):03d}_diff.png"))
+
+        if result["status"] == "baseline":
+            self.remember(step, result)
+        result["ms"] = round((time.time() - started) * 1000, 1)
+        return result
+
+    def remember(self, step, result):
+        self.index[str(step)] = {"dhash": result["dhash"], "digest": result["digest"], "shape": result["shape"]}
+
+    def save_index(self):
+        if not self.index: return
+        os.makedirs(self.dir, exist_ok=True)
+        with open(os.path.join(self.dir, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=1)
+
+
+# ==========================================
+# POST-PASS PARALEL (TANPA DEVICE)
+# ==========================================
+def _check_one(args):
+    checker_kwargs, step, path = args
+    return VisualChecker(**checker_kwargs).check(step, path)
+
+
+def compare_run(run_dir, scenario, baseline_dir="baselines", tolerance=16, max_diff_pct=0.5, update=False, jobs=4):
+    """Bandingkan semua screenshot step_N.png sebuah run dengan baseline, paralel per proses."""
+    shots = []
+    ss_dir = os.path.join(run_dir, "screenshots")
+    for name in sorted(os.listdir(ss_dir)) if os.path.isdir(ss_dir) else []:
+        match = re.match(r'step_(\d+)\.png$', name)
+        if match:
+            shots.append((int(match.group(1)), os.path.join(ss_dir, name)))
+    shots.sort()
+
+    kwargs = {"scenario": scenario, "baseline_dir": baseline_dir, "tolerance": tolerance,
+              "max_diff_pct": max_diff_pct, "update": update, "output_dir": run_dir}
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+        results = list(pool.map(_check_one, [(kwargs, step, path) for step, path in shots]))
+
+    # Index baseline hanya ditulis oleh proses utama
+    checker = VisualChecker(scenario, baseline_dir)
+    for r in results:
+        if r["status"] == "baseline":
+            checker.remember(r["step"], r)
+    checker.save_index()
+
+    with open(os.path.join(run_dir, "visual.json"), "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+    return results
+
+
+def print_results(results):
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    print(f"  🖼️ [Visual] {len(results)} screenshot: {counts}")
+    for r in results:
+        if r["status"] in ("fail", "error"):
+            print(f"     Step {r['step']}: {r['status']} diff {r['diff_pct']}% {r.get('error', '')} {r['heatmap'] or ''}")
+
+
+def run_visual_cli(argv):
+    parser = argparse.ArgumentParser(prog="heimdall visual")
+    parser.add_argument("run_dir", help="Folder hasil run (berisi screenshots/)")
+    parser.add_argument("--scenario", help="Nama skenario baseline (default: dari events.jsonl / nama folder run)")
+    parser.add_argument("--baseline-dir", default="baselines")
+    parser.add_argument("--update-baseline", action="store_true", help="Jadikan screenshot run ini baseline baru")
+    parser.add_argument("--tolerance", type=int, default=16, help="Toleransi selisih warna per pixel (0-255)")
+    parser.add_argument("--max-diff", type=float, default=0.5, help="Batas %% pixel berubah sebelum dianggap gagal")
+    parser.add_argument("--jobs", type=int, default=4, help="Jumlah proses paralel")
+    args = parser.parse_args(argv)
+
+    run_dir = resolve_run_dir(args.run_dir)
+    start = next((e for e in load_events(run_dir) if e.get("kind") == "run_start"), {})
+    scenario = args.scenario or start.get("scenario") or os.path.basename(os.path.normpath(run_dir))
+    started = time.time()
+    results = compare_run(run_dir, scenario, args.baseline_dir, args.tolerance, args.max_diff,
+                          args.update_baseline, args.jobs)
+    print_results(results)
+    print(f"  ⏱️ [Visual] Selesai dalam {time.time() - started:.2f}s")
+    return 1 if any(r["status"] in ("fail", "error") for r in results) else 0
@@ -4,82 +4,390 @@ import time
 import sys  # Wajib untuk sys.stdout
 from core.driver import HeimdallDriver
 from core.parser import HeimdallParser
+from core.compiler import ScenarioCompiler, bind_steps
 from core.vision_log import LogSniffer
 from core.storyteller import HeimdallStoryteller
 from core.state_manager import StateManager
+from core.stabilizer import UiStabilizer
+from core.resource_sampler import ResourceSampler
+from core.leak_detector import LeakDetector
+from core.startup_meter import StartupMeter
+from core.frame_meter import FrameMeter
+from core.replay_driver import ReplayDriver, ReplaySniffer
+from core.event_log import RunEventLog, load_events
+from core.tracer import TRACER
+from core.artifact_store import ArtifactStore, new_run_dir, mark_latest
 from reporters.map_builder import MapBuilder
 from reporters.saga_writer import SagaWriter
+from reporters.html_report import HtmlReport
+from reporters.report_pipeline import ReportPipeline
+from reporters.regenerate import build_summary, write_summary
 
-# Global Context
-ctx = {
-    "driver": None, "parser": None, "state": None,
-    "mapper": None, "saga": None, "sniffer": None,
-    "ss_dir": "", "step_count": 0, "activity": "Start"
-}
+# Global Context (1 proses = 1 device; suite runner memakai 1 proses per device)
+ctx = {}
+
+def reset_context():
+    ctx.clear()
+    ctx.update({
+        "driver": None, "parser": None, "compiler": None, "state": None,
+        "mapper": None, "saga": None, "html": None, "report": None, "events": None, "sniffer": None, "sampler": None, "leak": None, "visual": None,
+        "ss_dir": "", "step_count": 0, "failed_steps": 0, "activity": "Start",
+        "current_step": {}, "probe_timeout": 0.0, "log_window_start": 0.0,
+        "on_crash": "abort", "app_package": None, "skip_to_feature": False, "leak_fail": False,
+        "startup_budget": None, "jank_all": False
+    })
+
+reset_context()
+
+def add_run_arguments(parser):
+    """Opsi eksekusi yang dipakai bersama oleh mode single file dan mode suite."""
+    parser.add_argument("--wait-config", help="JSON override profil tunggu (min/max/poll per jenis perintah)")
+    parser.add_argument("--fixed-sleep", action="store_true", help="Matikan adaptive wait (pakai sleep tetap lama)")
+    parser.add_argument("--no-cache", action="store_true", help="Compile ulang skenario tanpa memakai cache plan")
+    parser.add_argument("--trace", action="store_true", help="Rekam durasi per fase (trace.json + trace_summary.md)")
+    parser.add_argument("--log-filter", help="Filter logcat di sisi device, contoh: \"OkHttp:D *:S\" (default: semua tag)")
+    parser.add_argument("--log-regex", help="Prefilter logcat --regex di sisi device (Android 7+)")
+    parser.add_argument("--probe-timeout", type=float, default=0.0, help="Batas waktu default (detik) untuk JIKA/Pastikan/Wajib tanpa 'DALAM n detik'")
+    parser.add_argument("--sample-interval", type=float, default=0.0,
+                        help="Sampling CPU/memori/frame app tiap n detik (resources.json + tabel di Saga). 0 = nonaktif")
+    parser.add_argument("--leak-threshold", type=float, default=0.0,
+                        help="Cek memory leak di ULANGI: batas pertumbuhan PSS/Java heap per iterasi (KB). 0 = nonaktif")
+    parser.add_argument("--leak-gc", action="store_true", help="Paksa GC (kill -10) sebelum tiap pengukuran leak")
+    parser.add_argument("--leak-fail", action="store_true", help="Indikasi leak membuat skenario FAIL (default: hanya ditandai)")
+    parser.add_argument("--startup-budget", type=int, help="Budget median waktu buka app (ms) untuk UKUR tanpa 'BATAS n ms'")
+    parser.add_argument("--jank-all", action="store_true", help="Ukur frame/jank di semua step (default: hanya step Gulir)")
+    parser.add_argument("--record", nargs="?", const="", metavar="DIR",
+                        help="Rekam jawaban device per step untuk replay tanpa HP (default: <output>/recording)")
+    parser.add_argument("--replay", metavar="DIR", help="Jalankan ulang dari folder rekaman --record, tanpa device")
+    parser.add_argument("--keep-runs", type=int, default=0, metavar="N",
+                        help="Setelah run, simpan hanya N run terbaru per skenario (default: simpan semua)")
+    parser.add_argument("--saga-chunk", type=int, default=0, metavar="N",
+                        help="Pecah laporan Word per N step (..._part01.docx, ...) agar memori tetap kecil di run panjang")
+    parser.add_argument("--mermaid-ink", action="store_true", help="Render flowchart juga lewat mermaid.ink (default: lokal saja, tanpa network)")
+    parser.add_argument("--visual", action="store_true", help="Bandingkan screenshot tiap step dengan baseline (visual regression)")
+    parser.add_argument("--update-baseline", action="store_true", help="Jadikan screenshot run ini baseline baru (dengan --visual)")
+    parser.add_argument("--baseline-dir", default="baselines", help="Folder baseline visual (per skenario & step)")
+    parser.add_argument("--visual-max-diff", type=float, default=0.5, help="Batas %% pixel berubah sebelum step dianggap gagal")
+    parser.add_argument("--on-crash", choices=["abort", "recover", "ignore"], default="abort",
+                        help="Saat app crash/ANR: stop run, buka ulang app & lompat ke fitur berikutnya, atau abaikan")
 
 def main():
     # [FIX 1] Real-time Logging (Anti-Macet di Linux/Streamlit)
     sys.stdout.reconfigure(line_buffering=True)
-    
+
+    # Mode Suite: heimdall suite <dir>
+    if len(sys.argv) > 1 and sys.argv[1] == "suite":
+        from core.suite_runner import run_suite_cli
+        sys.exit(run_suite_cli(sys.argv[2:]))
+
+    # Mode Visual: heimdall visual <run-dir> (bandingkan screenshot dengan baseline, paralel)
+    if len(sys.argv) > 1 and sys.argv[1] == "visual":
+        from core.visual_diff import run_visual_cli
+        sys.exit(run_visual_cli(sys.argv[2:]))
+
+    # Mode GC: heimdall gc --keep 20 / --days 30 (retensi run + hapus blob yatim)
+    if len(sys.argv) > 1 and sys.argv[1] == "gc":
+        from core.artifact_store import run_gc_cli
+        sys.exit(run_gc_cli(sys.argv[2:]))
+
+    # Mode Report: heimdall report <run-dir> (bangun ulang laporan tanpa device)
+    if len(sys.argv) > 1 and sys.argv[1] == "report":
+        from reporters.regenerate import run_report_cli
+        sys.exit(run_report_cli(sys.argv[2:]))
+
     parser = argparse.ArgumentParser()
     parser.add_argument("file", help="Path to .heim file")
+    parser.add_argument("--serial", help="Serial device target (default: device pertama)")
+    add_run_arguments(parser)
     args = parser.parse_args()
 
-    scenario_name = os.path.splitext(os.path.basename(args.file))[0]
-    output_dir = os.path.join("reports", scenario_name)
+    run_scenario(args.file, args, device_serial=args.serial)
+
+def run_scenario(file_path, options, device_serial=None, output_dir=None):
+    """Jalankan 1 skenario di 1 device. Return ringkasan hasil (dipakai suite runner)."""
+    reset_context()
+    ctx["probe_timeout"] = options.probe_timeout
+    ctx["on_crash"] = options.on_crash
+    ctx["startup_budget"] = options.startup_budget
+    ctx["jank_all"] = options.jank_all
+    TRACER.reset(enabled=options.trace)
+    started = time.time()
+
+    scenario_name = os.path.splitext(os.path.basename(file_path))[0]
+    # Retensi (--keep-runs) hanya untuk folder run milik sendiri; suite merapikan setelah semua worker selesai
+    own_run_dir = output_dir is None
+    if output_dir is None:
+        # 1 folder per run (reports/<skenario>/<waktu>/), LATEST menunjuk run terbaru
+        output_dir = new_run_dir(os.path.join("reports", scenario_name))
+        mark_latest(output_dir)
     ctx["ss_dir"] = os.path.join(output_dir, "screenshots")
     if not os.path.exists(ctx["ss_dir"]): os.makedirs(ctx["ss_dir"])
 
     print(f"🛡️ HEIMDALL STARTING: {scenario_name}")
+    ctx["events"] = RunEventLog(output_dir)
+    ctx["events"].emit({
+        "kind": "run_start", "scenario": scenario_name, "file": file_path,
+        "serial": device_serial, "output_dir": output_dir, "options": vars(options)
+    })
     
-    ctx["driver"] = HeimdallDriver()
+    if options.replay:
+        ctx["driver"] = ReplayDriver(
+            options.replay,
+            wait_profiles=UiStabilizer.load_profiles(options.wait_config),
+            adaptive_wait=not options.fixed_sleep
+        )
+    else:
+        ctx["driver"] = HeimdallDriver(
+            device_serial,
+            wait_profiles=UiStabilizer.load_profiles(options.wait_config),
+            adaptive_wait=not options.fixed_sleep
+        )
+        if options.record is not None:
+            ctx["driver"].start_recording(options.record or os.path.join(output_dir, "recording"))
+    # Template gambar (Ketuk gambar "x.png") dicari di folder skenario lalu templates/
+    ctx["driver"].template_dirs = [os.path.dirname(os.path.abspath(file_path))]
     ctx["parser"] = HeimdallParser(ctx["driver"])
+    ctx["compiler"] = ScenarioCompiler()
     ctx["state"] = StateManager()
-    ctx["mapper"] = MapBuilder(scenario_name, output_dir)
-    ctx["saga"] = SagaWriter(scenario_name, output_dir)
-    ctx["sniffer"] = LogSniffer()
+    ctx["mapper"] = MapBuilder(scenario_name, output_dir, remote=options.mermaid_ink)
+    ctx["saga"] = SagaWriter(scenario_name, output_dir, chunk_size=options.saga_chunk)
+    # report.html ditulis per step: bisa dibuka selama run berjalan & tetap ada walau run mati
+    ctx["html"] = HtmlReport(scenario_name, output_dir)
+    ctx["report"] = ReportPipeline([ctx["saga"], ctx["mapper"], ctx["html"]])
+    if options.replay:
+        ctx["sniffer"] = ReplaySniffer(ctx["driver"].d)
+    else:
+        ctx["sniffer"] = LogSniffer(
+            device_serial,
+            filterspecs=options.log_filter.split() if options.log_filter else None,
+            regex=options.log_regex
+        )
+        ctx["sniffer"].recorder = ctx["driver"].recorder
     ctx["sniffer"].start()
+    ctx["log_window_start"] = time.time()
+    if options.replay and (options.sample_interval > 0 or options.leak_threshold > 0):
+        # Sampler & leak check membaca device langsung lewat adb -> tidak ada di rekaman
+        print("  ⚠️ [Replay] --sample-interval / --leak-threshold diabaikan saat replay.")
+    elif options.sample_interval > 0:
+        ctx["sampler"] = ResourceSampler(device_serial, interval=options.sample_interval)
+        ctx["sampler"].start()
+    if options.leak_threshold > 0 and not options.replay:
+        ctx["leak"] = LeakDetector(device_serial, threshold_kb=options.leak_threshold, force_gc=options.leak_gc)
+        ctx["leak_fail"] = options.leak_fail
+    if options.visual:
+        from core.visual_diff import VisualChecker
+        ctx["visual"] = VisualChecker(scenario_name, options.baseline_dir, max_diff_pct=options.visual_max_diff,
+                                      update=options.update_baseline, output_dir=output_dir)
+    if ctx["on_crash"] != "ignore":
+        # Polling probe / wait_idle langsung berhenti begitu crash terdeteksi
+        ctx["driver"].abort_event = ctx["sniffer"].crash_watcher.crash_event
 
+    status = "pass"
+    error = None
     try:
-        for step in ctx["parser"].parse_file(args.file):
+        if options.no_cache:
+            plan = ctx["compiler"].compile_file(file_path)
+        else:
+            plan = ctx["compiler"].load(file_path)
+        for step in plan["steps"]:
             process_step(step)
-        ctx["mapper"].add_step("Selesai", "end")
+        publish({"kind": "node", "label": "Selesai", "step_type": "end"})
     except Exception as e:
         print(f"⛔ CRITICAL STOP: {e}")
-        ctx["mapper"].add_step("STOP (Critical Error)", step_type="error")
+        publish({"kind": "node", "label": "STOP (Critical Error)", "step_type": "error"})
+        status = "critical"
+        error = str(e)
     finally:
         ctx["sniffer"].stop()
+        ctx["sniffer"].print_stats()
+        ctx["sniffer"].metrics.print_summary()
+        ctx["events"].emit({"kind": "sniffer_stats", **ctx["sniffer"].stats()})
+        publish({"kind": "api_metrics", "rows": ctx["sniffer"].get_api_metrics()})
+        if ctx["sampler"]:
+            ctx["sampler"].stop()
+            ctx["sampler"].print_summary()
+            ctx["sampler"].write_timeline(output_dir)
+            publish({"kind": "resource_summary", "rows": ctx["sampler"].per_step()})
+        if ctx["leak"]: ctx["leak"].close()
+        if ctx["visual"]: ctx["visual"].save_index()
+        ctx["driver"].stabilizer.print_summary()
+        ctx["driver"].print_probe_summary()
+        ctx["events"].emit({"kind": "probe_stats", "stats": ctx["driver"].probe_stats})
+        ctx["driver"].stop_driver()
+        # Device sudah bebas; tinggal tunggu laporan di background selesai
+        ctx["report"].close()
         ctx["saga"].save()
         ctx["mapper"].render_map()
-        ctx["driver"].stop_driver()
+        if status == "pass" and ctx["failed_steps"]:
+            status = "fail"
+        run_end = {
+            "kind": "run_end", "status": status, "error": error, "steps": ctx["step_count"],
+            "failed_steps": ctx["failed_steps"], "duration": round(time.time() - started, 2)
+        }
+        ctx["events"].emit(run_end)
+        ctx["html"].finish(run_end)
+        ctx["events"].close()
+        write_summary(output_dir, build_summary(load_events(output_dir)))
+        if TRACER.enabled:
+            export_trace(output_dir)
+        store_artifacts(output_dir, scenario_name, options.keep_runs if own_run_dir else 0)
         print("=== HEIMDALL SESSION ENDED ===")
 
+    return {
+        "scenario": scenario_name,
+        "file": file_path,
+        "serial": device_serial,
+        "status": status,
+        "error": error,
+        "steps": ctx["step_count"],
+        "failed_steps": ctx["failed_steps"],
+        "duration": round(time.time() - started, 2),
+        "output_dir": output_dir,
+    }
+
+def store_artifacts(output_dir, scenario_name, keep_runs=0):
+    """Screenshot & gambar run ini -> artifact store (dedup antar step & antar run), lalu retensi."""
+    try:
+        store = ArtifactStore()
+        store.ingest_run(output_dir, scenario_name)
+        store.print_summary()
+        if keep_runs:
+            # Hanya run lama skenario ini (reports/<skenario>/), skenario lain tidak disentuh
+            result = store.gc(keep=keep_runs, scope=os.path.dirname(os.path.normpath(output_dir)))
+            if result["runs_removed"]:
+                print(f"  🗑️ [Store] {len(result['runs_removed'])} run lama dihapus, {result['blobs_removed']} blob dibebaskan")
+    except Exception as e:
+        print(f"  ⚠️ [Store] Gagal menyimpan artefak: {e}")
+
+def export_trace(output_dir):
+    trace_path = os.path.join(output_dir, "trace.json")
+    TRACER.export_chrome(trace_path)
+    lines = TRACER.write_summary(os.path.join(output_dir, "trace_summary.md"))
+    print(f"  🔬 [Trace] Chrome trace: {trace_path} (buka di chrome://tracing)")
+    print("\n".join(lines))
+
+def publish(event):
+    """Catat event ke events.jsonl (sinkron, tahan crash) lalu kirim ke pipeline laporan."""
+    with TRACER.span("publish", "reporting"):
+        ctx["events"].emit(event)
+        ctx["report"].emit(event)
+
+def report_step(narrative, screenshot, logs, map_label, map_type, status="pass", error=None, crash=None):
+    """Kirim hasil step ke pipeline laporan (Saga + Flowchart dibangun di background)."""
+    current = ctx["current_step"]
+    publish({
+        "kind": "step", "step": ctx["step_count"], "narrative": narrative,
+        "activity": ctx["activity"], "screenshot": screenshot, "logs": logs,
+        "map_label": map_label, "map_type": map_type,
+        "cmd": current.get("cmd"), "args": current.get("args"),
+        "status": status, "failure_class": type(error).__name__ if error else None,
+        "error": str(error) if error else None,
+        "duration": round(time.time() - current.get("started", time.time()), 3),
+        "crash": crash,
+        "startup": current.get("startup"),
+        "frames": current.get("frames"),
+        "visual": current.get("visual"),
+    })
+
+class AppCrashError(RuntimeError):
+    """App target crash/ANR di tengah step (abort = CRITICAL, recover = soft fail)."""
+    def __init__(self, crash, fatal):
+        prefix = "CRITICAL APP CRASH" if fatal else "APP CRASH"
+        super().__init__(f"{prefix}: {crash['type'].upper()} {crash['package']} - {crash['summary'] or '-'}")
+        self.crash = crash
+        self.fatal = fatal
+
+def check_crash():
+    """Cek CrashWatcher; lempar AppCrashError jika app target crash/ANR (kecuali --on-crash ignore)."""
+    crash = ctx["sniffer"].pop_crash()
+    if crash is None:
+        return
+    ctx["events"].emit({"kind": "crash", "step": ctx["step_count"], "action": ctx["on_crash"], **crash})
+    if ctx["on_crash"] == "ignore":
+        print(f"  ⚠️ [Crash] {crash['type'].upper()} {crash['package']} diabaikan (--on-crash ignore).")
+        return
+    raise AppCrashError(crash, fatal=ctx["on_crash"] == "abort")
+
+def recover_app():
+    """Buka ulang app setelah crash, sisa step di fitur ini dilewati."""
+    package = ctx["app_package"]
+    print(f"  🔁 [Crash] Recover: membuka ulang {package}, lompat ke fitur berikutnya...")
+    ctx["skip_to_feature"] = True
+    if not package: return
+    try: ctx["driver"].open_app(package)
+    except Exception as e: print(f"  ⚠️ [Crash] Gagal membuka ulang app: {e}")
+
+def report_leak(result):
+    """Tampilkan & publish hasil cek leak 1 blok ULANGI."""
+    if result["leak"] is None:
+        print(f"  🧪 [Leak] {result['label']}: dilewati ({result.get('note')}).")
+    else:
+        icon = "🚨" if result["leak"] else "✅"
+        print(f"  {icon} [Leak] {result['label']}: PSS {result['slope_pss_kb']:+} KB/iterasi, "
+              f"Java heap {result['slope_java_kb']} KB/iterasi (batas {result['threshold_kb']:g} KB)")
+    if result["leak"] and ctx["leak_fail"]:
+        ctx["failed_steps"] += 1
+    publish({"kind": "leak_check", "step": ctx["step_count"], "fail": bool(result["leak"] and ctx["leak_fail"]), **result})
+
 def process_step(step):
     if step.get('type') == 'feature':
         print(f"\n--- [Feature: {step['name']}] ---")
-        ctx["mapper"].set_feature(step['name'])
+        ctx["skip_to_feature"] = False
+        publish({"kind": "feature", "name": step['name']})
+        return
+
+    if ctx["skip_to_feature"]:
+        print(f"  ⏭️ [Crash] Dilewati: {step.get('desc') or step.get('type')}")
+        return
+
+    if step.get('type') == 'loop':
+        # Ukur memori di setiap batas iterasi (hanya jika --leak-threshold & app sudah dibuka)
+        leak = ctx["leak"] if ctx["app_package"] else None
+        memory = [leak.measure(ctx["app_package"])] if leak else None
+        # Flowchart melipat seluruh iterasi jadi 1 node loop
+        publish({"kind": "loop_start", "var": step['var'], "count": len(step['items'])})
+        try:
+            for item in step['items']:
+                print(f"--- 🔄 Iteration: {item} ---")
+                publish({"kind": "iteration", "var": step['var'], "item": item})
+                for sub_step in bind_steps(step['body'], step['var'], item):
+                    process_step(sub_step)
+                if leak: memory.append(leak.measure(ctx["app_package"]))
+        finally:
+            publish({"kind": "loop_end", "var": step['var']})
+        if leak:
+            report_leak(leak.evaluate(f"ULANGI {step['var']}", memory))
         return
 
     if step.get('type') == 'conditional':
         raw_cond = step['condition']
         target = ctx["state"].resolve_text(raw_cond)
         
-        ctx["mapper"].add_step(f"Muncul '{target}'?", step_type="logic")
+        publish({"kind": "node", "label": f"Muncul '{target}'?", "step_type": "logic"})
         print(f"  ❓ [Logic] Mengecek kondisi: '{target}'...")
         is_visible = False
+        timeout = step.get('timeout')
+        if timeout is None: timeout = ctx["probe_timeout"]
         try:
-            if ctx["driver"].d(textContains=target).exists: is_visible = True
+            is_visible = ctx["driver"].probe([{"textContains": target}], timeout, name="condition") is not None
         except: pass
 
+        ctx["events"].emit({"kind": "condition", "target": target, "result": is_visible})
         if is_visible:
             print(f"  ✅ [Logic] TRUE.")
-            for sub_step in ctx["parser"].parse_lines(step['body'], "Conditional Block"):
+            body = step['body']
+            # Body dari compiler sudah berupa step; body string = format parser lama
+            if body and isinstance(body[0], str):
+                body = ctx["parser"].parse_lines(body, "Conditional Block")
+            for sub_step in body:
                 process_step(sub_step)
         else:
             print(f"  ⏩ [Logic] FALSE.")
         return
 
     ctx["step_count"] += 1
+    ctx["driver"].set_step(ctx["step_count"])
+    if ctx["sampler"]: ctx["sampler"].set_step(ctx["step_count"])
     resolved_args = []
     if 'args' in step:
         for arg in step['args']:
@@ -88,16 +396,102 @@ def process_step(step):
     raw_target = str(resolved_args[0]) if resolved_args else ""
     narrative = HeimdallStoryteller.generate_narrative(step['cmd'], raw_target)
     print(f"[Step {ctx['step_count']}]> {narrative}")
+    ctx["current_step"] = {"cmd": step['cmd'], "args": resolved_args, "started": time.time()}
+    ctx["events"].emit({
+        "kind": "step_start", "step": ctx["step_count"], "cmd": step['cmd'],
+        "raw_args": step.get('args', []), "args": resolved_args, "narrative": narrative,
+        "feature": step.get('feature'), "desc": step.get('desc')
+    })
+
+    TRACER.set_step(ctx["step_count"])
+    with TRACER.span(f"Step {ctx['step_count']}: {narrative}", "step"):
+        execute_action(step, resolved_args, narrative)
 
-    time.sleep(0.5)
+def step_logs():
+    """
+    Log API step ini. Jendela waktu bersambung (mulai dari akhir jendela step sebelumnya),
+    jadi request di sela step (laporan, JIKA, loop, telat logcat) masuk ke step berikutnya, tidak hilang.
+    """
+    end = time.time()
+    logs = ctx["sniffer"].get_logs_between(ctx["log_window_start"], end)
+    ctx["log_window_start"] = end
+    return logs
+
+def probe_text_or_id(step, target, name):
+    """Assertion: teks (contains) ATAU resourceId, dari 1x baca hierarki per polling."""
+    timeout = step.get('timeout')
+    if timeout is None: timeout = ctx["probe_timeout"]
+    candidates = [{"textContains": target}, {"resourceId": target}]
+    return ctx["driver"].probe(candidates, timeout, name=name) is not None
+
+def measure_startup(step, package):
+    """UKUR waktu buka aplikasi: hasil ikut step event, gagal (soft) jika median > budget."""
+    # force-stop berulang bukan crash -> crash watcher dimatikan sementara
+    ctx["sniffer"].watch_package(None)
+    try:
+        result = StartupMeter(ctx["driver"]).measure(package, step.get("runs", 5), step.get("mode", "dingin"))
+    finally:
+        # Gagal mengukur pun crash watcher harus aktif lagi untuk sisa run
+        ctx["app_package"] = package
+        ctx["sniffer"].watch_package(package)
+        if ctx["sampler"]: ctx["sampler"].set_package(package)
+    result["budget_ms"] = step.get("budget_ms") or ctx["startup_budget"]
+    ctx["current_step"]["startup"] = result
+
+    print(f"  ⏱️ [Startup] min {result['min_ms']}ms, median {result['median_ms']}ms, p95 {result['p95_ms']}ms")
+    if result["median_ms"] is None:
+        raise Exception(f"Startup '{package}' gagal diukur")
+    if result["mismatched"]:
+        print(f"  ⚠️ [Startup] {result['mismatched']}x LaunchState tidak sesuai mode {result['mode']}.")
+    if result["budget_ms"] and result["median_ms"] > result["budget_ms"]:
+        raise Exception(f"Startup '{package}' median {result['median_ms']}ms melebihi budget {result['budget_ms']}ms")
+
+def check_jank(step, package):
+    """Baca frame stats setelah gesture; MAKS JANK n% = assertion (soft fail)."""
+    frames = FrameMeter(ctx["driver"]).read(package)
+    if not frames: return
+    ctx["current_step"]["frames"] = frames
+    print(f"  🎞️ [Jank] {frames['total_frames']} frame, janky {frames['janky_pct']}% "
+          f"(p90 {frames.get('p90_ms')}ms, p95 {frames.get('p95_ms')}ms, p99 {frames.get('p99_ms')}ms)")
+    limit = step.get('max_jank')
+    if limit is not None and frames["total_frames"] and frames["janky_pct"] > limit:
+        raise Exception(f"Jank {frames['janky_pct']}% melebihi batas {limit:g}% ({frames['janky_frames']}/{frames['total_frames']} frame)")
+
+def check_visual(ss_path):
+    """Visual regression screenshot step terhadap baseline (soft fail jika melebihi batas)."""
+    result = ctx["visual"].check(ctx["step_count"], ss_path)
+    ctx["current_step"]["visual"] = result
+    if result["status"] == "baseline":
+        print(f"  🖼️ [Visual] Baseline disimpan: {result['baseline']}")
+    elif result["status"] in ("fail", "error"):
+        detail = result.get("error") or f"{result['diff_pct']}% pixel berubah (batas {result['max_diff_pct']:g}%)"
+        raise Exception(f"Visual regression: {detail}")
+    else:
+        print(f"  🖼️ [Visual] {result['status'].upper()} (diff {result['diff_pct']}%, {result['ms']}ms)")
+
+def execute_action(step, resolved_args, narrative):
+    ctx["driver"].stabilizer.wait_idle("pre_step")
+    # Frame stats direset tepat sebelum gesture agar angka murni milik step ini
+    jank_package = ctx["app_package"] if (step['cmd'] == "scroll" or ctx["jank_all"]) else None
+    if step.get('max_jank') is not None and not jank_package:
+        # Assertion jank tanpa 'Buka aplikasi' sebelumnya: pakai app yang sedang tampil
+        try: jank_package = ctx["driver"].d.app_current()['package']
+        except Exception: pass
+    if jank_package:
+        FrameMeter(ctx["driver"]).reset(jank_package)
 
     try:
         cmd = step['cmd']
         driver = ctx["driver"]
+        # Crash yang baru terbaca setelah step sebelumnya selesai
+        check_crash()
         
         # --- EKSEKUSI ---
         if cmd == "open_app": 
-            driver.d.app_start(resolved_args[0])
+            driver.open_app(resolved_args[0])
+            ctx["app_package"] = resolved_args[0]
+            ctx["sniffer"].watch_package(resolved_args[0])
+            if ctx["sampler"]: ctx["sampler"].set_package(resolved_args[0])
         elif cmd == "input_text": 
             driver.input_text_on_field(resolved_args[0], resolved_args[1])
         elif cmd == "click":
@@ -106,6 +500,8 @@ def process_step(step):
                 driver.find_element_robust("FAB").click()
             else: 
                 driver.tap_element(resolved_args[0])
+        elif cmd == "tap_image":
+            driver.tap_image(resolved_args[0], resolved_args[1] if len(resolved_args) > 1 else None)
                 
         elif cmd == "wait": 
             driver.find_element_robust(resolved_args[0])
@@ -114,60 +510,74 @@ def process_step(step):
         elif cmd == "save_text":
             text = driver.get_text_from_element(resolved_args[0])
             ctx["state"].set_variable(resolved_args[1], text)
+        elif cmd == "measure_startup":
+            measure_startup(step, resolved_args[0])
         elif cmd == "press_key":
             key = str(resolved_args[0]).lower()
-            if key == "back": driver.d.press("back")
-            elif key == "home": driver.d.press("home")
-            elif key == "enter": driver.d.press("enter")
-            else: driver.d.press(key)
+            driver.press_key(key)
 
         # --- [FIX 3] DYNAMIC ASSERTION LOGIC ---
         
         # A. SOFT ASSERTION (Keyword: PASTIKAN) -> Lanjut
         elif cmd == "assert" or cmd == "assert_soft": 
-            if not driver.d(textContains=resolved_args[0]).exists and \
-               not driver.d(resourceId=resolved_args[0]).exists:
+            if not probe_text_or_id(step, resolved_args[0], "assert_soft"):
                  # Raise biasa akan ditangkap sebagai Soft Fail
                  raise Exception(f"Check Failed: '{resolved_args[0]}' tidak ditemukan")
         
         # B. HARD ASSERTION (Keyword: WAJIB) -> STOP
         elif cmd == "assert_hard":
-             if not driver.d(textContains=resolved_args[0]).exists and \
-               not driver.d(resourceId=resolved_args[0]).exists:
+             if not probe_text_or_id(step, resolved_args[0], "assert_hard"):
                  # Raise RuntimeError Khusus untuk mematikan program
                  raise RuntimeError(f"CRITICAL CHECK FAILED: '{resolved_args[0]}' WAJIB ADA!")
 
         # --- SUKSES ---
-        time.sleep(1.5)
+        driver.stabilizer.wait_idle("post_step")
+        check_crash()
+        if jank_package: check_jank(step, jank_package)
         next_act = driver.get_current_activity()
         ss_path = os.path.join(ctx["ss_dir"], f"step_{ctx['step_count']}.png")
         driver.take_screenshot(ss_path)
-        logs = ctx["sniffer"].get_recent_logs()
+        if ctx["visual"]: check_visual(ss_path)
+        logs = step_logs()
         
-        ctx["saga"].add_step(ctx["step_count"], narrative, ctx["activity"], ss_path, logs)
+        report_step(narrative, ss_path, logs, narrative, "action")
         ctx["state"].update_activity(next_act)
         ctx["activity"] = next_act
-        ctx["mapper"].add_step(narrative, step_type="action")
 
     except Exception as e:
         # [FIX 3] ERROR HANDLING
-        
-        # Jika Hard Assert (Critical), Lempar ke atas agar program MATI
-        if isinstance(e, RuntimeError) and "CRITICAL" in str(e):
+        if not isinstance(e, AppCrashError):
+            # Error aksi (elemen hilang, dsb.) sering akibat app crash di tengah step:
+            # crash-nya milik step ini (stack + keputusan abort/recover), bukan step berikutnya
+            try:
+                check_crash()
+            except AppCrashError as crash_error:
+                print(f"  ⚠️ [Crash] {e} -> app crash di step ini")
+                e = crash_error
+        crash = getattr(e, "crash", None)
+        logs = step_logs()
+
+        # Jika Hard Assert (Critical) / crash mode abort, Lempar ke atas agar program MATI.
+        # Crash dicek dari atributnya: pesan crash berasal dari logcat dan bisa berisi apa saja
+        if isinstance(e, AppCrashError):
+            fatal = e.fatal
+        else:
+            fatal = isinstance(e, RuntimeError) and str(e).startswith("CRITICAL CHECK FAILED")
+        if fatal:
             err_path = os.path.join(ctx["ss_dir"], f"FATAL_ERROR_{ctx['step_count']}.png")
             ctx["driver"].take_screenshot(err_path)
-            ctx["saga"].add_step(ctx["step_count"], f"[FATAL] {narrative}", ctx["activity"], err_path, [{"status": "FATAL", "msg": str(e)}])
-            ctx["mapper"].add_step("FATAL STOP", step_type="danger")
+            report_step(f"[FATAL] {narrative}", err_path, logs or [{"status": "FATAL", "msg": str(e)}], "FATAL STOP", "danger", "fatal", e, crash)
             raise e 
             
         # Jika Soft Assert / Error Biasa, LANJUT
         print(f"⚠️ SOFT FAIL: {e}")
+        ctx["failed_steps"] += 1
         err_path = os.path.join(ctx["ss_dir"], f"error_step_{ctx['step_count']}.png")
         ctx["driver"].take_screenshot(err_path)
         
         fail_narrative = f"[FAILED] {narrative}"
-        ctx["saga"].add_step(ctx["step_count"], fail_narrative, ctx["activity"], err_path, [{"status": "ERROR", "msg": str(e)}])
-        ctx["mapper"].add_step(narrative, step_type="error")
+        report_step(fail_narrative, err_path, logs or [{"status": "ERROR", "msg": str(e)}], narrative, "error", "fail", e, crash)
+        if crash: recover_app()
         pass # Lanjut ke step berikutnya
 
 if __name__ == "__main__":
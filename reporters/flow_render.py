@@ -0,0 +1,329 @@
+import os
+import shutil
+import textwrap
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Naikkan jika tampilan berubah -> cache lama otomatis tidak dipakai
+RENDER_VERSION = 1
+
+# Batas ukuran cache render (LRU per hash graph)
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Warna sama dengan classDef Mermaid di MapBuilder
+STYLES = {
+    "success": {"fill": "#e1f5fe", "stroke": "#0277bd", "text": "#01579b", "width": 2, "dash": False},
+    "logic": {"fill": "#fff9c4", "stroke": "#fbc02d", "text": "#ef6c00", "width": 3, "dash": True},
+    "danger": {"fill": "#ffebee", "stroke": "#c62828", "text": "#b71c1c", "width": 2, "dash": False},
+    "startNode": {"fill": "#c8e6c9", "stroke": "#2e7d32", "text": "#1b5e20", "width": 2, "dash": False},
+    "endNode": {"fill": "#ffcdd2", "stroke": "#c62828", "text": "#b71c1c", "width": 2, "dash": False},
+    "loop": {"fill": "#ede7f6", "stroke": "#5e35b1", "text": "#311b92", "width": 2, "dash": False},
+}
+CLUSTER_COLORS = [
+    {"fill": "#f1f8e9", "stroke": "#558b2f", "text": "#33691e"},
+    {"fill": "#f3e5f5", "stroke": "#8e24aa", "text": "#4a148c"},
+    {"fill": "#fffde7", "stroke": "#fbc02d", "text": "#f57f17"},
+    {"fill": "#eceff1", "stroke": "#546e7a", "text": "#263238"},
+]
+EDGE_COLOR = "#546e7a"
+
+FONT_SIZE = 13
+LINE_H = 17
+CHAR_W = 7.2
+MAX_CHARS = 30
+MAX_LINES = 4
+GAP_X, GAP_Y = 28, 44
+PAD, TITLE_H, MARGIN, LANE = 18, 28, 24, 14
+
+
+# ==========================================
+# LAYOUT (DIPAKAI BERSAMA SVG & PNG)
+# ==========================================
+def _wrap(label):
+    lines = textwrap.wrap(label, MAX_CHARS) or [""]
+    if len(lines) > MAX_LINES:
+        lines = lines[:MAX_LINES]
+        lines[-1] = lines[-1][:MAX_CHARS - 1] + "…"
+    return lines
+
+
+def _size(node, lines):
+    text_w = max(len(line) for line in lines) * CHAR_W
+    text_h = len(lines) * LINE_H
+    if node["shape"] == "circle":
+        d = max(text_w + 24, text_h + 24, 56)
+        return d, d
+    if node["shape"] == "diamond":
+        return text_w + 60, text_h + 40
+    return max(text_w + 24, 80), text_h + 18
+
+
+def layout(nodes, edges, clusters):
+    """
+    Layout top-down: rank = jalur terpanjang lewat edge maju (urutan node = urutan eksekusi),
+    cluster (fitur) ditumpuk vertikal, node dengan rank sama di 1 cluster berjajar.
+    Edge mundur (loop ULANGI) lewat jalur di kanan.
+    """
+    order = {n["id"]: i for i, n in enumerate(nodes)}
+    edges = [e for e in edges if e["from"] in order and e["to"] in order]
+    forward = sorted((e for e in edges if order[e["from"]] < order[e["to"]]), key=lambda e: order[e["to"]])
+    rank = {nid: 0 for nid in order}
+    for e in forward:
+        rank[e["to"]] = max(rank[e["to"]], rank[e["from"]] + 1)
+
+    # Node di luar cluster -> cluster tanpa judul
+    groups, seen = [], set()
+    for feature, ids in list(clusters.items()) + [(None, [n["id"] for n in nodes])]:
+        ids = [nid for nid in ids if nid in order and nid not in seen]
+        seen.update(ids)
+        if ids: groups.append((feature, ids))
+
+    boxes = {}
+    for n in nodes:
+        lines = _wrap(n["label"])
+        w, h = _size(n, lines)
+        boxes[n["id"]] = {"node": n, "lines": lines, "w": w, "h": h}
+
+    # Ukur baris per cluster
+    measured = []
+    for feature, ids in groups:
+        rows = {}
+        for nid in ids:
+            rows.setdefault(rank[nid], []).append(nid)
+        rows = [rows[r] for r in sorted(rows)]
+        width = max(sum(boxes[i]["w"] for i in row) + GAP_X * (len(row) - 1) for row in rows)
+        if feature: width = max(width, len(feature) * CHAR_W + 40)
+        measured.append((feature, rows, width))
+
+    inner_w = max(w for _, _, w in measured) + 2 * PAD
+
+    clusters_out, y = [], MARGIN
+    for idx, (feature, rows, _) in enumerate(measured):
+        top = y
+        y += TITLE_H if feature else PAD
+        for row in rows:
+            row_w = sum(boxes[i]["w"] for i in row) + GAP_X * (len(row) - 1)
+            row_h = max(boxes[i]["h"] for i in row)
+            x = MARGIN + (inner_w - row_w) / 2
+            for nid in row:
+                b = boxes[nid]
+                b["x"], b["y"] = x, y + (row_h - b["h"]) / 2
+                x += b["w"] + GAP_X
+            y += row_h + GAP_Y
+        y += PAD - GAP_Y
+        clusters_out.append({"title": feature, "x": MARGIN, "y": top, "w": inner_w, "h": y - top,
+                             "color": CLUSTER_COLORS[idx % len(CLUSTER_COLORS)]})
+        y += GAP_Y / 2
+
+    # Edge: titik-titik polyline + posisi label
+    lane_x = MARGIN + inner_w + LANE
+    edges_out = []
+    for e in edges:
+        a, b = boxes[e["from"]], boxes[e["to"]]
+        ax, bx = a["x"] + a["w"] / 2, b["x"] + b["w"] / 2
+        if b["y"] > a["y"] + a["h"]:
+            sy, ty = a["y"] + a["h"], b["y"]
+            if abs(ax - bx) < 1:
+                points = [(ax, sy), (bx, ty)]
+            else:
+                mid = ty - GAP_Y / 2
+                points = [(ax, sy), (ax, mid), (bx, mid), (bx, ty)]
+        elif a is b:
+            # Loop terlipat: panah kecil keluar & masuk sisi kanan node itu sendiri
+            x, top, bottom = a["x"] + a["w"], a["y"] + a["h"] * 0.25, a["y"] + a["h"] * 0.75
+            points = [(x, bottom), (x + LANE * 1.5, bottom), (x + LANE * 1.5, top), (x, top)]
+            lane_x = max(lane_x, x + LANE * 2.5)
+        else:
+            # Mundur / ke atas: keluar kanan, naik di jalur sendiri, masuk kanan
+            x = lane_x
+            lane_x += LANE
+            points = [(a["x"] + a["w"], a["y"] + a["h"] / 2), (x, a["y"] + a["h"] / 2),
+                      (x, b["y"] + b["h"] / 2), (b["x"] + b["w"], b["y"] + b["h"] / 2)]
+        segment = max(zip(points, points[1:]), key=lambda s: abs(s[0][0] - s[1][0]) + abs(s[0][1] - s[1][1]))
+        label_at = ((segment[0][0] + segment[1][0]) / 2, (segment[0][1] + segment[1][1]) / 2)
+        edges_out.append({"points": points, "label": e.get("label") or "", "label_at": label_at})
+
+    width = max(lane_x, MARGIN + inner_w) + MARGIN
+    return {"width": int(width), "height": int(y - GAP_Y / 2 + MARGIN), "boxes": list(boxes.values()),
+            "clusters": clusters_out, "edges": edges_out}
+
+
+# ==========================================
+# SVG
+# ==========================================
+def to_svg(g):
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{g["width"]}" height="{g["height"]}" '
+           f'viewBox="0 0 {g["width"]} {g["height"]}" font-family="Segoe UI, DejaVu Sans, sans-serif" font-size="{FONT_SIZE}">',
+           f'<defs><marker id="arrow" viewBox="0 0 10 10" refX="9" refY="5" markerWidth="7" markerHeight="7" orient="auto">'
+           f'<path d="M0,0 L10,5 L0,10 z" fill="{EDGE_COLOR}"/></marker></defs>',
+           '<rect width="100%" height="100%" fill="#ffffff"/>']
+
+    for c in g["clusters"]:
+        col = c["color"]
+        out.append(f'<rect x="{c["x"]:.1f}" y="{c["y"]:.1f}" width="{c["w"]:.1f}" height="{c["h"]:.1f}" rx="10" '
+                   f'fill="{col["fill"]}" stroke="{col["stroke"]}" stroke-width="2"/>')
+        if c["title"]:
+            out.append(f'<text x="{c["x"] + 12:.1f}" y="{c["y"] + 19:.1f}" fill="{col["text"]}" font-weight="bold">'
+                       f'📂 {escape(c["title"])}</text>')
+
+    for e in g["edges"]:
+        pts = " ".join(f"{x:.1f},{y:.1f}" for x, y in e["points"])
+        out.append(f'<polyline points="{pts}" fill="none" stroke="{EDGE_COLOR}" stroke-width="1.6" marker-end="url(#arrow)"/>')
+
+    for b in g["boxes"]:
+        s = STYLES.get(b["node"]["style"], STYLES["success"])
+        attrs = f'fill="{s["fill"]}" stroke="{s["stroke"]}" stroke-width="{s["width"]}"' + (' stroke-dasharray="5 5"' if s["dash"] else "")
+        x, y, w, h = b["x"], b["y"], b["w"], b["h"]
+        if b["node"]["shape"] == "circle":
+            out.append(f'<ellipse cx="{x + w / 2:.1f}" cy="{y + h / 2:.1f}" rx="{w / 2:.1f}" ry="{h / 2:.1f}" {attrs}/>')
+        elif b["node"]["shape"] == "diamond":
+            pts = f"{x + w / 2:.1f},{y:.1f} {x + w:.1f},{y + h / 2:.1f} {x + w / 2:.1f},{y + h:.1f} {x:.1f},{y + h / 2:.1f}"
+            out.append(f'<polygon points="{pts}" {attrs}/>')
+        else:
+            out.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{w:.1f}" height="{h:.1f}" rx="5" {attrs}/>')
+        top = y + h / 2 - len(b["lines"]) * LINE_H / 2 + LINE_H * 0.75
+        out.append(f'<text x="{x + w / 2:.1f}" y="{top:.1f}" fill="{s["text"]}" text-anchor="middle">'
+                   + "".join(f'<tspan x="{x + w / 2:.1f}" dy="{0 if i == 0 else LINE_H}">{escape(line)}</tspan>'
+                             for i, line in enumerate(b["lines"])) + "</text>")
+
+    for e in g["edges"]:
+        if not e["label"]: continue
+        x, y = e["label_at"]
+        w = len(e["label"]) * CHAR_W + 10
+        out.append(f'<rect x="{x - w / 2:.1f}" y="{y - 10:.1f}" width="{w:.1f}" height="18" rx="3" fill="#ffffff" stroke="{EDGE_COLOR}" stroke-width="0.6"/>')
+        out.append(f'<text x="{x:.1f}" y="{y + 3:.1f}" fill="#37474f" text-anchor="middle" font-size="11">{escape(e["label"])}</text>')
+
+    out.append("</svg>")
+    return "\n".join(out)
+
+
+# ==========================================
+# PNG (PILLOW, TANPA BROWSER / NETWORK)
+# ==========================================
+def _font(size):
+    for name in ("DejaVuSans.ttf", "arial.ttf", "segoeui.ttf"):
+        try: return ImageFont.truetype(name, size)
+        except OSError: pass
+    return ImageFont.load_default()
+
+
+def _ascii(text):
+    # Font bawaan tidak punya glyph emoji -> dibuang daripada jadi kotak
+    return "".join(ch for ch in text if ord(ch) < 0x2000 or ch == "…").strip()
+
+
+def _arrow(draw, p, q):
+    (x1, y1), (x2, y2) = p, q
+    dx, dy = x2 - x1, y2 - y1
+    length = max((dx * dx + dy * dy) ** 0.5, 1e-6)
+    ux, uy = dx / length * 9, dy / length * 9
+    draw.polygon([(x2, y2), (x2 - ux - uy / 2, y2 - uy + ux / 2), (x2 - ux + uy / 2, y2 - uy - ux / 2)], fill=EDGE_COLOR)
+
+
+def to_png(g, path, scale=1.5):
+    img = Image.new("RGB", (int(g["width"] * scale), int(g["height"] * scale)), "#ffffff")
+    draw = ImageDraw.Draw(img)
+    font, small, bold = _font(int(FONT_SIZE * scale)), _font(int(11 * scale)), _font(int(FONT_SIZE * scale))
+    S = lambda *v: [round(a * scale, 1) for a in v]
+
+    def text_center(cx, y, text, fill, f):
+        draw.text((cx - draw.textlength(text, font=f) / 2, y), text, fill=fill, font=f)
+
+    for c in g["clusters"]:
+        col = c["color"]
+        draw.rounded_rectangle(S(c["x"], c["y"], c["x"] + c["w"], c["y"] + c["h"]), radius=10 * scale,
+                               fill=col["fill"], outline=col["stroke"], width=int(2 * scale))
+        if c["title"]:
+            draw.text(S(c["x"] + 12, c["y"] + 6), _ascii(c["title"]), fill=col["text"], font=bold)
+
+    for e in g["edges"]:
+        pts = [tuple(S(x, y)) for x, y in e["points"]]
+        draw.line(pts, fill=EDGE_COLOR, width=max(1, int(1.6 * scale)))
+        _arrow(draw, pts[-2], pts[-1])
+
+    for b in g["boxes"]:
+        s = STYLES.get(b["node"]["style"], STYLES["success"])
+        x, y, w, h = b["x"], b["y"], b["w"], b["h"]
+        box = S(x, y, x + w, y + h)
+        style = {"fill": s["fill"], "outline": s["stroke"], "width": int(s["width"] * scale)}
+        if b["node"]["shape"] == "circle":
+            draw.ellipse(box, **style)
+        elif b["node"]["shape"] == "diamond":
+            draw.polygon([tuple(S(x + w / 2, y)), tuple(S(x + w, y + h / 2)), tuple(S(x + w / 2, y + h)), tuple(S(x, y + h / 2))], **style)
+        else:
+            draw.rounded_rectangle(box, radius=5 * scale, **style)
+        top = y + h / 2 - len(b["lines"]) * LINE_H / 2 + 2
+        for i, line in enumerate(b["lines"]):
+            text_center((x + w / 2) * scale, (top + i * LINE_H) * scale, _ascii(line), s["text"], font)
+
+    for e in g["edges"]:
+        if not e["label"]: continue
+        x, y = e["label_at"]
+        w = len(e["label"]) * CHAR_W + 10
+        draw.rounded_rectangle(S(x - w / 2, y - 10, x + w / 2, y + 8), radius=3 * scale, fill="#ffffff", outline=EDGE_COLOR)
+        text_center(x * scale, (y - 8) * scale, _ascii(e["label"]), "#37474f", small)
+
+    img.save(path, optimize=True)
+    return path
+
+
+# ==========================================
+# RENDER + CACHE
+# ==========================================
+def render_flowchart(nodes, edges, clusters, output_dir, cache_dir=None, key=None):
+    """
+    Tulis flowchart.svg & flowchart.png ke output_dir.
+    Jika cache_dir + key (hash graph) diberikan dan sudah pernah dirender, hasil cache disalin.
+    Return (svg_path, png_path, cached).
+    """
+    svg_path = os.path.join(output_dir, "flowchart.svg")
+    png_path = os.path.join(output_dir, "flowchart.png")
+    cached = [os.path.join(cache_dir, f"{key}{ext}") for ext in (".svg", ".png")] if cache_dir and key else None
+    if cached and all(os.path.exists(p) for p in cached):
+        shutil.copyfile(cached[0], svg_path)
+        shutil.copyfile(cached[1], png_path)
+        touch_cache(cached)
+        return svg_path, png_path, True
+
+    g = layout(nodes, edges, clusters)
+    with open(svg_path, "w", encoding="utf-8") as f:
+        f.write(to_svg(g))
+    to_png(g, png_path)
+
+    if cached:
+        os.makedirs(cache_dir, exist_ok=True)
+        shutil.copyfile(svg_path, cached[0])
+        shutil.copyfile(png_path, cached[1])
+        prune_cache(cache_dir)
+    return svg_path, png_path, False
+
+
+def touch_cache(paths):
+    """Tandai entry cache baru dipakai (mtime = waktu pakai terakhir untuk LRU)."""
+    for path in paths:
+        try: os.utime(path)
+        except OSError: pass
+
+
+def prune_cache(cache_dir, max_bytes=CACHE_MAX_BYTES):
+    """Hapus entry (semua file 1 hash) yang paling lama tidak dipakai sampai total <= max_bytes."""
+    entries = {}
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        try: st = os.stat(path)
+        except OSError: continue
+        entry = entries.setdefault(name.split(".")[0], {"used": 0.0, "size": 0, "paths": []})
+        entry["used"] = max(entry["used"], st.st_mtime)
+        entry["size"] += st.st_size
+        entry["paths"].append(path)
+
+    total, removed = sum(e["size"] for e in entries.values()), 0
+    for entry in sorted(entries.values(), key=lambda e: e["used"]):
+        if total <= max_bytes: break
+        for path in entry["paths"]:
+            try: os.remove(path)
+            except OSError: pass
+        total -= entry["size"]
+        removed += 1
+    return removed
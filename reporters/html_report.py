@@ -0,0 +1,183 @@
+import html
+import os
+
+from reporters.images import prepare_image
+
+HEAD = """<!DOCTYPE html>
+<html lang="id"><head><meta charset="utf-8">
+<title>Heimdall Live: {title}</title>
+<style>
+body {{ font-family: Segoe UI, Arial, sans-serif; margin: 0; background: #f5f7fa; color: #212121; }}
+header {{ position: sticky; top: 0; background: #003366; color: #fff; padding: 10px 20px; z-index: 2; }}
+header h1 {{ font-size: 18px; margin: 0 0 6px; }}
+header label, header select {{ font-size: 13px; margin-right: 10px; }}
+#counts span {{ display: inline-block; margin-right: 12px; font-size: 13px; }}
+main {{ padding: 12px 20px; }}
+h2.feature {{ font-size: 15px; color: #003366; margin: 18px 0 6px; }}
+article {{ display: flex; gap: 14px; background: #fff; border-left: 5px solid #2e7d32; border-radius: 4px; margin: 6px 0; padding: 10px; }}
+article.fail {{ border-left-color: #c62828; }} article.fatal {{ border-left-color: #6a1b9a; }}
+article img.thumb {{ width: 120px; min-height: 60px; cursor: zoom-in; border: 1px solid #ddd; }}
+article .body {{ flex: 1; min-width: 0; font-size: 13px; }}
+article .meta {{ color: #757575; font-size: 12px; }}
+.error {{ color: #b71c1c; font-weight: bold; }}
+pre {{ font-size: 11px; background: #fafafa; padding: 6px; overflow-x: auto; }}
+table {{ border-collapse: collapse; font-size: 12px; }} td, th {{ border: 1px solid #ddd; padding: 2px 6px; }}
+#overlay {{ display: none; position: fixed; inset: 0; background: rgba(0,0,0,.8); z-index: 9; text-align: center; cursor: zoom-out; }}
+#overlay img {{ max-height: 96vh; margin-top: 2vh; }}
+footer {{ padding: 14px 20px; font-weight: bold; }}
+</style>
+<script>
+// Filter status & fitur; auto-refresh selama run belum selesai (file ditulis bertahap)
+function applyFilter() {{
+  var st = document.getElementById('f-status').value, ft = document.getElementById('f-feature').value;
+  localStorage.setItem('heim-filter', JSON.stringify([st, ft]));
+  document.querySelectorAll('article').forEach(function (a) {{
+    a.style.display = (!st || a.dataset.status === st) && (!ft || a.dataset.feature === ft) ? '' : 'none';
+  }});
+}}
+function expand(img) {{
+  var o = document.getElementById('overlay');
+  o.firstChild.src = img.dataset.full; o.style.display = 'block';
+}}
+window.addEventListener('load', function () {{
+  var counts = {{}}, features = [], sel = document.getElementById('f-feature');
+  document.querySelectorAll('article').forEach(function (a) {{
+    counts[a.dataset.status] = (counts[a.dataset.status] || 0) + 1;
+    if (features.indexOf(a.dataset.feature) < 0) features.push(a.dataset.feature);
+  }});
+  features.forEach(function (f) {{ var o = document.createElement('option'); o.value = o.textContent = f; sel.appendChild(o); }});
+  document.getElementById('counts').innerHTML = Object.keys(counts).map(function (k) {{
+    return '<span>' + k.toUpperCase() + ': ' + counts[k] + '</span>'; }}).join('');
+  var saved = JSON.parse(localStorage.getItem('heim-filter') || '["", ""]');
+  document.getElementById('f-status').value = saved[0]; sel.value = saved[1]; applyFilter();
+  var live = document.getElementById('f-live');
+  live.checked = localStorage.getItem('heim-live') !== '0';
+  live.onchange = function () {{ localStorage.setItem('heim-live', live.checked ? '1' : '0'); }};
+  if (!document.getElementById('run-end')) {{
+    document.getElementById('state').textContent = '⏳ Run berjalan / terhenti';
+    window.scrollTo(0, +sessionStorage.getItem('heim-scroll') || 0);
+    setTimeout(function () {{
+      if (!live.checked) return;
+      sessionStorage.setItem('heim-scroll', window.scrollY); location.reload();
+    }}, 5000);
+  }}
+}});
+</script></head>
+<body>
+<div id="overlay" onclick="this.style.display='none'"><img></div>
+<header><h1>🛡️ Heimdall: {title} <small id="state"></small></h1>
+<label>Status <select id="f-status" onchange="applyFilter()"><option value="">Semua</option>
+<option value="pass">Pass</option><option value="fail">Fail</option><option value="fatal">Fatal</option></select></label>
+<label>Fitur <select id="f-feature" onchange="applyFilter()"><option value="">Semua</option></select></label>
+<label><input type="checkbox" id="f-live"> Auto-refresh</label>
+<div id="counts"></div></header>
+<main>
+"""
+
+
+class HtmlReport:
+    """
+    Laporan HTML live: report.html di-append setiap step selesai (tanpa menunggu akhir run).
+    Browser merender HTML yang belum ditutup, jadi file tetap bisa dibuka walau run mati di tengah.
+    Thumbnail kecil (thumbs/) dimuat lazy; klik untuk screenshot penuh.
+    """
+
+    THUMB_WIDTH = 240
+    THUMB_QUALITY = 60
+
+    def __init__(self, scenario_name, output_dir):
+        self.output_dir = output_dir
+        self.file_path = os.path.join(output_dir, "report.html")
+        self.thumb_dir = os.path.join(output_dir, "thumbs")
+        os.makedirs(self.thumb_dir, exist_ok=True)
+        self.feature = "Initialization"
+        self.finished = False
+        self.file = open(self.file_path, "w", encoding="utf-8")
+        self._write(HEAD.format(title=html.escape(scenario_name)))
+
+    def _write(self, text):
+        if self.file.closed: return
+        self.file.write(text)
+        # Flush per blok: isi yang sudah ditulis selamat walau proses mati
+        self.file.flush()
+
+    def _rel(self, path):
+        return os.path.relpath(path, self.output_dir).replace(os.sep, "/")
+
+    def _thumb(self, step, path):
+        thumb = os.path.join(self.thumb_dir, f"step_{step}.jpg")
+        try:
+            data = prepare_image(path, self.THUMB_WIDTH, self.THUMB_QUALITY)
+            # Tulis lalu replace: thumbnail lama bisa hardlink ke blob artifact store
+            with open(thumb + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(thumb + ".tmp", thumb)
+            return self._rel(thumb)
+        except Exception:
+            # Thumbnail gagal -> pakai gambar asli (tetap lazy)
+            return self._rel(path)
+
+    def handle_event(self, event):
+        """Consumer ReportPipeline (juga dipakai regenerate dari events.jsonl)."""
+        kind = event.get("kind")
+        if kind == "feature":
+            self.feature = event["name"].replace('"', '').strip()
+            self._write(f'<h2 class="feature">📂 {html.escape(self.feature)}</h2>\n')
+        elif kind == "step":
+            self.add_step(event)
+        elif kind == "run_end":
+            self.finish(event)
+
+    def add_step(self, event):
+        e = lambda v: html.escape(str(v)) if v is not None else "-"
+        status = event.get("status") or "pass"
+        parts = [f'<article class="{status}" data-status="{status}" data-feature="{e(self.feature)}" id="step-{event["step"]}">']
+
+        shot = event.get("screenshot")
+        if shot and os.path.exists(shot):
+            parts.append(f'<img class="thumb" loading="lazy" src="{e(self._thumb(event["step"], shot))}" '
+                         f'data-full="{e(self._rel(shot))}" onclick="expand(this)" alt="step {event["step"]}">')
+
+        parts.append('<div class="body">')
+        parts.append(f'<b>STEP {event["step"]}</b> · {e(event.get("narrative"))}')
+        parts.append(f'<div class="meta">📍 {e(event.get("activity"))} · {e(event.get("duration"))}s · {e(event.get("cmd"))}</div>')
+        if event.get("error"):
+            parts.append(f'<div class="error">{e(event.get("failure_class"))}: {e(event["error"])}</div>')
+
+        logs = [l for l in event.get("logs") or [] if l.get("endpoint")]
+        if logs:
+            rows = "".join(f'<tr><td>{e(l.get("method"))}</td><td>{e(l.get("endpoint"))}</td><td>{e(l.get("status"))}</td>'
+                           f'<td>{e(l.get("duration_ms"))}ms</td></tr>' for l in logs)
+            parts.append(f'<details><summary>📡 {len(logs)} request API</summary><table>{rows}</table></details>')
+
+        startup = event.get("startup")
+        if startup:
+            parts.append(f'<div>⏱️ Startup {e(startup["mode"])}: median {e(startup["median_ms"])}ms, p95 {e(startup["p95_ms"])}ms</div>')
+        frames = event.get("frames")
+        if frames:
+            parts.append(f'<div>🎞️ {e(frames["total_frames"])} frame, janky {e(frames["janky_pct"])}%</div>')
+        visual = event.get("visual")
+        if visual and visual.get("status") in ("pass", "fail"):
+            heat = visual.get("heatmap")
+            link = f' <a href="{e(self._rel(heat))}" target="_blank">heatmap</a>' if heat and os.path.exists(heat) else ""
+            parts.append(f'<div>🖼️ Visual {e(visual["status"]).upper()}: {e(visual.get("diff_pct"))}% berubah{link}</div>')
+        crash = event.get("crash")
+        if crash:
+            parts.append(f'<details open><summary class="error">💥 {e(crash.get("type"))}: {e(crash.get("summary"))}</summary>'
+                         f'<pre>{e(chr(10).join(crash.get("stack") or []))}</pre></details>')
+
+        parts.append("</div></article>\n")
+        self._write("".join(parts))
+
+    def finish(self, event=None):
+        if self.finished or self.file.closed: return
+        self.finished = True
+        event = event or {}
+        self._write(f'</main>\n<footer id="run-end">🏁 Selesai: {html.escape(str(event.get("status", "-"))).upper()} · '
+                    f'{event.get("steps", "-")} step, {event.get("failed_steps", 0)} gagal · {event.get("duration", "-")}s'
+                    f'</footer>\n</body></html>\n')
+        self.close()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
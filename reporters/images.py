@@ -0,0 +1,14 @@
+import io
+
+from PIL import Image
+
+
+def prepare_image(path, max_width, quality):
+    """Screenshot -> JPEG diperkecil (bytes). path boleh file atau stream."""
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+        if img.width > max_width:
+            img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
@@ -1,25 +1,47 @@
 import os
 import base64
+import hashlib
+import shutil
+import time
 import requests
 import re
+from reporters.flow_render import RENDER_VERSION, render_flowchart, touch_cache, prune_cache
 
 class MapBuilder:
     """
     Heimdall Visual Engine.
     Versi: Clean & Fix (Menggunakan ::: untuk Class Styling).
+    Flowchart digambar lokal (SVG + PNG, tanpa network); mermaid.ink hanya opsional.
     """
+
+    # Batas URL mermaid.ink (graph besar ditolak / gagal di proxy)
+    MAX_URL = 8000
+    TIMEOUT = (5, 20)
+
+    # Folding: ULANGI >= n iterasi jadi 1 node, >= n step mirip berurutan jadi 1 node
+    FOLD_MIN_ITERATIONS = 2
+    FOLD_MIN_SIMILAR = 3
     
-    def __init__(self, scenario_name, output_dir):
+    def __init__(self, scenario_name, output_dir, remote=False, cache_dir=None):
         self.scenario_name = scenario_name
         self.output_dir = output_dir
+        # remote=True: coba juga mermaid.ink (lebih cantik), hasil lokal tetap jadi cadangan
+        self.remote = remote
+        self.cache_dir = cache_dir or os.path.join("reports", ".cache", "flowchart")
         self.current_feature = "Initialization"
         
-        self.nodes = []
+        # Node store: id -> node (urutan insert = urutan eksekusi)
+        self.nodes = {}
         self.edges = []
         self.clusters = {}
         
         self.last_node_id = "Start"
         self.node_counter = 0
+
+        # ULANGI yang sedang berjalan: stack var (nested), loop terluar yang dicatat
+        self.loops = {}
+        self.loop_stack = []
+        self.loop_counter = 0
         
         # Init
         self._add_node("Start", "Mulai", "circle", "startNode")
@@ -41,7 +63,7 @@ class MapBuilder:
         if step_type == "logic":
             shape = "diamond"
             style = "logic"
-        elif step_type == "error":
+        elif step_type in ("error", "danger"):
             style = "danger"
         elif step_type == "end":
             shape = "circle"
@@ -49,6 +71,10 @@ class MapBuilder:
 
         self._add_node(node_id, narrative, shape, style)
         self._add_to_cluster(self.current_feature, node_id)
+        if self.loop_stack:
+            loop = self.loops[f"L{self.loop_counter}"]
+            self.nodes[node_id]["loop"] = (loop["id"], max(loop["iterations"] - 1, 0))
+            if style == "danger": loop["failed"].add(loop["iterations"])
         
         edge_label = condition_label if condition_label else ""
         self.edges.append({
@@ -60,26 +86,144 @@ class MapBuilder:
         self.last_node_id = node_id
         return node_id
 
+    def handle_event(self, event):
+        """Consumer ReportPipeline."""
+        kind = event.get("kind")
+        if kind == "feature":
+            self.set_feature(event["name"])
+        elif kind == "step":
+            self.add_step(event["map_label"], step_type=event.get("map_type", "action"))
+        elif kind == "node":
+            self.add_step(event["label"], step_type=event.get("step_type", "action"), condition_label=event.get("condition_label"))
+        elif kind == "loop_start":
+            self.start_loop(event.get("var", ""), event.get("count"))
+        elif kind == "iteration":
+            # Hanya iterasi loop terluar yang dihitung (loop dalam ikut terlipat di dalamnya)
+            if len(self.loop_stack) == 1:
+                self.loops[f"L{self.loop_counter}"]["iterations"] += 1
+        elif kind == "loop_end":
+            if self.loop_stack: self.loop_stack.pop()
+
+    def start_loop(self, var, count=None):
+        if not self.loop_stack:
+            self.loop_counter += 1
+            loop_id = f"L{self.loop_counter}"
+            self.loops[loop_id] = {"id": loop_id, "var": var, "count": count, "iterations": 0, "failed": set()}
+        self.loop_stack.append(var)
+
+    # ==========================================
+    # FOLDING (GRAPH RINGKAS UNTUK DIGAMBAR)
+    # ==========================================
+    @staticmethod
+    def _template(label):
+        # "User mengetuk 'Simpan'" & "User mengetuk 'Batal'" -> template sama
+        return re.sub(r"'[^']*'|\d+", "…", label)
+
+    def fold(self):
+        """
+        Return (nodes, edges, clusters) ringkas:
+        1. Semua node di dalam ULANGI (>= FOLD_MIN_ITERATIONS iterasi) -> 1 node loop "×50, 2 gagal"
+           dengan panah balik ke dirinya sendiri.
+        2. >= FOLD_MIN_SIMILAR step mirip berurutan (template label sama) -> 1 node "×n".
+        Data asli (self.nodes/edges) tidak diubah.
+        """
+        mapping, folded, members = {}, {}, {}
+        for nid, node in self.nodes.items():
+            loop = self.loops.get(node["loop"][0]) if node.get("loop") else None
+            if loop and loop["iterations"] >= self.FOLD_MIN_ITERATIONS:
+                fid = loop["id"]
+                if fid not in folded:
+                    folded[fid] = {"id": fid, "shape": "box", "style": "loop", "loop": loop, "body": []}
+                if node["loop"][1] == 0: folded[fid]["body"].append(node["label"])
+                if node["style"] == "danger": folded[fid]["style"] = "danger"
+            else:
+                fid = nid
+                folded[fid] = dict(node)
+            mapping[nid] = fid
+            members.setdefault(fid, []).append(nid)
+
+        for node in folded.values():
+            if "body" not in node: continue
+            loop, body = node.pop("loop"), node.pop("body")
+            label = f"🔄 ULANGI {loop['var']} ×{loop['iterations']}"
+            if loop["failed"]: label += f", {len(loop['failed'])} gagal"
+            if body:
+                label += ": " + " → ".join(body[:3]) + (f" (+{len(body) - 3} langkah)" if len(body) > 3 else "")
+            node["label"] = label
+
+        # Step mirip berurutan (di luar loop, cluster sama, tanpa label kondisi di tengah)
+        cluster_of = {nid: feature for feature, ids in self.clusters.items() for nid in ids}
+        labeled = {mapping[e["to"]] for e in self.edges if e["label"] and e["to"] in mapping}
+        ids, i = list(folded), 0
+        while i < len(ids):
+            head = folded[ids[i]]
+            run = [ids[i]]
+            if head["shape"] == "box" and head["style"] in ("success", "danger") and ids[i] in self.nodes:
+                key = (self._template(head["label"]), cluster_of.get(ids[i]))
+                for nid in ids[i + 1:]:
+                    node = folded[nid]
+                    if (nid not in self.nodes or node["shape"] != "box" or nid in labeled
+                            or (self._template(node["label"]), cluster_of.get(nid)) != key):
+                        break
+                    run.append(nid)
+            if len(run) >= self.FOLD_MIN_SIMILAR:
+                failed = sum(1 for nid in run if folded[nid]["style"] == "danger")
+                label = f"{self._template(head['label'])} ×{len(run)}" + (f", {failed} gagal" if failed else "")
+                for nid in run[1:]:
+                    mapping.update({orig: ids[i] for orig in members[nid]})
+                    del folded[nid]
+                head.update(label=label, style="danger" if failed else head["style"])
+            i += len(run)
+
+        edges, seen = [], set()
+        for e in self.edges:
+            if e["from"] not in mapping or e["to"] not in mapping: continue
+            a, b = mapping[e["from"]], mapping[e["to"]]
+            if a == b or (a, b, e["label"]) in seen: continue
+            seen.add((a, b, e["label"]))
+            edges.append({"from": a, "to": b, "label": e["label"]})
+        for fid in folded:
+            if fid in self.loops:
+                edges.append({"from": fid, "to": fid, "label": f"×{self.loops[fid]['iterations']}"})
+
+        clusters = {}
+        for feature, node_ids in self.clusters.items():
+            kept = list(dict.fromkeys(mapping[nid] for nid in node_ids if mapping.get(nid) in folded))
+            if kept: clusters[feature] = kept
+        return list(folded.values()), edges, clusters
+
     def render_map(self):
-        print("  🎨 Rendering Mermaid Flowchart...")
-        mermaid_code = self._generate_mermaid_code()
+        print("  🎨 Rendering Flowchart...")
+        nodes, edges, clusters = self.fold()
+        mermaid_code = self._generate_mermaid_code(nodes, edges, clusters)
         
         # Simpan file .mmd untuk debugging jika perlu
         mmd_path = os.path.join(self.output_dir, "flowchart.mmd")
         with open(mmd_path, "w", encoding="utf-8") as f:
             f.write(mermaid_code)
-            
-        self._download_image(mermaid_code)
+
+        # Hash graph: flow yang tidak berubah tidak dirender ulang
+        key = hashlib.sha1(f"{RENDER_VERSION}\n{mermaid_code}".encode("utf-8")).hexdigest()[:20]
+        started = time.time()
+        try:
+            _, png_path, cached = render_flowchart(nodes, edges, clusters, self.output_dir, self.cache_dir, key)
+            how = "cache" if cached else f"{(time.time() - started) * 1000:.0f}ms"
+            print(f"  🖼️ Flowchart saved: {png_path} (+ .svg, {how})")
+        except Exception as e:
+            print(f"  ⚠️ Gagal render flowchart lokal: {e}")
+
+        if self.remote:
+            self._download_image(mermaid_code, key)
 
     def _add_node(self, nid, label, shape, style):
         # Ganti kutip dua dengan satu agar tidak merusak syntax diagram
         safe_label = label.replace('"', "'")
-        self.nodes.append({
+        self.nodes[nid] = {
             "id": nid, 
             "label": safe_label, 
             "shape": shape, 
             "style": style
-        })
+        }
 
     def _add_to_cluster(self, feature, nid):
         if feature not in self.clusters:
@@ -91,8 +235,9 @@ class MapBuilder:
         clean = re.sub(r'[^a-zA-Z0-9]', '', text)
         return f"Cluster_{clean}"
 
-    def _generate_mermaid_code(self):
+    def _generate_mermaid_code(self, nodes, edges, clusters):
         code = ["flowchart TD"]
+        by_id = {n["id"]: n for n in nodes}
         
         # --- STYLING DEFINITIONS (FIXED) ---
         # Menggunakan titik koma (;) di akhir setiap definisi
@@ -101,6 +246,7 @@ class MapBuilder:
         code.append("    classDef danger fill:#ffebee,stroke:#c62828,stroke-width:2px,rx:5,ry:5;")
         code.append("    classDef startNode fill:#c8e6c9,stroke:#2e7d32,stroke-width:2px,rx:20,ry:20,color:#1b5e20;")
         code.append("    classDef endNode fill:#ffcdd2,stroke:#c62828,stroke-width:2px,rx:20,ry:20,color:#b71c1c;")
+        code.append("    classDef loop fill:#ede7f6,stroke:#5e35b1,stroke-width:2px,rx:5,ry:5,color:#311b92;")
         # Saya hapus linkStyle di sini karena sering bikin crash di renderer mermaid.ink versi lama
         code.append("")
         
@@ -113,7 +259,7 @@ class MapBuilder:
         ]
         
         cluster_idx = 0
-        for feature, node_ids in self.clusters.items():
+        for feature, node_ids in clusters.items():
             safe_id = self._clean_id(feature)
             # Bersihkan label dari karakter non-ascii yang mungkin bikin error URL
             safe_label = feature.encode('ascii', 'ignore').decode('ascii').strip()
@@ -123,7 +269,7 @@ class MapBuilder:
             code.append("    direction TB")
             
             for nid in node_ids:
-                node = next((n for n in self.nodes if n["id"] == nid), None)
+                node = by_id.get(nid)
                 if node:
                     open_br, close_br = "[", "]"
                     if node['shape'] == 'diamond': open_br, close_br = "{", "}"
@@ -142,7 +288,7 @@ class MapBuilder:
             code.append("")
 
         # --- GENERATE EDGES ---
-        for edge in self.edges:
+        for edge in edges:
             arrow = "-->"
             if edge["label"]:
                 arrow = f'-- "{edge["label"]}" -->'
@@ -150,23 +296,35 @@ class MapBuilder:
             
         return "\n".join(code)
 
-    def _download_image(self, mermaid_code):
+    def _download_image(self, mermaid_code, key):
+        img_path = os.path.join(self.output_dir, "flowchart.png")
+        cache_path = os.path.join(self.cache_dir, f"{key}.ink.png")
+        if os.path.exists(cache_path):
+            shutil.copyfile(cache_path, img_path)
+            touch_cache([cache_path])
+            print(f"  🖼️ Flowchart mermaid.ink dari cache: {img_path}")
+            return
         try:
             # Encode ke Base64 agar aman dikirim lewat URL
             graphbytes = mermaid_code.encode("utf8")
-            base64_bytes = base64.b64encode(graphbytes)
+            base64_bytes = base64.urlsafe_b64encode(graphbytes)
             base64_string = base64_bytes.decode("ascii")
             
             url = "https://mermaid.ink/img/" + base64_string
+            if len(url) > self.MAX_URL:
+                print(f"  ⚠️ Flowchart terlalu besar untuk mermaid.ink ({len(url)} karakter URL), pakai hasil lokal.")
+                return
             print("  📡 Requesting image from mermaid.ink...")
-            response = requests.get(url)
+            response = requests.get(url, timeout=self.TIMEOUT)
             
             if response.status_code == 200:
-                img_path = os.path.join(self.output_dir, "flowchart.png")
                 with open(img_path, 'wb') as f:
                     f.write(response.content)
+                os.makedirs(self.cache_dir, exist_ok=True)
+                shutil.copyfile(img_path, cache_path)
+                prune_cache(self.cache_dir)
                 print(f"  🖼️ Flowchart saved: {img_path}")
             else:
-                print(f"  ⚠️ Gagal render. Status: {response.status_code}")
+                print(f"  ⚠️ Gagal render mermaid.ink (status {response.status_code}), pakai hasil lokal.")
         except Exception as e:
-            print(f"  ⚠️ Error downloading flowchart: {e}")
\ No newline at end of file
+            print(f"  ⚠️ Error downloading flowchart: {e} (pakai hasil lokal)")
\ No newline at end of file
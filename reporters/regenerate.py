@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from core.artifact_store import resolve_run_dir
+from core.event_log import load_events
+
+
+# ==========================================
+# RINGKASAN RUN
+# ==========================================
+def build_summary(events):
+    run_start = next((e for e in events if e.get("kind") == "run_start"), {})
+    run_end = next((e for e in reversed(events) if e.get("kind") == "run_end"), None)
+    steps = [e for e in events if e.get("kind") == "step"]
+
+    by_status = {}
+    for s in steps:
+        by_status[s.get("status", "pass")] = by_status.get(s.get("status", "pass"), 0) + 1
+
+    failures = [{
+        "step": s["step"], "narrative": s["narrative"], "status": s.get("status"),
+        "failure_class": s.get("failure_class"), "error": s.get("error"),
+    } for s in steps if s.get("status") not in (None, "pass")]
+
+    api = next((e for e in reversed(events) if e.get("kind") == "api_metrics"), {})
+    startups = [{
+        "step": s["step"], "package": s["startup"]["package"], "mode": s["startup"]["mode"],
+        "min_ms": s["startup"]["min_ms"], "median_ms": s["startup"]["median_ms"],
+        "p95_ms": s["startup"]["p95_ms"], "budget_ms": s["startup"].get("budget_ms"),
+    } for s in steps if s.get("startup")]
+    jank = [{
+        "step": s["step"], "narrative": s["narrative"], "total_frames": s["frames"]["total_frames"],
+        "janky_pct": s["frames"]["janky_pct"], "p90_ms": s["frames"].get("p90_ms"),
+        "p95_ms": s["frames"].get("p95_ms"), "p99_ms": s["frames"].get("p99_ms"),
+    } for s in steps if s.get("frames")]
+    visual = [{
+        "step": s["step"], "narrative": s["narrative"], "status": s["visual"]["status"],
+        "diff_pct": s["visual"].get("diff_pct"), "heatmap": s["visual"].get("heatmap"),
+    } for s in steps if s.get("visual")]
+    leaks = [{
+        "label": l.get("label"), "iterations": l.get("iterations"), "slope_pss_kb": l.get("slope_pss_kb"),
+        "slope_java_kb": l.get("slope_java_kb"), "leak": l.get("leak"), "fail": l.get("fail"),
+    } for l in events if l.get("kind") == "leak_check"]
+    resources = next((e for e in reversed(events) if e.get("kind") == "resource_summary"), {})
+    crashes = [{
+        "step": c.get("step"), "type": c.get("type"), "package": c.get("package"),
+        "summary": c.get("summary"), "action": c.get("action"),
+    } for c in events if c.get("kind") == "crash"]
+
+    slowest = sorted(steps, key=lambda s: s.get("duration") or 0, reverse=True)[:10]
+    return {
+        "scenario": run_start.get("scenario"),
+        "file": run_start.get("file"),
+        "serial": run_start.get("serial"),
+        # Tanpa run_end = proses mati di tengah jalan
+        "status": run_end.get("status") if run_end else "incomplete",
+        "duration": run_end.get("duration") if run_end else (events[-1].get("t") if events else 0),
+        "steps": len(steps),
+        "by_status": by_status,
+        "failures": failures,
+        "slowest_steps": [{"step": s["step"], "narrative": s["narrative"], "duration": s.get("duration")} for s in slowest],
+        "api_metrics": api.get("rows", []),
+        "crashes": crashes,
+        "resources": resources.get("rows", []),
+        "leak_checks": leaks,
+        "startup": startups,
+        "jank": jank,
+        "visual": visual,
+    }
+
+
+def write_summary(run_dir, summary):
+    with open(os.path.join(run_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    lines = [
+        f"# Heimdall Summary: {summary['scenario']}",
+        "",
+        f"- Status: **{summary['status']}**",
+        f"- Durasi: {summary['duration']}s",
+        f"- Step: {summary['steps']} {summary['by_status']}",
+        "",
+    ]
+    if summary["failures"]:
+        lines += ["## Gagal", "", "| Step | Status | Error |", "| --: | :-- | :-- |"]
+        for f_ in summary["failures"]:
+            lines.append(f"| {f_['step']} | {f_['status']} ({f_['failure_class']}) | {f_['error']} |")
+        lines.append("")
+    if summary.get("crashes"):
+        lines += ["## Crash / ANR", "", "| Step | Tipe | Package | Penanganan | Ringkasan |", "| --: | :-- | :-- | :-- | :-- |"]
+        for c in summary["crashes"]:
+            lines.append(f"| {c['step']} | {c['type']} | {c['package']} | {c['action']} | {c['summary']} |")
+        lines.append("")
+    if summary.get("startup"):
+        lines += ["## Waktu Buka Aplikasi", "", "| Step | Package | Mode | Min | Median | p95 | Budget |", "| --: | :-- | :-- | --: | --: | --: | --: |"]
+        for s in summary["startup"]:
+            lines.append(f"| {s['step']} | {s['package']} | {s['mode']} | {s['min_ms']}ms | {s['median_ms']}ms | {s['p95_ms']}ms | {s['budget_ms'] or '-'} |")
+        lines.append("")
+    if summary.get("jank"):
+        lines += ["## Jank (Frame)", "", "| Step | Frames | Janky % | p90 | p95 | p99 | Narasi |", "| --: | --: | --: | --: | --: | --: | :-- |"]
+        for j in sorted(summary["jank"], key=lambda j: j["janky_pct"], reverse=True)[:10]:
+            lines.append(f"| {j['step']} | {j['total_frames']} | {j['janky_pct']} | {j['p90_ms']}ms | {j['p95_ms']}ms | {j['p99_ms']}ms | {j['narrative']} |")
+        lines.append("")
+    changed = [v for v in summary.get("visual", []) if v["status"] in ("fail", "error")]
+    if changed:
+        lines += ["## Visual Regression", "", "| Step | Status | Diff % | Heatmap | Narasi |", "| --: | :-- | --: | :-- | :-- |"]
+        for v in changed:
+            lines.append(f"| {v['step']} | {v['status']} | {v['diff_pct']} | {v['heatmap'] or '-'} | {v['narrative']} |")
+        lines.append("")
+    if summary.get("leak_checks"):
+        lines += ["## Leak Check (ULANGI)", "", "| Loop | Iterasi | PSS KB/iterasi | Java KB/iterasi | Hasil |", "| :-- | --: | --: | --: | :-- |"]
+        for l in summary["leak_checks"]:
+            verdict = "-" if l["leak"] is None else ("LEAK" if l["leak"] else "aman")
+            lines.append(f"| {l['label']} | {l['iterations']} | {l['slope_pss_kb']} | {l['slope_java_kb']} | {verdict} |")
+        lines.append("")
+    lines += ["## Step Terlama", "", "| Step | Durasi | Narasi |", "| --: | --: | :-- |"]
+    for s in summary["slowest_steps"]:
+        lines.append(f"| {s['step']} | {s['duration']}s | {s['narrative']} |")
+    if summary.get("api_metrics"):
+        lines += ["", "## API (per endpoint)", "", "| Endpoint | N | p50 | p95 | p99 | Error % | Bytes |", "| :-- | --: | --: | --: | --: | --: | --: |"]
+        for a in summary["api_metrics"]:
+            lines.append(f"| {a['method']} {a['endpoint']} | {a['count']} | {a['p50_ms']} | {a['p95_ms']} | {a['p99_ms']} | {a['error_rate']} | {a['bytes']} |")
+    if summary.get("resources"):
+        grown = sorted(summary["resources"], key=lambda r: r.get("pss_delta_kb") or 0, reverse=True)[:10]
+        lines += ["", "## Resource (Δ PSS terbesar)", "", "| Step | PSS (KB) | Δ PSS (KB) | CPU % | Frames | Janky |", "| --: | --: | --: | --: | --: | --: |"]
+        for r in grown:
+            lines.append(f"| {r['step']} | {r['pss_kb']} | {r['pss_delta_kb']} | {r['cpu_avg']} | {r['frames']} | {r['janky_frames']} |")
+    with open(os.path.join(run_dir, "summary.md"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+# ==========================================
+# BANGUN ULANG LAPORAN (TANPA DEVICE)
+# ==========================================
+def _resolve_screenshot(run_dir, path):
+    # Run-dir bisa sudah dipindah/di-download dari mesin lain
+    if not path or os.path.exists(path):
+        return path
+    local = os.path.join(run_dir, "screenshots", os.path.basename(path))
+    return local if os.path.exists(local) else path
+
+
+def _replay(run_dir, consumer):
+    for event in load_events(run_dir):
+        if event.get("kind") == "step":
+            event["screenshot"] = _resolve_screenshot(run_dir, event.get("screenshot"))
+        consumer.handle_event(event)
+
+
+def _scenario_name(run_dir):
+    events = load_events(run_dir)
+    start = next((e for e in events if e.get("kind") == "run_start"), {})
+    return start.get("scenario") or os.path.basename(os.path.normpath(run_dir))
+
+
+def rebuild_saga(run_dir):
+    from reporters.saga_writer import SagaWriter
+    saga = SagaWriter(_scenario_name(run_dir), run_dir)
+    _replay(run_dir, saga)
+    saga.save()
+    return saga.file_path
+
+
+def rebuild_flowchart(run_dir):
+    from reporters.map_builder import MapBuilder
+    mapper = MapBuilder(_scenario_name(run_dir), run_dir)
+    _replay(run_dir, mapper)
+    mapper.render_map()
+    return os.path.join(run_dir, "flowchart.mmd")
+
+
+def rebuild_html(run_dir):
+    from reporters.html_report import HtmlReport
+    report = HtmlReport(_scenario_name(run_dir), run_dir)
+    _replay(run_dir, report)
+    report.close()
+    return report.file_path
+
+
+def rebuild_summary(run_dir):
+    summary = build_summary(load_events(run_dir))
+    write_summary(run_dir, summary)
+    return os.path.join(run_dir, "summary.md")
+
+
+def regenerate_reports(run_dir, jobs=3):
+    """Bangun ulang Saga, Flowchart, HTML, dan Summary secara paralel dari events.jsonl."""
+    if not load_events(run_dir):
+        print(f"!!! Error: events.jsonl tidak ditemukan / kosong di {run_dir}")
+        return []
+
+    builders = [rebuild_saga, rebuild_flowchart, rebuild_html, rebuild_summary]
+    print(f"🛠️ Regenerating reports: {run_dir}")
+    with ProcessPoolExecutor(max_workers=max(1, min(jobs, len(builders)))) as pool:
+        futures = {b.__name__: pool.submit(b, run_dir) for b in builders}
+    outputs = []
+    for name, fut in futures.items():
+        try:
+            outputs.append(fut.result())
+            print(f"  ✅ {name}: {outputs[-1]}")
+        except Exception as e:
+            print(f"  ⚠️ {name} gagal: {e}")
+    return outputs
+
+
+def run_report_cli(argv):
+    parser = argparse.ArgumentParser(prog="heimdall report")
+    parser.add_argument("run_dir", help="Folder hasil run (berisi events.jsonl)")
+    parser.add_argument("--jobs", type=int, default=3, help="Jumlah proses paralel")
+    args = parser.parse_args(argv)
+    return 0 if regenerate_reports(resolve_run_dir(args.run_dir), args.jobs) else 1
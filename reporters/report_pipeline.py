@@ -0,0 +1,59 @@
+import queue
+import threading
+
+
+class ReportPipeline:
+    """
+    Jalur Laporan di Background.
+    process_step hanya mengirim event (dict) ke antrian terbatas; worker thread
+    meneruskan event ke semua reporter (SagaWriter, MapBuilder, ...) secara berurutan.
+    Device tidak perlu menunggu dokumen dibangun.
+
+    Jenis event:
+    - {"kind": "feature", "name": ...}
+    - {"kind": "step", "step": n, "narrative": ..., "activity": ..., "screenshot": ...,
+       "logs": [...], "map_label": ..., "map_type": ...}
+    - {"kind": "node", "label": ..., "step_type": ...}   (node flowchart tanpa halaman Saga)
+    - {"kind": "loop_start" / "iteration" / "loop_end", "var": ...}   (batas ULANGI, untuk folding flowchart)
+    """
+
+    _STOP = object()
+
+    def __init__(self, consumers=None, maxsize=64):
+        # Antrian terbatas: kalau reporter ketinggalan jauh, step berikutnya menunggu (backpressure)
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.consumers = list(consumers or [])
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name="heimdall-report", daemon=True)
+        self.thread.start()
+
+    def subscribe(self, consumer):
+        """Consumer = object dengan method handle_event(event)."""
+        self.consumers.append(consumer)
+
+    def emit(self, event):
+        self.queue.put(event)
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            try:
+                if event is self._STOP:
+                    return
+                for consumer in self.consumers:
+                    try:
+                        consumer.handle_event(event)
+                    except Exception as e:
+                        # 1 reporter error tidak boleh menghentikan reporter lain
+                        self.errors += 1
+                        print(f"  ⚠️ [Report] {type(consumer).__name__} gagal memproses event {event.get('kind')}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def close(self, timeout=None):
+        """Tunggu antrian habis lalu matikan worker. Dipanggil sekali di akhir sesi."""
+        pending = self.queue.qsize()
+        if pending:
+            print(f"  ⏳ [Report] Menunggu {pending} event laporan selesai diproses...")
+        self.queue.put(self._STOP)
+        self.thread.join(timeout)
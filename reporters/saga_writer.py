@@ -3,34 +3,114 @@ from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
 import os
+import threading
+from core.tracer import TRACER
+from reporters.images import prepare_image
+
 
 class SagaWriter:
-    def __init__(self, scenario_name, output_dir):
-        self.document = Document()
+    # Ditampilkan 3 inch (240 dpi = 720px): resolusi penuh HP hanya membengkakkan docx
+    IMAGE_MAX_WIDTH = 720
+    IMAGE_QUALITY = 70
+
+    def __init__(self, scenario_name, output_dir, chunk_size=0, workers=4):
+        self.scenario_name = scenario_name
+        self.output_dir = output_dir
+        safe_name = "".join([c for c in scenario_name if c.isalnum() or c in (' ', '-', '_')]).strip()
+        self.safe_name = safe_name
+        self.file_path = os.path.join(output_dir, f"Heimdall_Saga_{safe_name}.docx")
+
+        # chunk_size > 0: laporan dipecah per n step (..._part01.docx, ...) agar memori tetap datar
+        self.chunk_size = chunk_size
+        self.part = 1
+        self.steps_in_part = 0
+        self.file_paths = []
+
+        # Kompres screenshot paralel; step ditulis berurutan setelah gambarnya siap
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="saga-img")
+        self.pending = deque()
+        self.window = workers * 2
+        # Screenshot identik (hash isi file) cukup dikompres & disimpan 1x
+        self.images = {}
+        self.images_lock = threading.Lock()
+        self.image_stats = {"count": 0, "unique": 0, "bytes_in": 0, "bytes_out": 0}
+
+        self.document = self._new_document()
+
+    def _new_document(self):
+        document = Document()
         
         # --- HEADER DOKUMEN ---
-        section = self.document.sections[0]
+        section = document.sections[0]
         section.top_margin = Inches(0.5)
         section.bottom_margin = Inches(0.5)
         section.left_margin = Inches(0.8)
         section.right_margin = Inches(0.8)
 
-        title = self.document.add_heading(level=0)
-        run = title.add_run(f'Heimdall Saga: {scenario_name}')
+        title = document.add_heading(level=0)
+        suffix = f" (Bagian {self.part})" if self.chunk_size else ""
+        run = title.add_run(f'Heimdall Saga: {self.scenario_name}{suffix}')
         run.font.name = 'Arial'
         run.font.size = Pt(24)
         run.font.color.rgb = RGBColor(33, 33, 33) # Dark Grey
-        
-        self.output_dir = output_dir
-        safe_name = "".join([c for c in scenario_name if c.isalnum() or c in (' ', '-', '_')]).strip()
-        self.file_path = os.path.join(output_dir, f"Heimdall_Saga_{safe_name}.docx")
+        return document
+
+    def _part_path(self):
+        if not self.chunk_size: return self.file_path
+        return os.path.join(self.output_dir, f"Heimdall_Saga_{self.safe_name}_part{self.part:02d}.docx")
+
+    # ==========================================
+    # GAMBAR (THREAD POOL + DEDUP)
+    # ==========================================
+    def _prepare(self, path):
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        with self.images_lock:
+            self.image_stats["count"] += 1
+            self.image_stats["bytes_in"] += len(raw)
+            if digest in self.images:
+                return self.images[digest]
+        data = prepare_image(io.BytesIO(raw), self.IMAGE_MAX_WIDTH, self.IMAGE_QUALITY)
+        with self.images_lock:
+            if digest not in self.images:
+                self.images[digest] = data
+                self.image_stats["unique"] += 1
+                self.image_stats["bytes_out"] += len(data)
+            return self.images[digest]
+
+    def _submit(self, path):
+        if not path or not os.path.exists(path): return None
+        return self.pool.submit(self._prepare, path)
+
+    def _drain(self, keep=0):
+        """Tulis step yang menunggu ke dokumen (urutan tetap), sisakan `keep` antrian."""
+        while len(self.pending) > keep:
+            event, future = self.pending.popleft()
+            try:
+                image = future.result() if future else None
+            except Exception as e:
+                print(f"  ⚠️ [Saga] Gagal kompres screenshot step {event['step']}: {e}")
+                image = None
+            with TRACER.span("SagaWriter.add_step", "reporting", step=event["step"]):
+                self.add_step(event["step"], event["narrative"], event["activity"], event["screenshot"], event.get("logs"),
+                              event.get("crash"), event.get("startup"), event.get("frames"),
+                              event.get("visual"), image)
 
-    def add_step(self, step_num, description, activity_name, screenshot_path, api_logs=None):
+    def add_step(self, step_num, description, activity_name, screenshot_path, api_logs=None, crash=None, startup=None, frames=None, visual=None, image=None):
         """
         LAYOUT BARU: 1 STEP = 1 HALAMAN (Slide Style)
         Dijamin rapi dan tidak ada jarak aneh.
+        image: screenshot yang sudah dikompres (bytes); None = dikompres di sini.
         """
+        if self.chunk_size and self.steps_in_part >= self.chunk_size:
+            self._rollover()
+        self.steps_in_part += 1
         
         # 1. HEADER STEP
         # Tabel 1 baris untuk background header (opsional, biar rapi)
@@ -63,11 +143,12 @@ class SagaWriter:
         # 4. SCREENSHOT (BESAR & TENGAH)
         if screenshot_path and os.path.exists(screenshot_path):
             try:
+                if image is None: image = self._prepare(screenshot_path)
                 p_img = self.document.add_paragraph()
                 p_img.alignment = WD_ALIGN_PARAGRAPH.CENTER
                 run_img = p_img.add_run()
                 # Lebar 3.0 Inch (Cukup besar tapi muat di halaman)
-                run_img.add_picture(screenshot_path, width=Inches(3.0))
+                run_img.add_picture(io.BytesIO(image), width=Inches(3.0))
             except:
                 pass
 
@@ -111,12 +192,195 @@ class SagaWriter:
                 icon = "✅" if status.startswith('2') else "❌"
                 if status == '-': icon = "⏳" # Loading icon
                 
-                self._style_cell(row[2], f"{icon} {status}", size=8, bold=True)
+                timing = f" ({log['duration_ms']}ms)" if log.get('duration_ms') is not None else ""
+                self._style_cell(row[2], f"{icon} {status}{timing}", size=8, bold=True)
+
+        # 6. WAKTU BUKA APLIKASI (UKUR)
+        if startup:
+            p_start = self.document.add_paragraph()
+            p_start.paragraph_format.space_before = Pt(12)
+            budget = f" | Budget {startup['budget_ms']}ms" if startup.get('budget_ms') else ""
+            run_start = p_start.add_run(f"⏱️ Startup {startup['mode'].upper()} ({len(startup['samples'])}/{startup['runs']} run): "
+                                        f"min {startup['min_ms']}ms | median {startup['median_ms']}ms | p95 {startup['p95_ms']}ms{budget}")
+            run_start.bold = True
+            run_start.font.size = Pt(9)
+            run_start.font.name = 'Arial'
+
+            table = self.document.add_table(rows=1, cols=4)
+            table.style = 'Table Grid'
+            for i, h in enumerate(["#", "TOTAL TIME", "WAIT TIME", "LAUNCH STATE"]):
+                self._style_cell(table.rows[0].cells[i], h, bg="E0E0E0", bold=True, size=8)
+            for i, s in enumerate(startup["samples"]):
+                cells = table.add_row().cells
+                self._style_cell(cells[0], str(i + 1), size=8)
+                self._style_cell(cells[1], f"{s['total_ms']}ms", size=8)
+                self._style_cell(cells[2], f"{s['wait_ms']}ms" if s['wait_ms'] is not None else "-", size=8)
+                self._style_cell(cells[3], s['launch_state'] or "-", size=8)
+
+        # 7. FRAME / JANK
+        if frames:
+            p_frames = self.document.add_paragraph()
+            p_frames.paragraph_format.space_before = Pt(12)
+            run_frames = p_frames.add_run(f"🎞️ Frames: {frames['total_frames']} | Janky {frames['janky_frames']} ({frames['janky_pct']}%) | "
+                                          f"p90 {frames.get('p90_ms', '-')}ms | p95 {frames.get('p95_ms', '-')}ms | p99 {frames.get('p99_ms', '-')}ms")
+            run_frames.font.size = Pt(9)
+            run_frames.font.name = 'Arial'
+
+        # 8. VISUAL REGRESSION (HEATMAP PERBEDAAN)
+        if visual and visual.get("status") in ("pass", "fail"):
+            p_vis = self.document.add_paragraph()
+            p_vis.paragraph_format.space_before = Pt(12)
+            detail = visual.get("error") or f"{visual['diff_pct']}% pixel berubah (batas {visual['max_diff_pct']}%)"
+            run_vis = p_vis.add_run(f"🖼️ Visual vs Baseline: {visual['status'].upper()} - {detail}")
+            run_vis.bold = True
+            run_vis.font.size = Pt(9)
+            run_vis.font.name = 'Arial'
+            if visual['status'] == "fail":
+                run_vis.font.color.rgb = RGBColor(183, 28, 28)
+            if visual.get("heatmap") and os.path.exists(visual["heatmap"]):
+                try:
+                    p_heat = self.document.add_paragraph()
+                    p_heat.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    p_heat.add_run().add_picture(visual["heatmap"], width=Inches(2.2))
+                except:
+                    pass
+
+        # 9. CRASH / ANR (STACK TRACE DARI LOGCAT)
+        if crash:
+            p_crash = self.document.add_paragraph()
+            p_crash.paragraph_format.space_before = Pt(12)
+            run_crash = p_crash.add_run(f"💥 {crash.get('type', 'crash').upper()}: {crash.get('package')} — {crash.get('summary') or '-'}")
+            run_crash.bold = True
+            run_crash.font.size = Pt(9)
+            run_crash.font.name = 'Arial'
+            run_crash.font.color.rgb = RGBColor(183, 28, 28) # Merah
 
-        # 6. PAGE BREAK (KUNCI RAPIH)
+            p_stack = self.document.add_paragraph()
+            run_stack = p_stack.add_run("\n".join(crash.get("stack") or []))
+            run_stack.font.size = Pt(7)
+            run_stack.font.name = 'Consolas'
+
+        # 10. PAGE BREAK (KUNCI RAPIH)
         # Ganti halaman setiap selesai satu langkah.
         self.document.add_page_break()
 
+    def add_api_summary(self, rows):
+        """Halaman ringkasan performa API per endpoint (p50/p95/p99, error rate, bytes)."""
+        if not rows: return
+
+        title = self.document.add_paragraph()
+        run = title.add_run("📡 API Performance Summary")
+        run.bold = True
+        run.font.size = Pt(14)
+        run.font.color.rgb = RGBColor(0, 51, 102)
+
+        headers = ["METHOD", "ENDPOINT", "N", "P50", "P95", "P99", "ERR %", "BYTES"]
+        widths = [0.6, 2.6, 0.4, 0.55, 0.55, 0.55, 0.55, 0.7]
+        table = self.document.add_table(rows=1, cols=len(headers))
+        table.style = 'Table Grid'
+        table.autofit = False
+        for i, w in enumerate(widths):
+            table.columns[i].width = Inches(w)
+        for i, h in enumerate(headers):
+            self._style_cell(table.rows[0].cells[i], h, bg="E0E0E0", bold=True, size=8)
+
+        for r in rows:
+            endpoint = r['endpoint'] if len(r['endpoint']) <= 45 else "..." + r['endpoint'][-42:]
+            values = [r['method'], endpoint, str(r['count']),
+                      f"{r['p50_ms']}ms" if r['p50_ms'] is not None else "-",
+                      f"{r['p95_ms']}ms" if r['p95_ms'] is not None else "-",
+                      f"{r['p99_ms']}ms" if r['p99_ms'] is not None else "-",
+                      f"{r['error_rate']}", str(r['bytes'])]
+            cells = table.add_row().cells
+            for i, v in enumerate(values):
+                bg = "FFEBEE" if i == 6 and r['error_rate'] > 0 else None
+                self._style_cell(cells[i], v, size=7, font='Consolas' if i == 1 else 'Arial', bg=bg)
+
+        self.document.add_page_break()
+
+    def add_resource_summary(self, rows):
+        """Halaman resource per step: memori (PSS) + delta, CPU, dan janky frame."""
+        if not rows: return
+
+        title = self.document.add_paragraph()
+        run = title.add_run("📊 Resource per Step")
+        run.bold = True
+        run.font.size = Pt(14)
+        run.font.color.rgb = RGBColor(0, 51, 102)
+
+        headers = ["STEP", "PSS", "Δ PSS", "JAVA HEAP", "CPU", "FRAMES", "JANKY"]
+        widths = [0.5, 0.9, 0.9, 0.9, 0.7, 0.8, 0.7]
+        table = self.document.add_table(rows=1, cols=len(headers))
+        table.style = 'Table Grid'
+        table.autofit = False
+        for i, w in enumerate(widths):
+            table.columns[i].width = Inches(w)
+        for i, h in enumerate(headers):
+            self._style_cell(table.rows[0].cells[i], h, bg="E0E0E0", bold=True, size=8)
+
+        kb = lambda v: f"{v / 1024:.1f}MB" if v is not None else "-"
+        for r in rows:
+            delta = r['pss_delta_kb']
+            values = [str(r['step']), kb(r['pss_kb']),
+                      (f"{'+' if delta >= 0 else ''}{delta / 1024:.1f}MB" if delta is not None else "-"),
+                      kb(r['java_heap_kb']),
+                      f"{r['cpu_avg']}%" if r['cpu_avg'] is not None else "-",
+                      str(r['frames']) if r['frames'] is not None else "-",
+                      str(r['janky_frames']) if r['janky_frames'] is not None else "-"]
+            cells = table.add_row().cells
+            for i, v in enumerate(values):
+                bg = "FFEBEE" if i == 6 and r['janky_frames'] else None
+                self._style_cell(cells[i], v, size=7, bg=bg)
+
+        self.document.add_page_break()
+
+    def add_leak_check(self, result):
+        """Hasil cek memory leak 1 blok ULANGI: memori per iterasi + tren."""
+        title = self.document.add_paragraph()
+        icon = "🚨" if result.get("leak") else "🧪"
+        run = title.add_run(f"{icon} Leak Check: {result['label']}")
+        run.bold = True
+        run.font.size = Pt(12)
+        run.font.color.rgb = RGBColor(183, 28, 28) if result.get("leak") else RGBColor(0, 51, 102)
+
+        if result.get("leak") is None:
+            verdict = f"Tidak dievaluasi ({result.get('note')})."
+        else:
+            verdict = (f"Tren PSS {result['slope_pss_kb']:+} KB/iterasi, Java heap {result['slope_java_kb']} KB/iterasi "
+                       f"(batas {result['threshold_kb']:g} KB{', setelah GC' if result.get('gc') else ''}) -> "
+                       f"{'INDIKASI LEAK' if result['leak'] else 'aman'}")
+        p = self.document.add_paragraph()
+        r = p.add_run(verdict)
+        r.font.size = Pt(9)
+
+        table = self.document.add_table(rows=1, cols=3)
+        table.style = 'Table Grid'
+        for i, h in enumerate(["ITERASI", "PSS (KB)", "JAVA HEAP (KB)"]):
+            self._style_cell(table.rows[0].cells[i], h, bg="E0E0E0", bold=True, size=8)
+        for i, (pss, java) in enumerate(zip(result["pss_kb"], result["java_heap_kb"])):
+            cells = table.add_row().cells
+            self._style_cell(cells[0], "baseline" if i == 0 else str(i), size=8)
+            self._style_cell(cells[1], str(pss if pss is not None else "-"), size=8)
+            self._style_cell(cells[2], str(java if java is not None else "-"), size=8)
+
+        self.document.add_page_break()
+
+    def handle_event(self, event):
+        """Consumer ReportPipeline: 1 event step = 1 halaman."""
+        if event.get("kind") == "step":
+            # Gambar mulai dikompres sekarang, halaman ditulis saat antrian penuh / halaman lain datang
+            self.pending.append((event, self._submit(event["screenshot"])))
+            self._drain(self.window)
+            return
+        if event.get("kind") in ("api_metrics", "leak_check", "resource_summary"):
+            self._drain()
+        if event.get("kind") == "api_metrics":
+            self.add_api_summary(event.get("rows"))
+        if event.get("kind") == "leak_check":
+            self.add_leak_check(event)
+        if event.get("kind") == "resource_summary":
+            self.add_resource_summary(event.get("rows"))
+
     def _style_cell(self, cell, text, bold=False, size=9, font='Arial', bg=None):
         cell.text = ""
         p = cell.paragraphs[0]
@@ -133,9 +397,30 @@ class SagaWriter:
             shd.set(qn('w:fill'), bg)
             tc_pr.append(shd)
 
-    def save(self):
+    def _rollover(self):
+        """Simpan bagian sekarang, lepas dari memori, mulai dokumen bagian berikutnya."""
+        self._save_part()
+        self.part += 1
+        self.steps_in_part = 0
+        # Gambar bagian lama sudah ada di file; cache dedup dimulai ulang agar memori tidak menumpuk
+        with self.images_lock:
+            self.images = {}
+        self.document = self._new_document()
+
+    def _save_part(self):
+        path = self._part_path()
         try:
-            self.document.save(self.file_path)
-            print(f"  📄 Report saved: {self.file_path}")
+            self.document.save(path)
+            self.file_paths.append(path)
+            print(f"  📄 Report saved: {path}")
         except Exception as e:
-            print(f"!!! Error saving docx: {e}")
\ No newline at end of file
+            print(f"!!! Error saving docx: {e}")
+
+    def save(self):
+        self._drain()
+        self.pool.shutdown(wait=True)
+        self._save_part()
+        s = self.image_stats
+        if s["count"]:
+            print(f"  🗜️ [Saga] {s['count']} screenshot ({s['unique']} unik): "
+                  f"{s['bytes_in'] / 1048576:.1f}MB -> {s['bytes_out'] / 1048576:.1f}MB")
\ No newline at end of file
@@ -1,5 +1,6 @@
 import streamlit.web.cli as stcli
 import os, sys
+import multiprocessing
 import main  # Import logic utama kita
 
 def resolve_path(path):
@@ -8,8 +9,17 @@ def resolve_path(path):
     return os.path.join(os.path.abspath("."), path)
 
 if __name__ == "__main__":
+    # Wajib untuk suite runner (proses per device) di build PyInstaller
+    multiprocessing.freeze_support()
+
+    # --- MODE PASUKAN (SUITE MULTI-DEVICE), MODE JURU TULIS (REPORT ULANG) & MODE TUKANG SAPU (GC) ---
+    if len(sys.argv) > 1 and sys.argv[1] in ("suite", "report", "visual", "gc"):
+        sys.argv[0] = "main.py"
+        print(f"🤖 {sys.argv[1].capitalize()} Mode Started...")
+        main.main()
+
     # --- MODE KULI (WORKER) ---
-    if len(sys.argv) > 1 and sys.argv[1] == "worker":
+    elif len(sys.argv) > 1 and sys.argv[1] == "worker":
         sys.argv.pop(0) 
         sys.argv[0] = "main.py"
         print("🤖 Worker Process Started...")
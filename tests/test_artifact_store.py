@@ -0,0 +1,58 @@
+import os
+import time
+
+from core.artifact_store import ArtifactStore, mark_latest, new_run_dir, resolve_run_dir
+
+
+def make_run(reports, run_dir, scenario, content):
+    os.makedirs(os.path.join(run_dir, "screenshots"), exist_ok=True)
+    with open(os.path.join(run_dir, "screenshots", "step_1.png"), "wb") as f:
+        f.write(content)
+    ArtifactStore(str(reports / ".store")).ingest_run(run_dir, scenario)
+    time.sleep(0.01)  # urutan 'created' manifest harus jelas
+    return run_dir
+
+
+def test_identical_screenshots_share_one_blob(tmp_path):
+    reports = tmp_path / "reports"
+    first = make_run(reports, new_run_dir(str(reports / "demo")), "demo", b"same" * 100)
+    second = make_run(reports, new_run_dir(str(reports / "demo")), "demo", b"same" * 100)
+
+    blobs = [f for _, _, files in os.walk(reports / ".store" / "blobs") for f in files]
+    assert len(blobs) == 1
+    assert os.path.samefile(os.path.join(first, "screenshots", "step_1.png"),
+                            os.path.join(second, "screenshots", "step_1.png"))
+
+
+def test_gc_keeps_newest_runs_per_scenario(tmp_path):
+    reports = tmp_path / "reports"
+    demo = [make_run(reports, new_run_dir(str(reports / "demo")), "demo", b"d%d" % i) for i in range(3)]
+    other = make_run(reports, new_run_dir(str(reports / "other")), "other", b"o")
+    mark_latest(demo[2])
+
+    result = ArtifactStore(str(reports / ".store")).gc(str(reports), keep=1)
+    assert sorted(result["runs_removed"]) == sorted(demo[:2])
+    assert os.path.isdir(demo[2]) and os.path.isdir(other)
+    assert resolve_run_dir(str(reports / "demo")) == demo[2]
+
+
+def test_gc_does_not_treat_suite_scenarios_as_older_runs(tmp_path):
+    # Suite: reports/suite_*/<serial>/<skenario>/ -> semua skenario 1 device punya folder induk yang sama
+    reports = tmp_path / "reports"
+    suite = reports / "suite_20250101_000000"
+    runs = [make_run(reports, str(suite / serial / name), name, (serial + name).encode())
+            for serial in ("emu1", "emu2") for name in ("checkout", "login", "profile", "search")]
+
+    result = ArtifactStore(str(reports / ".store")).gc(str(reports), keep=2)
+    assert result["runs_removed"] == []
+    assert all(os.path.isdir(run) for run in runs)
+
+
+def test_gc_scope_only_touches_that_folder(tmp_path):
+    reports = tmp_path / "reports"
+    demo = [make_run(reports, new_run_dir(str(reports / "demo")), "demo", b"d%d" % i) for i in range(2)]
+    other = [make_run(reports, new_run_dir(str(reports / "other")), "other", b"o%d" % i) for i in range(2)]
+
+    result = ArtifactStore(str(reports / ".store")).gc(str(reports), keep=1, scope=str(reports / "demo"))
+    assert result["runs_removed"] == [demo[0]]
+    assert all(os.path.isdir(run) for run in other)
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+from core.image_locator import ImageLocator, fast_len
+
+
+def make_screen(width=1080, height=2400, seed=1):
+    """Layar sintetis: blok warna acak + FAB bulat di kanan bawah."""
+    rng = np.random.default_rng(seed)
+    screen = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(screen)
+    for _ in range(300):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        draw.rectangle([x, y, x + int(rng.integers(20, 300)), y + int(rng.integers(10, 120))],
+                       fill=tuple(int(c) for c in rng.integers(0, 255, 3)))
+    draw.ellipse([800, 2000, 1000, 2200], fill=(30, 120, 200))
+    draw.rectangle([890, 2040, 910, 2160], fill="white")
+    draw.rectangle([840, 2090, 960, 2110], fill="white")
+    return screen
+
+
+@pytest.fixture
+def fab_template(tmp_path):
+    screen = make_screen()
+    screen.crop((800, 2000, 1000, 2200)).save(tmp_path / "fab.png")
+    return screen, tmp_path
+
+
+def test_fast_len_only_has_small_factors():
+    for n in (1, 7, 97, 1000, 1031, 2623):
+        m = fast_len(n)
+        assert m >= n
+        for p in (2, 3, 5):
+            while m % p == 0:
+                m //= p
+        assert m == 1
+
+
+def test_locate_finds_template_on_reference_and_smaller_screen(fab_template):
+    screen, folder = fab_template
+    locator = ImageLocator([str(folder)])
+
+    hit = locator.locate(screen, "fab.png")
+    assert hit and abs(hit["x"] - 900) <= 6 and abs(hit["y"] - 2100) <= 6
+
+    hit = locator.locate(screen.resize((720, 1600), Image.BILINEAR), "fab.png")
+    assert hit and abs(hit["x"] - 600) <= 6 and abs(hit["y"] - 1400) <= 6
+
+
+def test_locate_misses_on_blank_screen(fab_template):
+    _, folder = fab_template
+    assert ImageLocator([str(folder)]).locate(Image.new("RGB", (1080, 2400), "gray"), "fab.png") is None
+
+
+def test_locate_is_under_target_ms(fab_template):
+    screen, folder = fab_template
+    locator = ImageLocator([str(folder)])
+    locator.locate(screen, "fab.png")  # pemanasan: cache template
+
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        locator.locate(screen, "fab.png")
+        timings.append((time.perf_counter() - started) * 1000)
+    assert sorted(timings)[2] < ImageLocator.TARGET_MS